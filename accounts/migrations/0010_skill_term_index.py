@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:01
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copies of home.terms as they stood when skills were first indexed
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+MAX_TERM_LENGTH = 100
+
+STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being both but by
+    can could did do does doing for from had has have having he her here his how
+    i if in into is it its just me more most my no nor not of off on once only or
+    other our out over own same she should so some such than that the their them
+    then there these they this those through to too under until up very was we
+    were what when where which while who whom why will with would you your
+""".split())
+
+
+def skill_terms(name):
+    tokens = [token for token in TOKEN_RE.findall(name.lower()) if token not in STOPWORDS]
+    if len(tokens) <= 2:
+        terms = {" ".join(tokens)} if tokens else set()
+    else:
+        terms = {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+    return {term for term in terms if len(term) <= MAX_TERM_LENGTH}
+
+
+def index_existing_skills(apps, schema_editor):
+    Skill = apps.get_model("accounts", "Skill")
+    SkillTerm = apps.get_model("accounts", "SkillTerm")
+    db = schema_editor.connection.alias
+    rows = set()
+    for profile_id, name in Skill.objects.using(db).values_list("profile_id", "name").iterator():
+        rows.update((term, profile_id) for term in skill_terms(name))
+    SkillTerm.objects.using(db).bulk_create(
+        [SkillTerm(term=term, profile_id=profile_id) for term, profile_id in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_profile_latitude_profile_location_profile_longitude'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_terms', to='accounts.profile')),
+            ],
+            options={
+                'unique_together': {('term', 'profile')},
+            },
+        ),
+        migrations.RunPython(index_existing_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_skill_term_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['role'], name='profile_role_idx'),
+        ),
+    ]
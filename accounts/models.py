@@ -45,6 +45,11 @@ class Profile(models.Model):
         help_text="Controls visibility of the resume download link on your profile."
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["role"], name="profile_role_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.get_role_display()}"
 
@@ -59,6 +64,23 @@ class Skill(models.Model):
         return self.name
 
 
+class SkillTerm(models.Model):
+    """
+    Inverted index from normalized skill terms (see ``home.terms``) to the
+    profiles listing that skill. Kept in sync by ``accounts.signals``.
+    """
+    term = models.CharField(max_length=100)
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="skill_terms"
+    )
+
+    class Meta:
+        unique_together = ["term", "profile"]
+
+    def __str__(self):
+        return f"{self.term} -> {self.profile_id}"
+
+
 class Education(models.Model):
     profile = models.ForeignKey(
         Profile, on_delete=models.CASCADE, related_name="educations"
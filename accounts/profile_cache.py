@@ -0,0 +1,100 @@
+"""
+Cache of rendered profile pages.
+
+What a profile page shows depends only on who is looking: the owner sees
+every section, recruiters and administrators also see the sections marked
+"Recruiters only", and everyone else sees the public ones. The page body
+is rendered once per (profile, viewer tier) and kept until the profile is
+edited; the few viewer-specific buttons are rendered around it.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+
+from lockedin.db_router import primary_reads
+
+from .models import Profile
+
+OWNER = "owner"
+RECRUITER = "recruiter"
+PUBLIC = "public"
+TIERS = (OWNER, RECRUITER, PUBLIC)
+
+# Sections and the relation each one lists, if any
+SECTIONS = {
+    "skills": "skills",
+    "education": "educations",
+    "experience": "experiences",
+    "links": "links",
+    "resume": None,
+}
+
+
+def viewer_tier(viewer, username):
+    if viewer.is_authenticated and viewer.username == username:
+        return OWNER
+    if (
+        viewer.is_authenticated
+        and hasattr(viewer, "profile")
+        and viewer.profile.role in [Profile.Role.RECRUITER, Profile.Role.ADMINISTRATOR]
+    ):
+        return RECRUITER
+    return PUBLIC
+
+
+def can_view_section(visibility_setting, tier):
+    if tier == OWNER or visibility_setting == Profile.SectionVisibility.PUBLIC:
+        return True
+    return visibility_setting == Profile.SectionVisibility.RECRUITERS and tier == RECRUITER
+
+
+def _key(username, tier):
+    return f"accounts:profile_page:{username}:{tier}"
+
+
+def render_profile_page(profile, tier):
+    """
+    Render the viewer-independent parts of ``profile``'s page for ``tier``,
+    fetching the visible sections in one prefetch pass.
+    """
+    section_visibility = {
+        section: can_view_section(getattr(profile, f"{section}_visibility"), tier)
+        for section in SECTIONS
+    }
+    prefetch_related_objects(
+        [profile],
+        *[relation for section, relation in SECTIONS.items() if relation and section_visibility[section]],
+    )
+    context = {"profile": profile, "section_visibility": section_visibility}
+    return {
+        "summary": render_to_string("accounts/_profile_summary.html", context),
+        "sections": render_to_string("accounts/_profile_sections.html", context),
+    }
+
+
+def get_profile_page(username, tier):
+    """
+    The cached page parts for ``username`` as seen by ``tier``, rendering
+    them on a miss. Returns None if there is no such profile.
+    """
+    key = _key(username, tier)
+    page = cache.get(key)
+    if page is None:
+        with primary_reads():
+            profile = Profile.objects.select_related("user").filter(user__username=username).first()
+            if profile is None:
+                return None
+            page = render_profile_page(profile, tier)
+        cache.set(key, page, timeout=getattr(settings, "PROFILE_PAGE_CACHE_SECONDS", 3600))
+    return page
+
+
+def invalidate_profile_page(username, using="default"):
+    """Drop every tier of ``username``'s page once the current transaction commits."""
+    transaction.on_commit(
+        partial(cache.delete_many, [_key(username, tier) for tier in TIERS]), using=using
+    )
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile
+from home.terms import skill_terms
+from .models import Profile, Skill, SkillTerm
 
 
 @receiver(post_save, sender=User)
@@ -24,3 +25,25 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         # This ensures that if a user's details (like username) are updated,
         # the profile is also saved. This is good practice.
         instance.profile.save()
+
+
+def index_profile_skills(profile_id, using="default"):
+    """Rebuild the skill term index rows for one profile."""
+    names = Skill.objects.using(using).filter(profile_id=profile_id).values_list("name", flat=True)
+    terms = set()
+    for name in names:
+        terms |= skill_terms(name)
+    SkillTerm.objects.using(using).filter(profile_id=profile_id).delete()
+    SkillTerm.objects.using(using).bulk_create(
+        [SkillTerm(term=term, profile_id=profile_id) for term in terms]
+    )
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def update_skill_terms(sender, instance, using, **kwargs):
+    """Keep the skill -> profile index in step with the profile's skills."""
+    # When the whole user or profile is being deleted its index rows go with it
+    if isinstance(kwargs.get("origin"), (User, Profile)):
+        return
+    index_profile_skills(instance.profile_id, using=using)
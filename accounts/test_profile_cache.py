@@ -0,0 +1,102 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from . import profile_cache
+from .models import Link, Profile, Skill
+
+
+class ProfileCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeker = User.objects.create_user("seeker", password="password")
+        cls.seeker.profile.name = "Sam Seeker"
+        cls.seeker.profile.save()
+        # Skills are for recruiters only by default, links are public
+        cls.skill = Skill.objects.create(profile=cls.seeker.profile, name="Kubernetes")
+        Link.objects.create(profile=cls.seeker.profile, url="https://example.com", label="Portfolio")
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        cls.recruiter.profile.role = Profile.Role.RECRUITER
+        cls.recruiter.profile.save()
+        cls.admin = User.objects.create_user("admin", password="password")
+        cls.admin.profile.role = Profile.Role.ADMINISTRATOR
+        cls.admin.profile.save()
+        cls.other = User.objects.create_user("other", password="password")
+
+    def setUp(self):
+        cache.clear()
+
+    def sections(self, tier):
+        return profile_cache.get_profile_page("seeker", tier)["sections"]
+
+    def test_viewers_fall_into_tiers(self):
+        self.assertEqual(profile_cache.viewer_tier(self.seeker, "seeker"), profile_cache.OWNER)
+        self.assertEqual(profile_cache.viewer_tier(self.recruiter, "seeker"), profile_cache.RECRUITER)
+        self.assertEqual(profile_cache.viewer_tier(self.admin, "seeker"), profile_cache.RECRUITER)
+        self.assertEqual(profile_cache.viewer_tier(self.other, "seeker"), profile_cache.PUBLIC)
+        self.assertEqual(profile_cache.viewer_tier(AnonymousUser(), "seeker"), profile_cache.PUBLIC)
+
+    def test_each_tier_sees_its_sections(self):
+        self.assertIn("Kubernetes", self.sections(profile_cache.OWNER))
+        self.assertIn("Kubernetes", self.sections(profile_cache.RECRUITER))
+        self.assertNotIn("Kubernetes", self.sections(profile_cache.PUBLIC))
+        self.assertIn("Portfolio", self.sections(profile_cache.PUBLIC))
+
+        Profile.objects.filter(user=self.seeker).update(skills_visibility=Profile.SectionVisibility.PRIVATE)
+        cache.clear()
+        self.assertIn("Kubernetes", self.sections(profile_cache.OWNER))
+        self.assertNotIn("Kubernetes", self.sections(profile_cache.RECRUITER))
+
+    def test_pages_are_rendered_once_per_tier(self):
+        # The profile, then only the sections the tier may see
+        with self.assertNumQueries(2):
+            page = profile_cache.get_profile_page("seeker", profile_cache.PUBLIC)
+        with self.assertNumQueries(0):
+            self.assertEqual(profile_cache.get_profile_page("seeker", profile_cache.PUBLIC), page)
+        with self.assertNumQueries(5):
+            profile_cache.get_profile_page("seeker", profile_cache.RECRUITER)
+
+    def test_unknown_profiles_are_not_found(self):
+        self.assertIsNone(profile_cache.get_profile_page("nobody", profile_cache.PUBLIC))
+        self.assertEqual(self.client.get(reverse("accounts.profile_view", args=["nobody"])).status_code, 404)
+
+    def test_editing_the_profile_replaces_every_tier(self):
+        self.sections(profile_cache.OWNER)
+        self.sections(profile_cache.PUBLIC)
+        data = {
+            "name": "Sam Seeker", "bio": "", "location": "", "latitude": "", "longitude": "",
+            "skills_visibility": Profile.SectionVisibility.PUBLIC,
+            "education_visibility": Profile.SectionVisibility.RECRUITERS,
+            "experience_visibility": Profile.SectionVisibility.RECRUITERS,
+            "links_visibility": Profile.SectionVisibility.PUBLIC,
+            "resume_visibility": Profile.SectionVisibility.RECRUITERS,
+        }
+        for prefix in ["skills", "education", "experience", "links"]:
+            data.update({f"{prefix}-TOTAL_FORMS": 0, f"{prefix}-INITIAL_FORMS": 0})
+        self.client.force_login(self.seeker)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("accounts.edit_profile"), data)
+            self.assertNotIn("Kubernetes", self.sections(profile_cache.PUBLIC))
+        self.assertRedirects(response, reverse("accounts.profile_view", args=["seeker"]))
+        self.assertIn("Kubernetes", self.sections(profile_cache.PUBLIC))
+
+    def test_deleting_a_row_replaces_the_page(self):
+        self.sections(profile_cache.OWNER)
+        self.client.force_login(self.seeker)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"{reverse('manage_form_rows', args=['skills'])}?object_id={self.skill.id}")
+        self.assertNotIn("Kubernetes", self.sections(profile_cache.OWNER))
+
+    def test_role_changes_replace_the_page(self):
+        self.assertIn("Job Seeker", profile_cache.get_profile_page("seeker", profile_cache.PUBLIC)["summary"])
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("accounts.manage_users"),
+                {"action": "update", "user_id": self.seeker.profile.id, "new_role": Profile.Role.RECRUITER},
+            )
+        summary = profile_cache.get_profile_page("seeker", profile_cache.PUBLIC)["summary"]
+        self.assertNotIn("Job Seeker", summary)
+        self.assertIn("Recruiter", summary)
@@ -1,3 +1,52 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from lockedin.testing import Budget, QueryPlanTestCase, RouteBudgetTests
+
+from .models import Link, Profile, Skill
+
+HOT_TABLES = {"accounts_profile", "accounts_skill", "accounts_link", "auth_user"}
+
+
+class AccountsQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeker = User.objects.create_user("seeker", password="password")
+        Skill.objects.create(profile=cls.seeker.profile, name="Python")
+        Link.objects.create(profile=cls.seeker.profile, url="https://example.com", label="Site")
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        cls.recruiter.profile.role = Profile.Role.RECRUITER
+        cls.recruiter.profile.save()
+
+    def test_profile_page(self):
+        path = reverse("accounts.profile_view", args=["seeker"])
+        self.assertNoFullScan(HOT_TABLES, path)
+        self.client.force_login(self.recruiter)
+        self.assertNoFullScan(HOT_TABLES, path)
+
+    def test_edit_profile(self):
+        self.client.force_login(self.seeker)
+        self.assertNoFullScan(HOT_TABLES, reverse("accounts.edit_profile"))
+
+    def test_job_seeker_queries_use_the_role_index(self):
+        self.assertQueryUsesIndex(
+            Profile.objects.filter(role=Profile.Role.JOB_SEEKER).order_by(), "profile_role_idx"
+        )
+
+
+class AccountsRouteBudgetTests(RouteBudgetTests, TestCase):
+    urlconf = "accounts.urls"
+    budgets = {
+        "accounts.signup": Budget(5, warm=3),
+        "accounts.login": Budget(2),
+        "accounts.logout": Budget(4),
+        "accounts.profile_view": Budget(10, warm=3),
+        "candidate_recommendations": Budget(10, warm=8),
+        "accounts.edit_profile": Budget(9, warm=7),
+        "manage_form_rows": Budget(2),
+        "accounts.manage_users": Budget(6, warm=4),
+    }
+
+    def url_values(self, data):
+        return {"username": data.seeker.username, "job_id": data.job.id, "formset_name": "skills"}
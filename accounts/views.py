@@ -1,5 +1,5 @@
 from django.contrib.auth.models import User
-from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
@@ -19,6 +19,7 @@ from accounts.forms import (
     LinkFormSet,
 )
 from accounts.models import Profile, Skill, Education, Experience, Link
+from accounts import profile_cache
 from home.models import Job, JobApplication
 
 
@@ -69,41 +70,19 @@ def logout(request):
 
 
 def profile_view(request, username):
-    user_to_view = get_object_or_404(User, username=username)
-    profile = get_object_or_404(Profile, user=user_to_view)
-
-    # Determine who is viewing the profile
-    is_owner = request.user == user_to_view
-    is_recruiter_or_admin = (
-        request.user.is_authenticated
-        and hasattr(request.user, "profile")
-        and request.user.profile.role
-        in [Profile.Role.RECRUITER, Profile.Role.ADMINISTRATOR]
-    )
+    """
+    Show a profile. The page body is cached per viewer tier (owner,
+    recruiter/admin or public) in accounts/profile_cache.py.
+    """
+    page = profile_cache.get_profile_page(username, profile_cache.viewer_tier(request.user, username))
+    if page is None:
+        raise Http404("No such profile.")
 
-    # Determine visibility for each section based on the viewer's role
-    def can_view_section(visibility_setting):
-        if is_owner:
-            return True
-        if visibility_setting == Profile.SectionVisibility.PUBLIC:
-            return True
-        if (
-            visibility_setting == Profile.SectionVisibility.RECRUITERS
-            and is_recruiter_or_admin
-        ):
-            return True
-        return False
-
-    section_visibility = {
-        "skills": can_view_section(profile.skills_visibility),
-        "education": can_view_section(profile.education_visibility),
-        "experience": can_view_section(profile.experience_visibility),
-        "links": can_view_section(profile.links_visibility),
-        "resume": can_view_section(profile.resume_visibility),
+    context = {
+        "page": page,
+        "username": username,
+        "is_owner": request.user.is_authenticated and request.user.username == username,
     }
-
-    context = {"profile": profile, "section_visibility": section_visibility}
-
     return render(request, "accounts/profile_page.html", context)
 
 
@@ -136,6 +115,7 @@ def edit_profile(request):
                 # Save all the related objects in the formsets
                 for formset in all_formsets:
                     formset.save()
+                profile_cache.invalidate_profile_page(request.user.username)
             
             messages.success(
                 request,
@@ -204,6 +184,7 @@ def manage_form_rows(request, formset_name):
                     ModelClass, pk=object_id, profile=request.user.profile
                 )
                 obj.delete()
+                profile_cache.invalidate_profile_page(request.user.username)
             except:
                 # Silently ignore if not found / unauthorized
                 pass
@@ -258,6 +239,7 @@ def manage_users(request):
                 username = target.user.username
                 # Deleting the Django User will cascade and delete the Profile
                 target.user.delete()
+                profile_cache.invalidate_profile_page(username)
                 messages.success(request, f"User '{username}' has been deleted.")
             return redirect("accounts.manage_users")
 
@@ -295,6 +277,7 @@ def manage_users(request):
 
                 target.role = new_role
                 target.save()
+                profile_cache.invalidate_profile_page(target.user.username)
                 messages.success(
                     request,
                     f"{target.user.username}'s role updated to {target.get_role_display()}.",
@@ -1,6 +1,7 @@
 # home/admin.py
 from django.contrib import admin
 from .models import Company, Job, JobApplication
+from .pipeline import move_applications
 
 
 @admin.register(Company)
@@ -60,3 +61,20 @@ class JobApplicationAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = ['applied_at', 'updated_at']
+
+    def get_readonly_fields(self, request, obj=None):
+        # Moving an application to another job would skew both jobs' funnel statistics
+        if obj is not None:
+            return self.readonly_fields + ['job']
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        if change and 'status' in form.changed_data:
+            # Status changes go through the pipeline so they are logged
+            new_status = obj.status
+            obj.status = form.initial['status']
+            super().save_model(request, obj, form, change)
+            move_applications(request.user, {obj.pk: None}, new_status)
+            obj.refresh_from_db(fields=['status', 'version', 'status_changed_at', 'updated_at'])
+        else:
+            super().save_model(request, obj, form, change)
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class HomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'home'
\ No newline at end of file
+    name = 'home'
+
+    def ready(self):
+        import home.signals  # Import the signals file
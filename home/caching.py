@@ -0,0 +1,58 @@
+"""
+Version counters for cache invalidation.
+
+Cached values put the current version of their namespace in the cache key.
+Bumping the version orphans every old entry at once, so writers never have
+to know which keys readers built.
+"""
+from functools import partial
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Bumped when anything shown on the job map changes: a job is added or
+# removed, or its is_active flag, coordinates, title or company changes
+JOB_MAP = "job_map"
+# Bumped when a job or company shown among the home page's featured jobs
+# may have changed; see home.homepage
+FEATURED_JOBS = "featured_jobs"
+# Bumped when a job that may be recommended is edited, deactivated or
+# deleted, dropping every job seeker's cached recommendations
+RECOMMENDATIONS = "recommendations"
+
+
+def _version_key(namespace):
+    return f"home:version:{namespace}"
+
+
+def get_version(namespace):
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a counter lost to eviction can't reuse old versions
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        return cache.get(key)
+
+
+def bump_version_on_commit(namespace, using="default"):
+    """
+    Bump ``namespace`` once the current transaction on ``using`` commits,
+    so a request racing the transaction can't cache pre-commit rows under
+    the new version.
+    """
+    transaction.on_commit(partial(bump_version, namespace), using=using)
+
+
+def versioned_key(namespace, *parts):
+    return ":".join(["home", namespace, str(get_version(namespace)), *map(str, parts)])
@@ -0,0 +1,242 @@
+"""
+Candidate search over ``CandidateDocument``, one flattened row per job seeker.
+
+Candidate search and saved searches filter that one table: no joins into
+skills, education or experience, so no DISTINCT. The result cards render
+from it too. Documents are rebuilt after each transaction that changes a
+profile or its sections (see ``home.percolator.schedule_percolation``).
+"""
+import datetime
+import math
+
+from django.db import transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, Q
+from django.utils import timezone
+
+from accounts.models import Profile
+from .models import CandidateDocument
+from .terms import skill_terms
+
+# Keyset order of search results: newest members first
+CANDIDATE_ORDERING = ("-date_joined", "-profile")
+
+DOCUMENT_FIELDS = [
+    "date_joined",
+    "skills",
+    "skill_names",
+    "degrees",
+    "current_companies",
+    "location_text",
+    "has_experience",
+    "years_experience",
+    "experience_start",
+]
+
+
+def experience_summary(experiences, today=None):
+    """
+    ``(years, start)``: the years covered by the experience entries, counting
+    overlapping jobs once, and for someone in a current job the date their
+    experience runs from without a gap, so that on any later day it is
+    ``day - start`` (see ``CandidateDocument.years_of_experience``); None
+    otherwise. Entries without a start date, or finished ones without an
+    end date, don't count.
+    """
+    today = today or timezone.localdate()
+    periods = []
+    for experience in experiences:
+        if not experience.start_year:
+            continue
+        if experience.is_current:
+            periods.append((experience.start_year, None))
+        elif experience.end_year and experience.end_year > experience.start_year:
+            periods.append((experience.start_year, experience.end_year))
+    days = 0
+    covered_until = None
+    for start, end in sorted(periods, key=lambda period: period[0]):
+        if covered_until is not None:
+            start = max(start, covered_until)
+        if end is None:
+            # Every later entry falls inside this open-ended one
+            start = start - datetime.timedelta(days=days)
+            return round(max(days, (today - start).days) / 365.25, 1), start
+        end = min(end, today)
+        if end > start:
+            days += (end - start).days
+            covered_until = end
+    return round(days / 365.25, 1), None
+
+
+def document_fields(profile, skills, educations, experiences, today=None):
+    """
+    Column values of the search document for ``profile``, from the given
+    skill, education and experience rows.
+    """
+    terms = set()
+    names = []
+    for skill in skills:
+        if skill.name.strip():
+            names.append(skill.name.strip())
+            terms |= skill_terms(skill.name)
+    companies = [experience.company for experience in experiences]
+    years, experience_start = experience_summary(experiences, today)
+    return {
+        "date_joined": profile.user.date_joined,
+        "skills": "|" + "|".join(sorted(terms)) + "|" if terms else "",
+        "skill_names": "\n".join(names),
+        "degrees": "\n".join(education.degree.lower() for education in educations if education.degree),
+        "current_companies": "\n".join(
+            experience.company.lower() for experience in experiences if experience.is_current
+        ),
+        "location_text": "\n".join(
+            text.lower() for text in [profile.location, profile.bio] + companies if text
+        ),
+        "has_experience": bool(experiences),
+        "years_experience": years,
+        "experience_start": experience_start,
+    }
+
+
+def refresh_documents(profile_ids, using="default"):
+    """Rebuild the documents of ``profile_ids``; profiles that aren't job seekers lose theirs."""
+    profile_ids = set(profile_ids)
+    profiles = list(
+        Profile.objects.using(using)
+        .filter(id__in=profile_ids, role=Profile.Role.JOB_SEEKER)
+        .select_related("user")
+        .prefetch_related("skills", "educations", "experiences")
+    )
+    with transaction.atomic(using=using):
+        CandidateDocument.objects.using(using).filter(profile_id__in=profile_ids).exclude(
+            profile_id__in=[profile.id for profile in profiles]
+        ).delete()
+        CandidateDocument.objects.using(using).bulk_create(
+            [
+                CandidateDocument(
+                    profile=profile,
+                    **document_fields(
+                        profile, profile.skills.all(), profile.educations.all(), list(profile.experiences.all())
+                    ),
+                )
+                for profile in profiles
+            ],
+            update_conflicts=True,
+            unique_fields=["profile"],
+            update_fields=DOCUMENT_FIELDS + ["updated_at"],
+        )
+
+
+def rebuild_documents(using="default", batch_size=500):
+    """Rebuild every candidate document. Returns how many job seekers were indexed."""
+    CandidateDocument.objects.using(using).exclude(profile__role=Profile.Role.JOB_SEEKER).delete()
+    ids = list(
+        Profile.objects.using(using)
+        .filter(role=Profile.Role.JOB_SEEKER)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    for start in range(0, len(ids), batch_size):
+        refresh_documents(ids[start:start + batch_size], using=using)
+    return len(ids)
+
+
+def candidate_filter(skills_query="", location="", experience_years="", education_level="",
+                     current_company=""):
+    """
+    Condition on ``CandidateDocument`` for the job seekers matching the
+    criteria. Skills match whole normalized terms (any listed skill is
+    enough); the other criteria match anywhere in the text, ignoring case.
+    """
+    condition = Q()
+
+    terms = set()
+    for name in skills_query.split(","):
+        terms |= skill_terms(name)
+    if terms:
+        skill_filter = Q()
+        for term in sorted(terms):
+            skill_filter |= Q(skills__contains=f"|{term}|")
+        condition &= skill_filter
+
+    if location:
+        condition &= Q(location_text__contains=location.lower())
+
+    try:
+        years = max(int(experience_years), 0)
+    except ValueError:
+        pass
+    else:
+        # Years still grow for people in a current job, from experience_start
+        started_by = timezone.localdate() - datetime.timedelta(days=math.ceil(years * 365.25))
+        condition &= Q(has_experience=True) & (
+            Q(years_experience__gte=years) | Q(experience_start__lte=started_by)
+        )
+
+    if education_level:
+        condition &= Q(degrees__contains=education_level.lower())
+
+    if current_company:
+        condition &= Q(current_companies__contains=current_company.lower())
+
+    return condition
+
+
+def search_candidates(**criteria):
+    """Documents of the job seekers matching ``criteria`` (see ``candidate_filter``), newest members first."""
+    return (
+        CandidateDocument.objects.select_related("profile__user")
+        .filter(candidate_filter(**criteria))
+        .order_by(*CANDIDATE_ORDERING)
+    )
+
+
+def new_match_summaries(searches, preview_size=5, chunk_size=200, max_chunks=5):
+    """
+    ``{search id: (new match count, newest new matches)}`` for saved
+    ``searches``, with up to ``preview_size`` matches each. The counts come
+    from one query; the previews from walking the documents newest first,
+    ``chunk_size`` at a time, for at most ``max_chunks`` chunks. Searches
+    whose matches are too old or rare to turn up by then get one LIMIT
+    ``preview_size`` query each.
+    """
+    conditions = {
+        f"search_{search.id}": search.new_matches_filter() or Q(pk__isnull=False) for search in searches
+    }
+    if not conditions:
+        return {}
+    counts = CandidateDocument.objects.aggregate(
+        **{name: Count("pk", filter=condition) for name, condition in conditions.items()}
+    )
+    previews = {name: [] for name in conditions}
+    wanted = {name: min(count, preview_size) for name, count in counts.items() if count}
+
+    any_wanted = Q()
+    for name in wanted:
+        any_wanted |= conditions[name]
+    documents = CandidateDocument.objects.select_related("profile__user").order_by(*CANDIDATE_ORDERING)
+    walk = documents.annotate(
+        **{name: ExpressionWrapper(conditions[name], BooleanField()) for name in wanted}
+    ).filter(any_wanted)
+    last = None
+    for _ in range(max_chunks):
+        if all(len(previews[name]) >= size for name, size in wanted.items()):
+            break
+        chunk = walk
+        if last is not None:
+            chunk = chunk.filter(
+                Q(date_joined__lt=last.date_joined) | Q(date_joined=last.date_joined, profile_id__lt=last.pk)
+            )
+        chunk = list(chunk[:chunk_size])
+        for document in chunk:
+            for name, size in wanted.items():
+                if getattr(document, name) and len(previews[name]) < size:
+                    previews[name].append(document)
+        if len(chunk) < chunk_size:
+            break
+        last = chunk[-1]
+    else:
+        for name, size in wanted.items():
+            if len(previews[name]) < size:
+                previews[name] = list(documents.filter(conditions[name])[:size])
+
+    return {search.id: (counts[f"search_{search.id}"], previews[f"search_{search.id}"]) for search in searches}
@@ -0,0 +1,298 @@
+"""
+Table exports for administrators, as CSV or JSON Lines.
+
+Rows are read with ``values_list().iterator()`` and written out chunk by
+chunk, so memory use stays flat whatever the table size. Under ASGI the
+chunks are handed over as an async iterator, since Django would otherwise
+read a sync one to the end before sending any of it. Foreign keys are
+exported as the raw id plus a readable label pulled in by the same query.
+
+Large tables can instead be exported in the background: the admin page
+queues an ``ExportJob`` and the ``run_export_worker`` command writes it to a
+gzip file under ``MEDIA_ROOT/exports``, recording progress as it goes.
+"""
+import csv
+import datetime
+import gzip
+import os
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Company, ExportJob, Job, JobApplication
+
+EXPORTABLE_MODELS = {
+    "Jobs": Job,
+    "Companies": Company,
+    "Job Applications": JobApplication,
+}
+
+EXPORT_FORMATS = {
+    "csv": ("CSV", "text/csv", "csv"),
+    "jsonl": ("JSON Lines", "application/x-ndjson", "jsonl"),
+}
+
+# Rows fetched from the database, and written out, per chunk
+CHUNK_SIZE = 2000
+
+
+def label_field(model):
+    """The field shown for rows of ``model`` when they are a foreign key target."""
+    if model is get_user_model():
+        return model.USERNAME_FIELD
+    for name in ("name", "title"):
+        try:
+            model._meta.get_field(name)
+            return name
+        except FieldDoesNotExist:
+            continue
+    return model._meta.pk.name
+
+
+def export_columns(model):
+    """
+    ``(header, lookup)`` pairs for every concrete field. A foreign key
+    ``company`` becomes ``company_id`` and ``company`` (the company's name).
+    """
+    columns = []
+    for field in model._meta.concrete_fields:
+        if field.is_relation:
+            columns.append((field.attname, field.attname))
+            columns.append((field.name, f"{field.name}__{label_field(field.related_model)}"))
+        else:
+            columns.append((field.name, field.attname))
+    return columns
+
+
+def export_rows(model, columns, chunk_size=CHUNK_SIZE):
+    return (
+        model.objects.order_by("pk")
+        .values_list(*[lookup for _, lookup in columns])
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+class _Echo:
+    """File-like object handing back what ``csv.writer`` writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(headers, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(headers, rows):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(dict(zip(headers, row))) + "\n"
+
+
+def export_lines(model, export_format, chunk_size=CHUNK_SIZE):
+    """Yield the export of ``model`` one line at a time."""
+    columns = export_columns(model)
+    headers = [header for header, _ in columns]
+    rows = export_rows(model, columns, chunk_size)
+    if export_format == "jsonl":
+        return jsonl_lines(headers, rows)
+    return csv_lines(headers, rows)
+
+
+def chunked(lines, chunk_size=CHUNK_SIZE):
+    """Join lines into larger blocks so each write to the client carries many rows."""
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= chunk_size:
+            yield "".join(block)
+            block = []
+    if block:
+        yield "".join(block)
+
+
+def export_filename(model, export_format):
+    extension = EXPORT_FORMATS[export_format][2]
+    return f"{model._meta.model_name}_export_{timezone.now().strftime('%Y-%m-%d')}.{extension}"
+
+
+_END = object()
+
+
+async def iterate_in_thread(iterator):
+    """
+    Async iterator over the sync ``iterator``, advanced one item at a time
+    in the thread Django runs sync code in, where its database connection
+    lives.
+    """
+    next_item = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            item = await next_item(iterator, _END)
+            if item is _END:
+                return
+            yield item
+    finally:
+        # Release the rows cursor if the client went away early
+        if hasattr(iterator, "close"):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+def streaming_export_response(request, model, export_format):
+    content_type = EXPORT_FORMATS[export_format][1]
+    blocks = chunked(export_lines(model, export_format))
+    if isinstance(request, ASGIRequest):
+        blocks = iterate_in_thread(blocks)
+    response = StreamingHttpResponse(blocks, content_type=content_type)
+    response["Content-Disposition"] = f"attachment; filename={export_filename(model, export_format)}"
+    return response
+
+
+# Background exports
+
+# Rows between progress updates of a running export
+PROGRESS_INTERVAL = 20000
+
+
+def export_retention():
+    return datetime.timedelta(hours=getattr(settings, "EXPORT_RETENTION_HOURS", 24))
+
+
+def export_timeout():
+    return datetime.timedelta(minutes=getattr(settings, "EXPORT_TIMEOUT_MINUTES", 10))
+
+
+class ExportAbandoned(Exception):
+    """The job stopped running (it was marked as stalled) while being exported."""
+
+
+def fail_stalled_jobs():
+    """
+    Mark running exports that haven't reported progress within the timeout
+    as failed, so their worker having died doesn't leave them running
+    forever. Returns how many.
+    """
+    cutoff = timezone.now() - export_timeout()
+    return ExportJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=ExportJob.Status.RUNNING,
+    ).update(
+        status=ExportJob.Status.FAILED,
+        error="The export stopped before finishing. Please request it again.",
+        finished_at=timezone.now(),
+    )
+
+
+def claim_next_job():
+    """
+    Take the oldest queued export, or return None. The conditional UPDATE
+    makes sure two workers never pick the same job.
+    """
+    while True:
+        job = ExportJob.objects.filter(status=ExportJob.Status.QUEUED).order_by("created_at", "id").first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.QUEUED).update(
+            status=ExportJob.Status.RUNNING, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_export_job(job):
+    """
+    Write ``job``'s export to a gzip file, updating its progress on the way.
+    Every update only applies while the job is still running, so an export
+    marked as stalled in the meantime stays failed and its file is removed.
+    """
+    running = ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.RUNNING)
+    heartbeat = getattr(settings, "EXPORT_HEARTBEAT_SECONDS", 30)
+
+    path = None
+    rows_written = 0
+    unreported = 0
+    try:
+        model = EXPORTABLE_MODELS.get(job.model_key)
+        if model is None:
+            raise ValueError(f"Unknown export type {job.model_key!r}")
+        total_rows = model.objects.count()
+        if not running.update(total_rows=total_rows, heartbeat_at=timezone.now()):
+            raise ExportAbandoned(f"Export #{job.pk} is no longer running")
+
+        relative_path = os.path.join(
+            "exports", uuid.uuid4().hex, export_filename(model, job.export_format) + ".gz"
+        )
+        path = os.path.join(settings.MEDIA_ROOT, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        reported_at = time.monotonic()
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+            lines = export_lines(model, job.export_format)
+            if job.export_format == "csv":
+                # Header line
+                f.write(next(lines))
+            for line in lines:
+                f.write(line)
+                unreported += 1
+                if unreported >= PROGRESS_INTERVAL or time.monotonic() - reported_at >= heartbeat:
+                    updated = running.update(
+                        rows_written=F("rows_written") + unreported, heartbeat_at=timezone.now()
+                    )
+                    if not updated:
+                        raise ExportAbandoned(f"Export #{job.pk} is no longer running")
+                    rows_written += unreported
+                    unreported = 0
+                    reported_at = time.monotonic()
+
+        finished_at = timezone.now()
+        finished = running.update(
+            status=ExportJob.Status.DONE,
+            rows_written=rows_written + unreported,
+            file=relative_path,
+            heartbeat_at=finished_at,
+            finished_at=finished_at,
+            expires_at=finished_at + export_retention(),
+        )
+        if not finished:
+            raise ExportAbandoned(f"Export #{job.pk} is no longer running")
+    except Exception as exc:
+        if path and os.path.exists(path):
+            os.remove(path)
+        running.update(
+            status=ExportJob.Status.FAILED,
+            error=str(exc),
+            finished_at=timezone.now(),
+        )
+        raise
+
+
+def purge_expired_exports():
+    """Delete finished exports past their retention time. Returns how many."""
+    expired = ExportJob.objects.filter(expires_at__lte=timezone.now())
+    count = 0
+    for job in expired.iterator():
+        if job.file:
+            directory = os.path.dirname(job.file.path)
+            job.file.delete(save=False)
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+        job.delete()
+        count += 1
+    return count
@@ -0,0 +1,320 @@
+"""
+Hiring-funnel statistics, kept up to date as applications move.
+
+Every status change is appended to ``ApplicationEvent`` and, in the same
+transaction, added to three rollup tables:
+
+* ``JobStageStats``: per job and stage, the applications in it now and
+  the applications that have ever reached it;
+* ``JobDailyStageStats``: per job, day and stage, the applications that
+  entered the stage that day;
+* ``JobStageDuration``: per job and stage, a histogram of how long
+  applications stayed before moving on.
+
+Reports read the rollups, so their cost grows with the number of jobs,
+not applications. ``tally`` is the single definition of the rollups in
+terms of the log; ``rebuild_rollups`` recomputes them from scratch with it.
+"""
+from collections import Counter, namedtuple
+import datetime
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import ApplicationEvent, JobApplication, JobDailyStageStats, JobStageDuration, JobStageStats
+
+Status = JobApplication.ApplicationStatus
+
+# Stages in the order applications are expected to pass through them;
+# Rejected can follow any of them and is reported separately
+FUNNEL_STAGES = [Status.NEW, Status.SCREENING, Status.INTERVIEW, Status.OFFER, Status.HIRED]
+
+# (upper bound, label) of the time-in-stage histogram buckets
+DURATION_BUCKETS = [
+    (datetime.timedelta(hours=1), "under an hour"),
+    (datetime.timedelta(days=1), "under a day"),
+    (datetime.timedelta(days=3), "1-3 days"),
+    (datetime.timedelta(days=7), "3-7 days"),
+    (datetime.timedelta(days=14), "1-2 weeks"),
+    (datetime.timedelta(days=30), "2-4 weeks"),
+    (datetime.timedelta(days=90), "1-3 months"),
+    (None, "over 3 months"),
+]
+
+Rollups = namedtuple("Rollups", "current reached daily durations")
+
+
+def duration_bucket(duration):
+    for index, (upper, _) in enumerate(DURATION_BUCKETS):
+        if upper is None or duration < upper:
+            return index
+
+
+def event_day(changed_at):
+    return timezone.localdate(changed_at) if timezone.is_aware(changed_at) else changed_at.date()
+
+
+def tally(events, reached=()):
+    """
+    Rollup deltas for ``events``, tuples of ``(application_id, job_id,
+    from_status, to_status, changed_at, time_in_stage)`` in the order they
+    happened. ``reached`` holds the ``(application_id, status)`` pairs
+    already counted, so going back to a stage doesn't count twice.
+    """
+    rollups = Rollups(Counter(), Counter(), Counter(), Counter())
+    reached = set(reached)
+    for application_id, job_id, from_status, to_status, changed_at, time_in_stage in events:
+        if from_status:
+            rollups.current[job_id, from_status] -= 1
+            if time_in_stage is not None:
+                rollups.durations[job_id, from_status, duration_bucket(time_in_stage)] += 1
+        rollups.current[job_id, to_status] += 1
+        if (application_id, to_status) not in reached:
+            reached.add((application_id, to_status))
+            rollups.reached[job_id, to_status] += 1
+        rollups.daily[job_id, event_day(changed_at), to_status] += 1
+    return rollups
+
+
+def _event_tuple(event):
+    return (
+        event.application_id,
+        event.job_id,
+        event.from_status,
+        event.to_status,
+        event.changed_at,
+        event.time_in_stage,
+    )
+
+
+def _add(model, key_fields, deltas, using):
+    """
+    Add ``deltas`` (``{key: {field: delta}}``) to the rows of ``model``
+    identified by ``key_fields``, creating missing rows. Keys getting the
+    same deltas share one UPDATE.
+    """
+    deltas = {key: changes for key, changes in deltas.items() if any(changes.values())}
+    if not deltas:
+        return
+    manager = model._default_manager.db_manager(using)
+    manager.bulk_create(
+        [model(**dict(zip(key_fields, key))) for key in deltas], ignore_conflicts=True
+    )
+    by_change = {}
+    for key, changes in deltas.items():
+        by_change.setdefault(tuple(sorted(changes.items())), []).append(key)
+    for changes, keys in by_change.items():
+        condition = Q()
+        for key in keys:
+            condition |= Q(**dict(zip(key_fields, key)))
+        manager.filter(condition).update(
+            **{name: F(name) + delta for name, delta in changes if delta}
+        )
+
+
+def apply_rollups(rollups, using=None, sign=1):
+    stage_keys = set(rollups.current) | set(rollups.reached)
+    _add(
+        JobStageStats,
+        ("job_id", "status"),
+        {
+            key: {"current": sign * rollups.current[key], "reached": sign * rollups.reached[key]}
+            for key in stage_keys
+        },
+        using,
+    )
+    _add(
+        JobDailyStageStats,
+        ("job_id", "day", "status"),
+        {key: {"entered": sign * count} for key, count in rollups.daily.items()},
+        using,
+    )
+    _add(
+        JobStageDuration,
+        ("job_id", "status", "bucket"),
+        {key: {"count": sign * count} for key, count in rollups.durations.items()},
+        using,
+    )
+
+
+def record_events(events, using=None):
+    """
+    Append unsaved ``ApplicationEvent``s to the log and add them to the
+    rollups. Call inside the transaction that changed the applications.
+    """
+    if not events:
+        return
+    with transaction.atomic(using=using):
+        reached = ApplicationEvent.objects.using(using).filter(
+            application_id__in={event.application_id for event in events},
+            to_status__in={event.to_status for event in events},
+        ).values_list("application_id", "to_status")
+        rollups = tally(map(_event_tuple, events), reached)
+        ApplicationEvent.objects.using(using).bulk_create(events)
+        apply_rollups(rollups, using)
+
+
+def record_created(application, using=None):
+    record_events(
+        [
+            ApplicationEvent(
+                application_id=application.id,
+                job_id=application.job_id,
+                to_status=application.status,
+                changed_at=application.applied_at,
+            )
+        ],
+        using,
+    )
+
+
+def forget_application(application_id, using=None):
+    """Take a deleted application's events back out of the rollups."""
+    events = ApplicationEvent.objects.using(using).filter(application_id=application_id).order_by(
+        "changed_at", "id"
+    )
+    apply_rollups(tally(map(_event_tuple, events)), using, sign=-1)
+
+
+def rebuild_rollups(using=None):
+    """Recompute every rollup from the event log."""
+    events = (
+        ApplicationEvent.objects.using(using)
+        .order_by("changed_at", "id")
+        .values_list("application_id", "job_id", "from_status", "to_status", "changed_at", "time_in_stage")
+        .iterator(chunk_size=5000)
+    )
+    rollups = tally(events)
+    with transaction.atomic(using=using):
+        for model in (JobStageStats, JobDailyStageStats, JobStageDuration):
+            model.objects.using(using).all().delete()
+        for model, objects in rollup_objects(rollups):
+            model.objects.using(using).bulk_create(objects, batch_size=1000)
+
+
+def rollup_objects(rollups):
+    """``(model, unsaved rows)`` for each rollup table."""
+    return [
+        (JobStageStats, [
+            JobStageStats(job_id=job_id, status=status, current=rollups.current[job_id, status],
+                          reached=rollups.reached[job_id, status])
+            for job_id, status in set(rollups.current) | set(rollups.reached)
+        ]),
+        (JobDailyStageStats, [
+            JobDailyStageStats(job_id=job_id, day=day, status=status, entered=count)
+            for (job_id, day, status), count in rollups.daily.items()
+        ]),
+        (JobStageDuration, [
+            JobStageDuration(job_id=job_id, status=status, bucket=bucket, count=count)
+            for (job_id, status, bucket), count in rollups.durations.items()
+        ]),
+    ]
+
+
+# Reports; ``jobs`` is a Job queryset and is used as a subquery
+
+
+def stage_counts_by_job(jobs):
+    """``{job_id: {status: current count}}``."""
+    counts = {}
+    for job_id, status, current in JobStageStats.objects.filter(job__in=jobs).values_list(
+        "job_id", "status", "current"
+    ):
+        counts.setdefault(job_id, dict.fromkeys(Status.values, 0))[status] = current
+    return counts
+
+
+def funnel(jobs):
+    """
+    One row per stage: applications there now, applications that reached
+    it, and the share of all applications (and of the previous stage's)
+    that did.
+    """
+    totals = {
+        row["status"]: row
+        for row in JobStageStats.objects.filter(job__in=jobs)
+        .values("status")
+        .annotate(current=Sum("current"), reached=Sum("reached"))
+    }
+    applied = totals.get(Status.NEW, {}).get("reached") or 0
+    rows = []
+    previous = None
+    for stage in FUNNEL_STAGES + [Status.REJECTED]:
+        reached = totals.get(stage, {}).get("reached") or 0
+        row = {
+            "status": stage,
+            "label": stage.label,
+            "current": totals.get(stage, {}).get("current") or 0,
+            "reached": reached,
+            "conversion": round(100 * reached / applied, 1) if applied else None,
+            "step_conversion": None,
+        }
+        if stage in FUNNEL_STAGES:
+            if previous:
+                row["step_conversion"] = round(100 * reached / previous, 1)
+            previous = reached
+        rows.append(row)
+    return rows
+
+
+def median_duration_bucket(jobs):
+    """
+    ``{status: label}`` of the ``DURATION_BUCKETS`` range the median time in
+    stage falls in, for stages applications have left. The rollups only
+    keep the histogram, so this is a range such as "1-3 days", not a
+    duration.
+    """
+    histograms = {}
+    for status, bucket, count in (
+        JobStageDuration.objects.filter(job__in=jobs)
+        .values_list("status", "bucket")
+        .annotate(total=Sum("count"))
+        .order_by("status", "bucket")
+    ):
+        histograms.setdefault(status, []).append((bucket, count))
+    medians = {}
+    for status, histogram in histograms.items():
+        half = sum(count for _, count in histogram) / 2
+        seen = 0
+        for bucket, count in histogram:
+            seen += count
+            if count and seen >= half:
+                medians[status] = DURATION_BUCKETS[bucket][1]
+                break
+    return medians
+
+
+def daily_activity(jobs, days=30):
+    """
+    ``(day, {status: entered})`` for each of the last ``days`` days, oldest
+    first.
+    """
+    today = timezone.localdate()
+    start = today - datetime.timedelta(days=days - 1)
+    activity = {start + datetime.timedelta(days=offset): Counter() for offset in range(days)}
+    for day, status, entered in (
+        JobDailyStageStats.objects.filter(job__in=jobs, day__gte=start, day__lte=today)
+        .values_list("day", "status")
+        .annotate(total=Sum("entered"))
+        .order_by()
+    ):
+        activity[day][status] += entered
+    return sorted(activity.items())
+
+
+def company_summaries(jobs):
+    """Per company: applications now in each stage and in total, busiest first."""
+    companies = {}
+    for company_id, name, status, current in (
+        JobStageStats.objects.filter(job__in=jobs)
+        .values_list("job__company_id", "job__company__name", "status")
+        .annotate(total=Sum("current"))
+        .order_by()
+    ):
+        company = companies.setdefault(
+            company_id, {"name": name, "stages": dict.fromkeys(Status.values, 0), "total": 0}
+        )
+        company["stages"][status] = current
+        company["total"] += current
+    return sorted(companies.values(), key=lambda company: -company["total"])
@@ -0,0 +1,177 @@
+"""
+Geographic helpers for the job map.
+"""
+from math import radians, degrees, sin, cos, sqrt, atan2, floor
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Floor, Power, Radians, Sin, Sqrt
+
+from lockedin.db_router import primary_reads
+
+from . import caching
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Calculate the distance between two points on Earth in miles.
+    """
+    lat1_rad, lon1_rad, lat2_rad, lon2_rad = map(radians, [lat1, lon1, lat2, lon2])
+
+    dlon = lon2_rad - lon1_rad
+    dlat = lat2_rad - lat1_rad
+
+    a = sin(dlat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlon / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+
+    return EARTH_RADIUS_MILES * c
+
+
+def bounding_box(lat, lon, miles):
+    """
+    Return (min_lat, max_lat, min_lon, max_lon) enclosing a circle of ``miles``
+    around the point. Near the poles or the antimeridian the longitude range
+    widens to the whole globe rather than wrapping.
+    """
+    lat_delta = miles / MILES_PER_DEGREE_LAT
+    min_lat, max_lat = lat - lat_delta, lat + lat_delta
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+
+    # Widest point of the circle is at the latitude closest to a pole
+    lon_delta = degrees(miles / (EARTH_RADIUS_MILES * cos(radians(max(abs(min_lat), abs(max_lat))))))
+    min_lon, max_lon = lon - lon_delta, lon + lon_delta
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def distance_expression(lat, lon, lat_field="latitude", lon_field="longitude"):
+    """
+    Haversine distance in miles from (lat, lon) to each row, as a database
+    expression so the whole result set is measured in one pass.
+    """
+    def half_angle_sin_squared(field, origin):
+        return Power(Sin((Radians(F(field)) - Value(radians(origin))) / 2), 2)
+
+    a = half_angle_sin_squared(lat_field, lat) + (
+        Value(cos(radians(lat))) * Cos(Radians(F(lat_field))) * half_angle_sin_squared(lon_field, lon)
+    )
+    return Value(2 * EARTH_RADIUS_MILES) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def within_distance(queryset, lat, lon, miles, lat_field="latitude", lon_field="longitude"):
+    """
+    Narrow ``queryset`` to rows within ``miles`` of (lat, lon), annotated with
+    ``distance`` and nearest first. The bounding box is an indexed range scan;
+    the exact distance is only computed for rows inside it.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, miles)
+    return (
+        queryset.filter(
+            **{
+                f"{lat_field}__range": (min_lat, max_lat),
+                f"{lon_field}__range": (min_lon, max_lon),
+            }
+        )
+        .annotate(distance=distance_expression(lat, lon, lat_field, lon_field))
+        .filter(distance__lte=miles)
+        .order_by("distance")
+    )
+
+
+# Map clustering
+#
+# The world is cut into square tiles of 360 / 2**zoom degrees, and each tile
+# into CELLS_PER_TILE x CELLS_PER_TILE grid cells. Jobs in the same cell are
+# returned as one cluster, and the clusters for a tile are cached until a job
+# changes.
+
+CELLS_PER_TILE = 8
+# From this zoom level on, individual markers are returned instead of clusters
+MARKER_ZOOM = 12
+# Upper bound on individual markers in one response
+MAX_MARKERS = 1000
+MAX_ZOOM = 19
+CLUSTER_CACHE_TIMEOUT = 60 * 60
+
+
+def parse_bbox(value):
+    """
+    Parse a Leaflet ``west,south,east,north`` string, clamped to valid
+    coordinates. Returns None if it is malformed.
+    """
+    try:
+        west, south, east, north = (float(part) for part in value.split(","))
+    except (AttributeError, ValueError):
+        return None
+    west, east = max(west, -180.0), min(east, 180.0)
+    south, north = max(south, -90.0), min(north, 90.0)
+    if west > east or south > north:
+        return None
+    return west, south, east, north
+
+
+def tile_size(zoom):
+    return 360.0 / (2 ** zoom)
+
+
+def tiles_for_bbox(bbox, zoom):
+    """Yield (x, y) indices of the tiles at ``zoom`` overlapping the bbox."""
+    west, south, east, north = bbox
+    size = tile_size(zoom)
+    max_index = 2 ** zoom - 1
+    x_range = range(floor((west + 180) / size), min(floor((east + 180) / size), max_index) + 1)
+    y_range = range(floor((south + 90) / size), min(floor((north + 90) / size), max_index) + 1)
+    for x in x_range:
+        for y in y_range:
+            yield x, y
+
+
+def cluster_tile(queryset, zoom, x, y):
+    """Group the jobs inside one tile by grid cell: one query, using the lat/lon index."""
+    size = tile_size(zoom)
+    cell = size / CELLS_PER_TILE
+    west, south = x * size - 180, y * size - 90
+    rows = (
+        queryset.filter(
+            latitude__gte=south, latitude__lt=south + size,
+            longitude__gte=west, longitude__lt=west + size,
+        )
+        .annotate(
+            cell_x=Floor((F("longitude") + 180) / cell),
+            cell_y=Floor((F("latitude") + 90) / cell),
+        )
+        .order_by()
+        .values("cell_x", "cell_y")
+        .annotate(count=Count("id"), lat=Avg("latitude"), lon=Avg("longitude"))
+    )
+    return [
+        {"lat": row["lat"], "lon": row["lon"], "count": row["count"]} for row in rows
+    ]
+
+
+def cluster_jobs(queryset, bbox, zoom, use_cache=True):
+    """
+    Return the clusters (centroid and job count) covering ``bbox`` at ``zoom``.
+    Per-tile results are cached against the jobs version; pass
+    ``use_cache=False`` when ``queryset`` carries request-specific filters.
+    """
+    tiles = list(tiles_for_bbox(bbox, zoom))
+    if not use_cache:
+        return [c for x, y in tiles for c in cluster_tile(queryset, zoom, x, y)]
+
+    keys = {caching.versioned_key(caching.JOB_MAP, "clusters", zoom, x, y): (x, y) for x, y in tiles}
+    cached = cache.get_many(keys.keys())
+    with primary_reads():
+        missing = {
+            key: cluster_tile(queryset, zoom, *tile)
+            for key, tile in keys.items() if key not in cached
+        }
+    if missing:
+        cache.set_many(missing, CLUSTER_CACHE_TIMEOUT)
+    cached.update(missing)
+    return [cluster for key in keys for cluster in cached[key]]
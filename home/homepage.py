@@ -0,0 +1,78 @@
+"""
+Cached segments of the home page.
+
+Both job lists on the home page are kept in the cache as plain job cards,
+so a warm page needs no queries for them:
+
+* the featured jobs are the same for every visitor and are stored per
+  version of the ``FEATURED_JOBS`` namespace, bumped when a job or company
+  shown on a card changes;
+* each job seeker's recommendations are stored for
+  ``RECOMMENDATIONS_CACHE_SECONDS`` and dropped as soon as their skills or
+  applications change, and everyone's at once (a ``RECOMMENDATIONS``
+  version bump) when a job already posted changes or goes away. New jobs
+  show up once the entries expire.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from lockedin.db_router import primary_reads
+
+from . import caching
+from .models import Job
+
+FEATURED_JOBS_COUNT = 3
+
+_MISSING = object()
+
+
+def job_card(job):
+    """What the home page shows of a job; expects ``company`` to be loaded."""
+    return {
+        "id": job.id,
+        "title": job.title,
+        "company_name": job.company.name,
+        "location": job.location,
+        "job_type_display": job.get_job_type_display(),
+        "salary_range": job.salary_range,
+    }
+
+
+def featured_jobs():
+    key = caching.versioned_key(caching.FEATURED_JOBS, "cards")
+    cards = cache.get(key)
+    if cards is None:
+        with primary_reads():
+            jobs = Job.objects.filter(is_active=True).select_related("company")[:FEATURED_JOBS_COUNT]
+            cards = [job_card(job) for job in jobs]
+        cache.set(key, cards, timeout=None)
+    return cards
+
+
+def invalidate_featured_jobs(using="default"):
+    caching.bump_version_on_commit(caching.FEATURED_JOBS, using=using)
+
+
+def _recommendations_key(user_id):
+    return caching.versioned_key(caching.RECOMMENDATIONS, user_id)
+
+
+def recommended_jobs(user, build):
+    """The cached recommendation cards of ``user``, computed with ``build(user)`` on a miss."""
+    key = _recommendations_key(user.id)
+    cards = cache.get(key, _MISSING)
+    if cards is _MISSING:
+        with primary_reads():
+            cards = [job_card(job) for job in build(user)]
+        cache.set(key, cards, timeout=getattr(settings, "RECOMMENDATIONS_CACHE_SECONDS", 900))
+    return cards
+
+
+def invalidate_recommendations(user_id, using="default"):
+    """Drop ``user_id``'s recommendations once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(_recommendations_key(user_id)), using=using)
+
+
+def invalidate_all_recommendations(using="default"):
+    caching.bump_version_on_commit(caching.RECOMMENDATIONS, using=using)
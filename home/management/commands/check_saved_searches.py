@@ -1,12 +1,45 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from home.models import SavedSearch
-from django.contrib import messages
-from django.contrib.messages import get_messages
+from concurrent.futures import ProcessPoolExecutor
+import json
 import logging
+import multiprocessing
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from home.models import SavedSearch, SavedSearchMatch
 
 logger = logging.getLogger(__name__)
 
+CHECKPOINT_NAME = 'check_saved_searches.checkpoint'
+
+
+def count_new_matches(group):
+    """
+    Count the new matches of one set of criteria since each of the given
+    ``last_notified`` times, in one query. Runs in the worker processes, so
+    it only gets plain values; returns ``{(criteria, last_notified): count}``.
+    """
+    criteria, since = group
+    skills, location, min_years, education_level, current_company = criteria
+    search = SavedSearch(
+        skills_query=','.join(skills),
+        location=location,
+        experience_years='' if min_years is None else str(min_years),
+        education_level=education_level,
+        current_company=current_company,
+    )
+    counts = search.get_matching_candidates().order_by().aggregate(**{
+        f'since_{number}': Count('profile', filter=Q(date_joined__gt=last_notified)) if last_notified else Count('profile')
+        for number, last_notified in enumerate(since)
+    })
+    return {
+        (criteria, last_notified): counts[f'since_{number}']
+        for number, last_notified in enumerate(since)
+    }
+
 
 class Command(BaseCommand):
     help = 'Check saved searches for new matches and send notifications'
@@ -17,39 +50,198 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be done without actually sending notifications',
         )
+        parser.add_argument(
+            '--pending',
+            action='store_true',
+            help='Notify from the matches recorded as profiles change instead of re-running every search',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes running the match queries',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of searches checked and committed per batch',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording progress, so an interrupted run resumes where it stopped '
+                 '(default: in settings.CHECKPOINT_DIR)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore an existing checkpoint and check every search',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        
-        active_searches = SavedSearch.objects.filter(is_active=True)
-        
+
+        if options['pending']:
+            total_notifications = self.notify_pending(dry_run)
+            self.report_total(total_notifications, dry_run)
+            return
+
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be at least 1.')
+
+        checkpoint = options['checkpoint'] or os.path.join(settings.CHECKPOINT_DIR, CHECKPOINT_NAME)
+        last_id = 0
+        if not dry_run and not options['restart']:
+            last_id = self.read_checkpoint(checkpoint)
+            if last_id:
+                self.stdout.write(f"Resuming after saved search #{last_id}")
+
+        executor = None
+        if options['workers'] > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                mp_context=multiprocessing.get_context('fork'),
+            )
+        try:
+            total_notifications = self.check_searches(
+                last_id, options['batch_size'], executor, checkpoint, dry_run
+            )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if not dry_run and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.report_total(total_notifications, dry_run)
+
+    def check_searches(self, last_id, batch_size, executor, checkpoint, dry_run):
+        """
+        Walk the active searches in id order, one batch at a time. Searches
+        in a batch with the same criteria share one count query, whatever
+        their ``last_notified``.
+        """
+        active_searches = (
+            SavedSearch.objects.filter(is_active=True)
+            .select_related('recruiter')
+            .order_by('id')
+        )
+        # One time for the whole run, so searches notified together keep
+        # sharing their queries
+        now = timezone.now()
         total_notifications = 0
-        
-        for search in active_searches:
-            new_matches = search.get_new_matches_since_last_notification()
-            
-            if new_matches.exists():
-                count = new_matches.count()
+        workers_started = False
+        while True:
+            batch = list(active_searches.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return total_notifications
+
+            keys = {search.id: (search.criteria_key(), search.last_notified) for search in batch}
+            since = {}
+            for criteria, last_notified in keys.values():
+                since.setdefault(criteria, set()).add(last_notified)
+            groups = [(criteria, tuple(times)) for criteria, times in since.items()]
+            if executor is not None:
+                if not workers_started:
+                    # The pool forks its workers on the first map; close the
+                    # connection just opened so they don't inherit it, and
+                    # each opens its own
+                    connections.close_all()
+                    workers_started = True
+                results = executor.map(count_new_matches, groups)
+            else:
+                results = map(count_new_matches, groups)
+            counts = {}
+            for result in results:
+                counts.update(result)
+
+            notified = []
+            for search in batch:
+                count = counts[keys[search.id]]
+                if not count:
+                    continue
                 total_notifications += count
-                
+
                 if dry_run:
                     self.stdout.write(
                         f"Would notify {search.recruiter.username} about {count} new matches for search '{search.name}'"
                     )
-                else:
-                    search.last_notified = timezone.now()
-                    search.save()
-                    
-                    logger.info(
+                    continue
+
+                # bulk_update() skips auto_now, so set updated_at as save() would
+                search.last_notified = search.updated_at = now
+                notified.append(search)
+
+                logger.info(
+                    f"Notified {search.recruiter.username} about {count} new matches for search '{search.name}'"
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
                         f"Notified {search.recruiter.username} about {count} new matches for search '{search.name}'"
                     )
-                    
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"Notified {search.recruiter.username} about {count} new matches for search '{search.name}'"
-                        )
-                    )
-        
+                )
+
+            last_id = batch[-1].id
+            if not dry_run:
+                with transaction.atomic():
+                    SavedSearch.objects.bulk_update(notified, ['last_notified', 'updated_at'])
+                self.write_checkpoint(checkpoint, last_id)
+
+    def read_checkpoint(self, path):
+        try:
+            with open(path) as f:
+                return int(json.load(f)['last_id'])
+        except FileNotFoundError:
+            return 0
+        except (KeyError, TypeError, ValueError):
+            raise CommandError(f"Unreadable checkpoint file {path}; remove it or pass --restart.")
+
+    def write_checkpoint(self, path, last_id):
+        # Write then rename, so an interruption never leaves half a file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_id': last_id, 'updated_at': timezone.now().isoformat()}, f)
+        os.replace(tmp_path, path)
+
+    def notify_pending(self, dry_run):
+        """Drain the pending-matches table, one notification per search."""
+        pending = (
+            SavedSearchMatch.objects.filter(search__is_active=True)
+            .values('search_id')
+            .annotate(count=Count('id'), last_id=Max('id'))
+        )
+        pending = {row['search_id']: row for row in pending}
+        searches = SavedSearch.objects.filter(id__in=pending).select_related('recruiter')
+
+        total_notifications = 0
+        for search in searches:
+            row = pending[search.id]
+            count = row['count']
+            total_notifications += count
+
+            if dry_run:
+                self.stdout.write(
+                    f"Would notify {search.recruiter.username} about {count} new matches for search '{search.name}'"
+                )
+                continue
+
+            # Both or neither, so a crash can't notify about these matches twice
+            with transaction.atomic():
+                search.last_notified = timezone.now()
+                search.save(update_fields=['last_notified', 'updated_at'])
+                # Matches recorded while this ran stay pending for the next run
+                SavedSearchMatch.objects.filter(search=search, id__lte=row['last_id']).delete()
+
+            logger.info(
+                f"Notified {search.recruiter.username} about {count} new matches for search '{search.name}'"
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Notified {search.recruiter.username} about {count} new matches for search '{search.name}'"
+                )
+            )
+        return total_notifications
+
+    def report_total(self, total_notifications, dry_run):
         if dry_run:
             self.stdout.write(
                 self.style.WARNING(f"DRY RUN: Would send {total_notifications} notifications total")
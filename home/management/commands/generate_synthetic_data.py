@@ -0,0 +1,78 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from home import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a deterministic synthetic dataset for load tests and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Users to create; one in twenty is a recruiter, the rest are job seekers',
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            help='Jobs to post (default: one per ten users)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed and --until give the same data',
+        )
+        parser.add_argument(
+            '--until',
+            type=datetime.date.fromisoformat,
+            help='Date (YYYY-MM-DD) of the newest rows (default: today)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Job seekers created per transaction, and rows per INSERT',
+        )
+        parser.add_argument(
+            '--password',
+            default='password',
+            help='Password of every generated user',
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to fill',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--users and --batch-size must be positive.")
+        database = options['database']
+        # Generated usernames end in ".<seed>.<number>"
+        pattern = rf"\.{options['seed']}\.[0-9]+$"
+        if User.objects.using(database).filter(username__regex=pattern).exists():
+            raise CommandError(
+                f"Data for seed {options['seed']} already exists on '{database}'; use another --seed."
+            )
+
+        until = options['until'] or timezone.localdate()
+        counts, seconds = synthetic.generate(
+            users=options['users'],
+            jobs=options['jobs'],
+            seed=options['seed'],
+            until=timezone.make_aware(datetime.datetime.combine(until, datetime.time())),
+            batch_size=options['batch_size'],
+            password=options['password'],
+            using=database,
+            log=self.stdout.write,
+        )
+        for model, count in counts.items():
+            self.stdout.write(f"{model}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Created {sum(counts.values())} rows in {seconds:.1f}s"))
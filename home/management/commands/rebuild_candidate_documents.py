@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from home import candidates
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the flattened candidate search documents from the job seeker profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild the documents on',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of profiles to rebuild per batch',
+        )
+
+    def handle(self, *args, **options):
+        total = candidates.rebuild_documents(using=options['database'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Candidate search: indexed {total} job seekers"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from home import funnel
+from home.models import ApplicationEvent
+
+
+class Command(BaseCommand):
+    help = 'Recompute the hiring-funnel rollups from the application event log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild the rollups on',
+        )
+
+    def handle(self, *args, **options):
+        database = options['database']
+        funnel.rebuild_rollups(using=database)
+        total = ApplicationEvent.objects.using(database).count()
+        self.stdout.write(self.style.SUCCESS(f"Hiring-funnel rollups rebuilt from {total} events"))
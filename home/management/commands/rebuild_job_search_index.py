@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from home import recommendations, search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text job search index and the skill term index from the jobs table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild the index on',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of jobs to index per batch',
+        )
+
+    def handle(self, *args, **options):
+        database = options['database']
+
+        batch_size = options['batch_size']
+
+        if search.fts_enabled(database):
+            total = search.rebuild_index(using=database, batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Full-text index: indexed {total} jobs"))
+        else:
+            self.stdout.write(
+                self.style.WARNING("Full-text index is only available on SQLite; skipped.")
+            )
+
+        total = recommendations.rebuild_job_terms(using=database, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Skill term index: indexed {total} active jobs"))
@@ -0,0 +1,63 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database onto its read replicas with the SQLite backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'replicas',
+            nargs='*',
+            help='Replica aliases to refresh (default: all of DATABASE_REPLICAS)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Keep refreshing every this many seconds instead of once',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=-1,
+            help='Pages copied per step (default: all in one step). Writers to the primary can '
+                 'proceed between steps, but each write restarts the copy, so under steady writes '
+                 'a stepped copy may never finish',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['replicas'] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError("No replicas configured; set LOCKEDIN_DB_REPLICAS.")
+        for alias in [DEFAULT_DB_ALIAS, *aliases]:
+            if alias not in settings.DATABASES:
+                raise CommandError(f"Unknown database alias '{alias}'.")
+            if settings.DATABASES[alias]['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError(f"'{alias}' is not a SQLite database.")
+
+        while True:
+            for alias in aliases:
+                started = time.monotonic()
+                self.copy(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'], settings.DATABASES[alias]['NAME'],
+                          options['pages'])
+                self.stdout.write(
+                    self.style.SUCCESS(f"Refreshed {alias} in {time.monotonic() - started:.2f}s")
+                )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, source_path, target_path, pages):
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            # Readers of the replica see either the old copy or the new one
+            source.backup(target, pages=pages)
+        finally:
+            target.close()
+            source.close()
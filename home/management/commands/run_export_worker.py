@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from home import exports
+
+
+class Command(BaseCommand):
+    help = 'Process queued data exports from the admin export page'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the jobs that are queued now, then exit',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between checks of an empty queue',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            purged = exports.purge_expired_exports()
+            if purged:
+                self.stdout.write(f"Removed {purged} expired exports")
+            stalled = exports.fail_stalled_jobs()
+            if stalled:
+                self.stdout.write(self.style.WARNING(f"Marked {stalled} stalled exports as failed"))
+
+            job = exports.claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Exporting {job.model_key} as {job.export_format} (job #{job.pk})")
+            try:
+                exports.run_export_job(job)
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f"Export #{job.pk} failed: {exc}"))
+                continue
+            job.refresh_from_db()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Export #{job.pk} done: {job.rows_written} rows, {job.rows_per_second or 0} rows/sec"
+                )
+            )
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:55
+
+import django.db.models.deletion
+import home.models
+from django.db import migrations, models
+
+# The index as home.search first defined it
+FTS_TABLE = "home_job_fts"
+RANK_FUNCTION = "bm25(10.0, 5.0, 1.0, 1.0)"
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, company_name, description, requirements, "
+            "tokenize = 'porter unicode61')"
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', %s)", [RANK_FUNCTION])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, company_name, description, requirements) "
+            "SELECT home_job.id, home_job.title, home_company.name, home_job.description, home_job.requirements "
+            "FROM home_job INNER JOIN home_company ON home_company.id = home_job.company_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0007_remove_savedsearch_experience_level_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchDocument',
+            fields=[
+                ('job', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='home.job')),
+                ('title', models.TextField()),
+                ('company_name', models.TextField()),
+                ('description', models.TextField()),
+                ('requirements', models.TextField()),
+                ('document', home.models.FullTextField(db_column='home_job_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'home_job_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0008_job_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['latitude', 'longitude'], name='job_lat_lon_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:00
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copies of home.terms as they stood when the index was introduced
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+MAX_TERM_LENGTH = 100
+
+STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being both but by
+    can could did do does doing for from had has have having he her here his how
+    i if in into is it its just me more most my no nor not of off on once only or
+    other our out over own same she should so some such than that the their them
+    then there these they this those through to too under until up very was we
+    were what when where which while who whom why will with would you your
+""".split())
+
+
+def text_terms(text):
+    tokens = TOKEN_RE.findall(text.lower())
+    terms = set()
+    for i, token in enumerate(tokens):
+        if token in STOPWORDS:
+            continue
+        terms.add(token)
+        if i + 1 < len(tokens) and tokens[i + 1] not in STOPWORDS:
+            terms.add(f"{token} {tokens[i + 1]}")
+    return {term for term in terms if len(term) <= MAX_TERM_LENGTH}
+
+
+def index_active_jobs(apps, schema_editor):
+    Job = apps.get_model("home", "Job")
+    JobTerm = apps.get_model("home", "JobTerm")
+    db = schema_editor.connection.alias
+    rows = []
+    jobs = Job.objects.using(db).filter(is_active=True).values_list("id", "title", "description", "requirements")
+    for job_id, title, description, requirements in jobs.iterator():
+        text = " ".join([title, description, requirements])
+        rows.extend(JobTerm(term=term, job_id=job_id) for term in text_terms(text))
+    JobTerm.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0009_job_lat_lon_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='home.job')),
+            ],
+            options={
+                'unique_together': {('term', 'job')},
+            },
+        ),
+        migrations.RunPython(index_active_jobs, migrations.RunPython.noop),
+    ]
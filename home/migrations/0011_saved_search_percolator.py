@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:04
+
+import re
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# Copies of home.terms and home.percolator's index terms as they stood when
+# the percolator was introduced, anchoring on whole words
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+MAX_TERM_LENGTH = 100
+
+STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being both but by
+    can could did do does doing for from had has have having he her here his how
+    i if in into is it its just me more most my no nor not of off on once only or
+    other our out over own same she should so some such than that the their them
+    then there these they this those through to too under until up very was we
+    were what when where which while who whom why will with would you your
+""".split())
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def skill_terms(name):
+    tokens = [token for token in tokenize(name) if token not in STOPWORDS]
+    if len(tokens) <= 2:
+        terms = {" ".join(tokens)} if tokens else set()
+    else:
+        terms = {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+    return {term for term in terms if len(term) <= MAX_TERM_LENGTH}
+
+
+ANY_TERM = "*"
+
+
+def _anchor(prefix, text):
+    words = {token for token in tokenize(text) if token not in STOPWORDS}
+    if not words:
+        return None
+    return f"{prefix}:{max(words, key=lambda word: (len(word), word))}"
+
+
+def search_terms(search):
+    skills = set()
+    for name in search.skills_query.split(","):
+        skills |= skill_terms(name)
+    if skills:
+        return {f"skill:{term}" for term in skills}
+    for prefix, text in (
+        ("degree", search.education_level),
+        ("company", search.current_company),
+        ("location", search.location),
+    ):
+        anchor = _anchor(prefix, text)
+        if anchor:
+            return {anchor}
+    return {ANY_TERM}
+
+
+def index_saved_searches(apps, schema_editor):
+    SavedSearch = apps.get_model("home", "SavedSearch")
+    SavedSearchTerm = apps.get_model("home", "SavedSearchTerm")
+    db = schema_editor.connection.alias
+    rows = []
+    for search in SavedSearch.objects.using(db).iterator():
+        rows.extend(SavedSearchTerm(term=term, search_id=search.id) for term in search_terms(search))
+    SavedSearchTerm.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_skill_term_index'),
+        ('home', '0010_job_term_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearchMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_search_matches', to='accounts.profile')),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_matches', to='home.savedsearch')),
+            ],
+            options={
+                'unique_together': {('search', 'profile')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=120)),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='index_terms', to='home.savedsearch')),
+            ],
+            options={
+                'unique_together': {('term', 'search')},
+            },
+        ),
+        migrations.RunPython(index_saved_searches, migrations.RunPython.noop),
+    ]
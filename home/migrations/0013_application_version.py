@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0012_export_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,188 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from collections import Counter
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# home.funnel's rollup definition as it stood when the rollups were added
+
+# Upper bounds of the time-in-stage histogram buckets; the last is open
+DURATION_BOUNDS = [
+    datetime.timedelta(hours=1),
+    datetime.timedelta(days=1),
+    datetime.timedelta(days=3),
+    datetime.timedelta(days=7),
+    datetime.timedelta(days=14),
+    datetime.timedelta(days=30),
+    datetime.timedelta(days=90),
+]
+
+
+def duration_bucket(duration):
+    for index, upper in enumerate(DURATION_BOUNDS):
+        if duration < upper:
+            return index
+    return len(DURATION_BOUNDS)
+
+
+def event_day(changed_at):
+    return timezone.localdate(changed_at) if timezone.is_aware(changed_at) else changed_at.date()
+
+
+def tally(events):
+    current, reached, daily, durations = Counter(), Counter(), Counter(), Counter()
+    seen = set()
+    for application_id, job_id, from_status, to_status, changed_at, time_in_stage in events:
+        if from_status:
+            current[job_id, from_status] -= 1
+            if time_in_stage is not None:
+                durations[job_id, from_status, duration_bucket(time_in_stage)] += 1
+        current[job_id, to_status] += 1
+        if (application_id, to_status) not in seen:
+            seen.add((application_id, to_status))
+            reached[job_id, to_status] += 1
+        daily[job_id, event_day(changed_at), to_status] += 1
+    return current, reached, daily, durations
+
+
+def backfill_events(apps, schema_editor):
+    """
+    Applications only record their current status, so each gets a creation
+    event and, if it has moved on, one event into its current status.
+    """
+    JobApplication = apps.get_model("home", "JobApplication")
+    ApplicationEvent = apps.get_model("home", "ApplicationEvent")
+    JobStageStats = apps.get_model("home", "JobStageStats")
+    JobDailyStageStats = apps.get_model("home", "JobDailyStageStats")
+    JobStageDuration = apps.get_model("home", "JobStageDuration")
+    db = schema_editor.connection.alias
+
+    events = []
+    applications = []
+    for application in JobApplication.objects.using(db).order_by("applied_at", "id").iterator():
+        events.append((application.id, application.job_id, "", "NEW", application.applied_at, None))
+        application.status_changed_at = application.applied_at
+        if application.status != "NEW":
+            application.status_changed_at = max(application.updated_at, application.applied_at)
+            events.append((
+                application.id,
+                application.job_id,
+                "NEW",
+                application.status,
+                application.status_changed_at,
+                application.status_changed_at - application.applied_at,
+            ))
+        applications.append(application)
+    JobApplication.objects.using(db).bulk_update(applications, ["status_changed_at"], batch_size=500)
+    ApplicationEvent.objects.using(db).bulk_create(
+        [
+            ApplicationEvent(
+                application_id=application_id, job_id=job_id, from_status=from_status,
+                to_status=to_status, changed_at=changed_at, time_in_stage=time_in_stage,
+            )
+            for application_id, job_id, from_status, to_status, changed_at, time_in_stage in events
+        ],
+        batch_size=500,
+    )
+
+    current, reached, daily, durations = tally(events)
+    JobStageStats.objects.using(db).bulk_create(
+        [
+            JobStageStats(job_id=job_id, status=status, current=current[job_id, status],
+                          reached=reached[job_id, status])
+            for job_id, status in set(current) | set(reached)
+        ],
+        batch_size=500,
+    )
+    JobDailyStageStats.objects.using(db).bulk_create(
+        [
+            JobDailyStageStats(job_id=job_id, day=day, status=status, entered=count)
+            for (job_id, day, status), count in daily.items()
+        ],
+        batch_size=500,
+    )
+    JobStageDuration.objects.using(db).bulk_create(
+        [
+            JobStageDuration(job_id=job_id, status=status, bucket=bucket, count=count)
+            for (job_id, status, bucket), count in durations.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0013_application_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='status_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='ApplicationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(max_length=20)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('time_in_stage', models.DurationField(blank=True, null=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='home.jobapplication')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='application_events', to='home.job')),
+            ],
+            options={
+                'ordering': ['changed_at', 'id'],
+                'indexes': [models.Index(fields=['application', 'to_status'], name='appevent_reached_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobDailyStageStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('entered', models.IntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stage_stats', to='home.job')),
+            ],
+            options={
+                'unique_together': {('job', 'day', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='JobStageDuration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stage_durations', to='home.job')),
+            ],
+            options={
+                'unique_together': {('job', 'status', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='JobStageStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('current', models.IntegerField(default=0)),
+                ('reached', models.IntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stage_stats', to='home.job')),
+            ],
+            options={
+                'unique_together': {('job', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_events, migrations.RunPython.noop),
+    ]
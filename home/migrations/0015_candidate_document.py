@@ -0,0 +1,125 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import datetime
+import re
+
+from django.utils import timezone
+
+# Copies of home.terms and home.candidates as they stood when the documents
+# were introduced; later changes to those modules don't apply to this step
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+MAX_TERM_LENGTH = 100
+
+STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being both but by
+    can could did do does doing for from had has have having he her here his how
+    i if in into is it its just me more most my no nor not of off on once only or
+    other our out over own same she should so some such than that the their them
+    then there these they this those through to too under until up very was we
+    were what when where which while who whom why will with would you your
+""".split())
+
+
+def skill_terms(name):
+    tokens = [token for token in TOKEN_RE.findall(name.lower()) if token not in STOPWORDS]
+    if len(tokens) <= 2:
+        terms = {" ".join(tokens)} if tokens else set()
+    else:
+        terms = {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+    return {term for term in terms if len(term) <= MAX_TERM_LENGTH}
+
+
+def years_of_experience(experiences, today):
+    periods = []
+    for experience in experiences:
+        end = today if experience.is_current else experience.end_year
+        if experience.start_year and end and end > experience.start_year:
+            periods.append((experience.start_year, min(end, today)))
+    days = 0
+    covered_until = None
+    for start, end in sorted(periods):
+        if covered_until is not None:
+            start = max(start, covered_until)
+        if end > start:
+            days += (end - start).days
+            covered_until = end
+    return round(days / 365.25, 1)
+
+
+def document_fields(profile, skills, educations, experiences, today):
+    terms = set()
+    names = []
+    for skill in skills:
+        if skill.name.strip():
+            names.append(skill.name.strip())
+            terms |= skill_terms(skill.name)
+    companies = [experience.company for experience in experiences]
+    return {
+        "date_joined": profile.user.date_joined,
+        "skills": "|" + "|".join(sorted(terms)) + "|" if terms else "",
+        "skill_names": "\n".join(names),
+        "degrees": "\n".join(education.degree.lower() for education in educations if education.degree),
+        "current_companies": "\n".join(
+            experience.company.lower() for experience in experiences if experience.is_current
+        ),
+        "location_text": "\n".join(
+            text.lower() for text in [profile.location, profile.bio] + companies if text
+        ),
+        "has_experience": bool(experiences),
+        "years_experience": years_of_experience(experiences, today),
+    }
+
+
+def build_documents(apps, schema_editor):
+    Profile = apps.get_model("accounts", "Profile")
+    CandidateDocument = apps.get_model("home", "CandidateDocument")
+    db = schema_editor.connection.alias
+    profiles = (
+        Profile.objects.using(db)
+        .filter(role="JOB_SEEKER")
+        .select_related("user")
+        .prefetch_related("skills", "educations", "experiences")
+    )
+    today = timezone.localdate()
+    documents = []
+    for profile in profiles.iterator(chunk_size=500):
+        fields = document_fields(
+            profile, profile.skills.all(), profile.educations.all(), list(profile.experiences.all()), today
+        )
+        documents.append(CandidateDocument(profile_id=profile.id, **fields))
+    CandidateDocument.objects.using(db).bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_skill_term_index'),
+        ('home', '0014_hiring_funnel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateDocument',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='accounts.profile')),
+                ('date_joined', models.DateTimeField()),
+                ('skills', models.TextField(blank=True)),
+                ('skill_names', models.TextField(blank=True)),
+                ('degrees', models.TextField(blank=True)),
+                ('current_companies', models.TextField(blank=True)),
+                ('location_text', models.TextField(blank=True)),
+                ('has_experience', models.BooleanField(default=False)),
+                ('years_experience', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-date_joined', '-profile'], name='candidatedoc_joined_idx')],
+            },
+        ),
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0015_candidate_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='job_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['posted_by', '-created_at'], name='job_poster_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['job', 'status', '-applied_at', '-id'], name='jobapp_stage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedsearch',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['id'], name='savedsearch_active_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:55
+
+from django.db import migrations, models
+
+import datetime
+
+from django.utils import timezone
+
+
+# home.candidates.experience_summary when the column was added
+def experience_summary(experiences, today):
+    periods = []
+    for experience in experiences:
+        if not experience.start_year:
+            continue
+        if experience.is_current:
+            periods.append((experience.start_year, None))
+        elif experience.end_year and experience.end_year > experience.start_year:
+            periods.append((experience.start_year, experience.end_year))
+    days = 0
+    covered_until = None
+    for start, end in sorted(periods, key=lambda period: period[0]):
+        if covered_until is not None:
+            start = max(start, covered_until)
+        if end is None:
+            start = start - datetime.timedelta(days=days)
+            return round(max(days, (today - start).days) / 365.25, 1), start
+        end = min(end, today)
+        if end > start:
+            days += (end - start).days
+            covered_until = end
+    return round(days / 365.25, 1), None
+
+
+def fill_experience_start(apps, schema_editor):
+    CandidateDocument = apps.get_model("home", "CandidateDocument")
+    db = schema_editor.connection.alias
+    documents = (
+        CandidateDocument.objects.using(db)
+        .filter(profile__experiences__is_current=True)
+        .distinct()
+        .prefetch_related("profile__experiences")
+    )
+    today = timezone.localdate()
+    updated = []
+    for document in documents.iterator(chunk_size=500):
+        document.years_experience, document.experience_start = experience_summary(
+            list(document.profile.experiences.all()), today
+        )
+        updated.append(document)
+    CandidateDocument.objects.using(db).bulk_update(
+        updated, ["years_experience", "experience_start"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0016_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidatedocument',
+            name='experience_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_experience_start, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+import re
+
+from django.db import migrations
+
+# The percolator's index terms with substring criteria anchored on
+# three-character slices, as of this migration
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+MAX_TERM_LENGTH = 100
+
+STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being both but by
+    can could did do does doing for from had has have having he her here his how
+    i if in into is it its just me more most my no nor not of off on once only or
+    other our out over own same she should so some such than that the their them
+    then there these they this those through to too under until up very was we
+    were what when where which while who whom why will with would you your
+""".split())
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def skill_terms(name):
+    tokens = [token for token in tokenize(name) if token not in STOPWORDS]
+    if len(tokens) <= 2:
+        terms = {" ".join(tokens)} if tokens else set()
+    else:
+        terms = {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+    return {term for term in terms if len(term) <= MAX_TERM_LENGTH}
+
+
+ANY_TERM = "*"
+
+
+def _anchor(prefix, text):
+    text = text.lower()
+    slices = {text[i:i + 3] for i in range(len(text) - 2)}
+    if not slices:
+        return None
+    return f"{prefix}:{max(slices, key=lambda piece: (piece.isalnum(), piece))}"
+
+
+def search_terms(search):
+    skills = set()
+    for name in search.skills_query.split(","):
+        skills |= skill_terms(name)
+    if skills:
+        return {f"skill:{term}" for term in skills}
+    for prefix, text in (
+        ("degree", search.education_level),
+        ("company", search.current_company),
+        ("location", search.location),
+    ):
+        anchor = _anchor(prefix, text)
+        if anchor:
+            return {anchor}
+    return {ANY_TERM}
+
+
+def reindex_saved_searches(apps, schema_editor):
+    SavedSearch = apps.get_model("home", "SavedSearch")
+    SavedSearchTerm = apps.get_model("home", "SavedSearchTerm")
+    db = schema_editor.connection.alias
+    SavedSearchTerm.objects.using(db).all().delete()
+    rows = []
+    for search in SavedSearch.objects.using(db).iterator():
+        rows.extend(SavedSearchTerm(term=term, search_id=search.id) for term in search_terms(search))
+    SavedSearchTerm.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0017_candidate_experience_start'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_saved_searches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0018_reindex_saved_search_terms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
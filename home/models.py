@@ -4,6 +4,7 @@ from django.conf import settings
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Q
+from django.db.models import Lookup
 import json
 
 
@@ -30,7 +31,39 @@ class Company(models.Model):
         return self.name
 
 
-class Job(models.Model):
+class TracksChanges:
+    """
+    Model mixin remembering the values loaded or last saved, so post_save
+    handlers can tell which fields a save changed.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so saves can tell which fields changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save handlers have run; later saves compare against this state
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+    def has_changed(self, *field_names):
+        """Whether any of the fields differ from what was loaded; True if nothing was."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return True
+        return any(
+            name not in loaded or loaded[name] != getattr(self, name)
+            for name in field_names
+        )
+
+
+class Job(TracksChanges, models.Model):
     JOB_TYPES = [
         ('full-time', 'Full-time'),
         ('part-time', 'Part-time'),
@@ -64,10 +97,30 @@ class Job(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Bounding-box prefilter for the job map's distance search
+            models.Index(fields=['latitude', 'longitude'], name='job_lat_lon_idx'),
+            # Job list and home page: active jobs, newest first
+            models.Index(
+                fields=['-created_at', '-id'], condition=Q(is_active=True), name='job_active_recent_idx'
+            ),
+            # A recruiter's own postings, newest first
+            models.Index(fields=['posted_by', '-created_at'], name='job_poster_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} at {self.company.name}"
 
+    # Fields shown on the job map; see home.signals
+    MAP_FIELDS = ('is_active', 'latitude', 'longitude', 'title', 'company_id')
+    # Fields the skill term index is built from
+    TERM_FIELDS = ('is_active', 'title', 'description', 'requirements')
+    # Fields shown on the home page's job cards, or deciding which jobs are featured
+    CARD_FIELDS = (
+        'is_active', 'title', 'company_id', 'location', 'job_type',
+        'salary_min', 'salary_max', 'created_at',
+    )
+
     @property
     def salary_range(self):
         if self.salary_min and self.salary_max:
@@ -77,6 +130,64 @@ class Job(models.Model):
         return "Salary not specified"
 
 
+class FullTextField(models.TextField):
+    """
+    The hidden column an SQLite FTS5 table shares its name with.
+    Filtering on it with ``__match`` runs a full-text query against the table.
+    """
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+class JobSearchDocument(models.Model):
+    """
+    Read-only view of the ``home_job_fts`` FTS5 table (SQLite only).
+    The rowid is the job id; rows are written by ``home.search``.
+    """
+    job = models.OneToOneField(
+        Job,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_document",
+    )
+    title = models.TextField()
+    company_name = models.TextField()
+    description = models.TextField()
+    requirements = models.TextField()
+    document = FullTextField(db_column="home_job_fts")
+    # bm25() score, lower is more relevant
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "home_job_fts"
+
+
+class JobTerm(models.Model):
+    """
+    Inverted index from normalized skill terms to the active jobs whose text
+    mentions them. Maintained by ``home.recommendations``.
+    """
+    term = models.CharField(max_length=100)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='terms')
+
+    class Meta:
+        unique_together = ['term', 'job']
+
+    def __str__(self):
+        return f"{self.term} -> {self.job_id}"
+
+
 class JobApplication(models.Model):
     class ApplicationStatus(models.TextChoices):
         NEW = 'NEW', _('New')
@@ -97,16 +208,88 @@ class JobApplication(models.Model):
     status = models.CharField(max_length=20, choices=ApplicationStatus.choices, default=ApplicationStatus.NEW)
     applied_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped on every status change, so concurrent edits of the pipeline can
+    # detect each other; see home.pipeline.move_applications
+    version = models.PositiveIntegerField(default=0)
+    # When the application entered its current status
+    status_changed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ['job', 'applicant']
         ordering = ['-applied_at']
+        indexes = [
+            # Pipeline columns (newest cards first) and their counts
+            models.Index(fields=['job', 'status', '-applied_at', '-id'], name='jobapp_stage_idx'),
+        ]
 
     def __str__(self):
         return f"{self.applicant.username} - {self.job.title}"
 
 
-class SavedSearch(models.Model):
+class ApplicationEvent(models.Model):
+    """
+    One status change of a job application, including its creation (blank
+    ``from_status``). Rows are only ever added; the hiring-funnel rollups
+    below are totals over this log, see home.funnel.
+    """
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='events')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='application_events')
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20)
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    changed_at = models.DateTimeField(default=timezone.now)
+    # How long the application had been in from_status
+    time_in_stage = models.DurationField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['changed_at', 'id']
+        indexes = [
+            models.Index(fields=['application', 'to_status'], name='appevent_reached_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.application_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+class JobStageStats(models.Model):
+    """Applications currently in, and ever having reached, a stage of a job."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='stage_stats')
+    status = models.CharField(max_length=20)
+    current = models.IntegerField(default=0)
+    reached = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['job', 'status']
+
+
+class JobDailyStageStats(models.Model):
+    """Applications entering a stage of a job, per day."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_stage_stats')
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    entered = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['job', 'day', 'status']
+
+
+class JobStageDuration(models.Model):
+    """
+    Histogram of how long applications stayed in a stage of a job before
+    moving on; ``bucket`` indexes home.funnel.DURATION_BUCKETS.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='stage_durations')
+    status = models.CharField(max_length=20)
+    bucket = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['job', 'status', 'bucket']
+
+
+class SavedSearch(TracksChanges, models.Model):
     """
     Model to store saved search criteria for recruiters to find job seekers.
     Allows recruiters to save their search parameters and get notified of new matches.
@@ -137,9 +320,16 @@ class SavedSearch(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['name', 'recruiter']  # Prevent duplicate names per recruiter
+        indexes = [
+            # check_saved_searches walks the active searches in id order
+            models.Index(fields=['id'], condition=Q(is_active=True), name='savedsearch_active_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.recruiter.username}"
+
+    # Fields deciding which candidates match; see home.percolator
+    CRITERIA_FIELDS = ('skills_query', 'location', 'experience_years', 'education_level', 'current_company')
     
     def get_search_criteria(self):
         """Return search criteria as a dictionary"""
@@ -150,59 +340,206 @@ class SavedSearch(models.Model):
             'education_level': self.education_level,
             'current_company': self.current_company,
         }
-    
+
+    def min_experience_years(self):
+        """The experience criterion as a number of years, or None when unset."""
+        try:
+            return max(int(self.experience_years), 0)
+        except ValueError:
+            return None
+
+    def criteria_key(self):
+        """
+        Normalized criteria: two searches with the same key match the same
+        candidates (case, skill order and duplicates don't matter).
+        """
+        skills = sorted({skill.strip().lower() for skill in self.skills_query.split(',') if skill.strip()})
+        return (
+            tuple(skills),
+            self.location.lower(),
+            self.min_experience_years(),
+            self.education_level.lower(),
+            self.current_company.lower(),
+        )
+
     def get_matching_candidates(self):
-        """Get job seekers that match this saved search criteria"""
-        from accounts.models import Profile
-        
-        # Start with all job seeker profiles
-        candidates = Profile.objects.filter(role=Profile.Role.JOB_SEEKER)
-        
-        # Filter by skills
-        if self.skills_query:
-            skills_list = [skill.strip().lower() for skill in self.skills_query.split(',') if skill.strip()]
-            if skills_list:
-                skill_query = Q()
-                for skill in skills_list:
-                    skill_query |= Q(skills__name__icontains=skill)
-                candidates = candidates.filter(skill_query).distinct()
-        
-        # Filter by location (in bio or experience)
-        if self.location:
-            candidates = candidates.filter(
-                Q(bio__icontains=self.location) |
-                Q(experiences__company__icontains=self.location)
-            ).distinct()
-        
-        # Filter by experience years (rough calculation based on experience entries)
-        if self.experience_years:
-            try:
-                years = int(self.experience_years)
-                # This is a simplified filter - in a real app you'd calculate actual years
-                candidates = candidates.filter(experiences__isnull=False).distinct()
-            except ValueError:
-                pass
-        
-        # Filter by education level
-        if self.education_level:
-            candidates = candidates.filter(
-                educations__degree__icontains=self.education_level
-            ).distinct()
-        
-        # Filter by current company
-        if self.current_company:
-            candidates = candidates.filter(
-                experiences__company__icontains=self.current_company,
-                experiences__is_current=True
-            ).distinct()
-        
-        return candidates.order_by('-user__date_joined')
-    
+        """Search documents of the job seekers matching this search, newest members first"""
+        from .candidates import search_candidates
+
+        return search_candidates(
+            skills_query=self.skills_query,
+            location=self.location,
+            experience_years=self.experience_years,
+            education_level=self.education_level,
+            current_company=self.current_company,
+        )
+
+    def new_matches_filter(self):
+        """Condition on ``CandidateDocument`` for the job seekers matching since the last notification"""
+        from .candidates import candidate_filter
+
+        condition = candidate_filter(
+            skills_query=self.skills_query,
+            location=self.location,
+            experience_years=self.experience_years,
+            education_level=self.education_level,
+            current_company=self.current_company,
+        )
+        if self.last_notified:
+            condition &= Q(date_joined__gt=self.last_notified)
+        return condition
+
     def get_new_matches_since_last_notification(self):
         """Get new job seekers that match this search since last notification"""
         matching_candidates = self.get_matching_candidates()
-        
+
         if self.last_notified:
-            matching_candidates = matching_candidates.filter(user__date_joined__gt=self.last_notified)
-        
+            matching_candidates = matching_candidates.filter(date_joined__gt=self.last_notified)
+
         return matching_candidates
+
+
+class CandidateDocument(models.Model):
+    """
+    One row per job-seeker profile with everything candidate search filters
+    on, flattened out of the skill, education and experience tables.
+    Text columns are lowercased; ``skills`` holds the normalized skill terms
+    as ``|term|term|``. Built by ``home.candidates``.
+    """
+    profile = models.OneToOneField(
+        'accounts.Profile', on_delete=models.CASCADE, primary_key=True, related_name='search_document'
+    )
+    date_joined = models.DateTimeField()
+    skills = models.TextField(blank=True)
+    # Skill names as entered, one per line, for display
+    skill_names = models.TextField(blank=True)
+    degrees = models.TextField(blank=True)
+    current_companies = models.TextField(blank=True)
+    # Profile location, bio and every employer
+    location_text = models.TextField(blank=True)
+    has_experience = models.BooleanField(default=False)
+    # Years of experience when the document was built
+    years_experience = models.FloatField(default=0)
+    # For people in a current job, the day their experience runs from; their
+    # years keep growing after the document is built
+    experience_start = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date_joined', '-profile'], name='candidatedoc_joined_idx'),
+        ]
+
+    def __str__(self):
+        return f"Search document for {self.profile_id}"
+
+    @property
+    def skill_list(self):
+        return self.skill_names.split("\n") if self.skill_names else []
+
+    def years_of_experience(self, today=None):
+        """Years of experience as of ``today``, not just when the document was built."""
+        if self.experience_start is None:
+            return self.years_experience
+        today = today or timezone.localdate()
+        return max(self.years_experience, (today - self.experience_start).days / 365.25)
+
+    @property
+    def skill_terms(self):
+        return set(self.skills.strip("|").split("|")) - {""}
+
+
+class SavedSearchTerm(models.Model):
+    """
+    Index from saved-search criteria to searches, used to find the searches a
+    changed profile might match without running every search. Terms are
+    prefixed with the criterion they come from (``skill:python``,
+    ``degree:lor``); see ``home.percolator``.
+    """
+    term = models.CharField(max_length=120)
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='index_terms')
+
+    class Meta:
+        unique_together = ['term', 'search']
+
+    def __str__(self):
+        return f"{self.term} -> {self.search_id}"
+
+
+class SavedSearchMatch(models.Model):
+    """
+    A job seeker whose profile matched a saved search since the recruiter was
+    last notified. Filled by ``home.percolator`` and drained by
+    ``check_saved_searches --pending``.
+    """
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='pending_matches')
+    profile = models.ForeignKey('accounts.Profile', on_delete=models.CASCADE, related_name='saved_search_matches')
+    matched_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ['search', 'profile']
+
+    def __str__(self):
+        return f"{self.profile_id} matched {self.search_id}"
+
+
+class ExportJob(models.Model):
+    """
+    A data export queued from the admin export page and written to a gzip
+    file under ``MEDIA_ROOT/exports`` by the ``run_export_worker`` command.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'QUEUED', _('Queued')
+        RUNNING = 'RUNNING', _('Running')
+        DONE = 'DONE', _('Done')
+        FAILED = 'FAILED', _('Failed')
+
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='export_jobs')
+    model_key = models.CharField(max_length=50)
+    export_format = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    total_rows = models.PositiveBigIntegerField(null=True, blank=True)
+    rows_written = models.PositiveBigIntegerField(default=0)
+    file = models.FileField(upload_to='exports/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Last sign of life from the worker running the export
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='exportjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_key} ({self.export_format}) - {self.get_status_display()}"
+
+    @property
+    def progress(self):
+        """Percentage of rows written, or None before the row count is known."""
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.total_rows:
+            return None
+        return min(100, int(self.rows_written * 100 / self.total_rows))
+
+    @property
+    def rows_per_second(self):
+        if not self.started_at:
+            return None
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        if elapsed <= 0:
+            return None
+        return int(self.rows_written / elapsed)
+
+    @property
+    def is_downloadable(self):
+        return (
+            self.status == self.Status.DONE
+            and bool(self.file)
+            and (self.expires_at is None or self.expires_at > timezone.now())
+        )
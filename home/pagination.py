@@ -0,0 +1,214 @@
+"""
+Keyset (cursor) pagination.
+
+Unlike ``django.core.paginator.Paginator`` this never runs COUNT(*) over the
+whole result set or an OFFSET scan: each page is fetched with a WHERE clause on
+the ordering columns of the last row seen, so page 500 costs the same as page 1.
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+from django.core import signing
+from django.db.models import F, Q
+from django.http import QueryDict
+
+CURSOR_SALT = "home.pagination.cursor"
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _encode_key(value):
+    # Full precision on purpose: DjangoJSONEncoder drops microseconds, which
+    # would break the equality half of the keyset comparison.
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Cannot use {type(value).__name__} in a pagination cursor")
+
+
+class CursorSerializer:
+    """JSON serializer for ``signing`` that keeps ordering keys exact."""
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=_encode_key, separators=(",", ":")).encode("latin-1")
+
+    def loads(self, data):
+        return json.loads(data.decode("latin-1"))
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, has_next, has_previous, offset, params):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.offset = offset
+        self._params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def start_index(self):
+        return self.offset + 1 if self.object_list else 0
+
+    @property
+    def end_index(self):
+        return self.offset + len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], "next", self.end_index)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous:
+            return None
+        offset = max(self.offset - self.paginator.per_page, 0)
+        return self.paginator.encode_cursor(self.object_list[0], "previous", offset)
+
+    @property
+    def next_querystring(self):
+        return self._querystring(self.next_cursor)
+
+    @property
+    def previous_querystring(self):
+        return self._querystring(self.previous_cursor)
+
+    @property
+    def estimated_count(self):
+        return self.paginator.estimate()[0]
+
+    @property
+    def estimate_is_lower_bound(self):
+        return self.paginator.estimate()[1]
+
+    def _querystring(self, cursor):
+        params = self._params.copy() if self._params is not None else QueryDict(mutable=True)
+        params.pop("page", None)
+        params["cursor"] = cursor
+        return params.urlencode()
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` by its ordering columns.
+
+    ``ordering`` defaults to the queryset's own ``order_by()`` and must end in a
+    unique column (usually ``-id``) so that every row has a distinct key.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None, estimate_limit=1000):
+        ordering = tuple(ordering or queryset.query.order_by)
+        if not ordering or not all(isinstance(field, str) for field in ordering):
+            raise ValueError("KeysetPaginator needs an ordering made of field names.")
+
+        self.per_page = per_page
+        self.estimate_limit = estimate_limit
+        self.keys = [
+            (field.lstrip("-"), field.startswith("-")) for field in ordering
+        ]
+        self.queryset = queryset.order_by(*ordering).annotate(
+            **{self._alias(i): F(path) for i, (path, _) in enumerate(self.keys)}
+        )
+        self._estimate = None
+
+    @staticmethod
+    def _alias(index):
+        return f"keyset_{index}"
+
+    def encode_cursor(self, obj, direction, offset):
+        values = [getattr(obj, self._alias(i)) for i in range(len(self.keys))]
+        payload = {"v": values, "d": direction, "o": offset}
+        return signing.dumps(
+            payload, salt=CURSOR_SALT, serializer=CursorSerializer, compress=True
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT, serializer=CursorSerializer)
+            values = payload["v"]
+            direction = payload["d"]
+            offset = int(payload["o"])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        if len(values) != len(self.keys) or direction not in ("next", "previous"):
+            raise InvalidCursor(cursor)
+
+        field_values = []
+        model = self.queryset.model
+        for (path, _), value in zip(self.keys, values):
+            field_values.append(self._resolve_field(model, path).to_python(value))
+        return field_values, direction, offset
+
+    @staticmethod
+    def _resolve_field(model, path):
+        *relations, name = path.split("__")
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.get_field(name)
+
+    def _after(self, values, reverse):
+        """Q object selecting the rows that come after ``values`` in the ordering."""
+        condition = Q()
+        for i, (path, descending) in enumerate(self.keys):
+            lookup = "gt" if descending == reverse else "lt"
+            clause = Q(**{f"{path}__{lookup}": values[i]})
+            for (prev_path, _), prev_value in zip(self.keys[:i], values[:i]):
+                clause &= Q(**{prev_path: prev_value})
+            condition |= clause
+        return condition
+
+    def estimate(self):
+        """
+        Row count capped at ``estimate_limit``, so the COUNT query stays bounded.
+        Returns ``(count, is_lower_bound)``; only runs if a template asks for it.
+        """
+        if self._estimate is None:
+            count = self.queryset.order_by()[: self.estimate_limit + 1].count()
+            self._estimate = (min(count, self.estimate_limit), count > self.estimate_limit)
+        return self._estimate
+
+    def get_page(self, cursor=None, params=None):
+        """
+        Return the page identified by ``cursor``. An empty or invalid cursor
+        gives the first page. ``params`` (e.g. ``request.GET``) is carried over
+        into ``next_querystring``/``previous_querystring``.
+        """
+        values, direction, offset = None, "next", 0
+        if cursor:
+            try:
+                values, direction, offset = self.decode_cursor(cursor)
+            except InvalidCursor:
+                values, direction, offset = None, "next", 0
+
+        queryset = self.queryset
+        if direction == "previous":
+            reversed_ordering = [
+                path if descending else f"-{path}" for path, descending in self.keys
+            ]
+            queryset = queryset.order_by(*reversed_ordering)
+            queryset = queryset.filter(self._after(values, reverse=True))
+            rows = list(queryset[: self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            object_list = rows[: self.per_page][::-1]
+            return KeysetPage(object_list, self, True, has_previous, offset, params)
+
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse=False))
+        rows = list(queryset[: self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return KeysetPage(rows[: self.per_page], self, has_next, values is not None, offset, params)
@@ -0,0 +1,174 @@
+"""
+Reverse matching of job-seeker profiles against saved searches.
+
+Instead of re-running every ``SavedSearch.get_matching_candidates()`` query,
+each changed profile's search document (``CandidateDocument``) is checked
+against the saved searches once. Every search
+is indexed in ``SavedSearchTerm`` under the terms a profile must have to match
+it: all of its skill terms (any one is enough), or failing that a
+three-letter slice of its education, company or location criterion. A
+profile only needs to be compared with the searches indexed under one of its
+own terms, plus the few that have none of those criteria (indexed as
+``ANY_TERM``).
+
+Skills are compared as whole terms, so "java" does not percolate to
+"javascript". The other criteria match anywhere in the text, as in candidate
+search; a text containing the criterion contains all of its slices, so the
+index never hides a match.
+"""
+from functools import partial
+import threading
+
+from django.db import transaction
+
+from . import candidates
+from .models import CandidateDocument, SavedSearch, SavedSearchMatch, SavedSearchTerm
+from .terms import skill_terms
+
+ANY_TERM = "*"
+
+
+def _slices(text):
+    """The three-character slices of ``text``, lowercased."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _anchor(prefix, text):
+    """
+    One slice of ``text`` as an index term, preferring letters and digits
+    only. None when ``text`` is too short to have one.
+    """
+    slices = _slices(text)
+    if not slices:
+        return None
+    return f"{prefix}:{max(slices, key=lambda piece: (piece.isalnum(), piece))}"
+
+
+def search_skill_terms(search):
+    terms = set()
+    for name in search.skills_query.split(","):
+        terms |= skill_terms(name)
+    return terms
+
+
+def search_terms(search):
+    """The index terms for ``search``; a matching profile has at least one of them."""
+    skills = search_skill_terms(search)
+    if skills:
+        return {f"skill:{term}" for term in skills}
+    for prefix, text in (
+        ("degree", search.education_level),
+        ("company", search.current_company),
+        ("location", search.location),
+    ):
+        anchor = _anchor(prefix, text)
+        if anchor:
+            return {anchor}
+    return {ANY_TERM}
+
+
+def profile_terms(document):
+    """The index terms describing the candidate behind ``document``."""
+    terms = {f"skill:{term}" for term in document.skill_terms}
+    terms |= {f"degree:{piece}" for piece in _slices(document.degrees)}
+    terms |= {f"company:{piece}" for piece in _slices(document.current_companies)}
+    terms |= {f"location:{piece}" for piece in _slices(document.location_text)}
+    terms.add(ANY_TERM)
+    return terms
+
+
+def index_saved_search(search, using="default"):
+    """
+    Replace the index rows for ``search`` after its criteria changed, and
+    withdraw the pending matches found with the old criteria that the new
+    ones don't match.
+    """
+    SavedSearchTerm.objects.using(using).filter(search=search).delete()
+    SavedSearchTerm.objects.using(using).bulk_create(
+        [SavedSearchTerm(term=term, search=search) for term in search_terms(search)]
+    )
+    pending = SavedSearchMatch.objects.using(using).filter(search=search)
+    documents = CandidateDocument.objects.using(using).filter(profile_id__in=pending.values("profile_id"))
+    still_matching = [
+        document.profile_id
+        for document in documents.iterator()
+        if search_matches_profile(search, document)
+    ]
+    pending.exclude(profile_id__in=still_matching).delete()
+
+
+def search_matches_profile(search, document):
+    """
+    The criteria of ``home.candidates.search_candidates`` applied in memory
+    to one candidate's search document.
+    """
+    skills = search_skill_terms(search)
+    if skills and not skills & document.skill_terms:
+        return False
+    if search.location and search.location.lower() not in document.location_text:
+        return False
+    years = search.min_experience_years()
+    if years is not None and not (document.has_experience and document.years_of_experience() >= years):
+        return False
+    if search.education_level and search.education_level.lower() not in document.degrees:
+        return False
+    if search.current_company and search.current_company.lower() not in document.current_companies:
+        return False
+    return True
+
+
+def percolate(profile_id, using="default"):
+    """
+    Match one profile against every active saved search and bring its pending
+    matches up to date: new hits are recorded, and searches it no longer
+    matches are withdrawn. Returns the matching searches.
+    """
+    matches = SavedSearchMatch.objects.using(using)
+    # Only job seekers have a search document
+    document = CandidateDocument.objects.using(using).filter(profile_id=profile_id).first()
+    if document is None:
+        matches.filter(profile_id=profile_id).delete()
+        return []
+
+    candidate_ids = SavedSearchTerm.objects.using(using).filter(
+        term__in=profile_terms(document), search__is_active=True
+    ).values("search_id")
+    hits = [
+        search
+        for search in SavedSearch.objects.using(using).filter(id__in=candidate_ids)
+        if search_matches_profile(search, document)
+    ]
+    matches.filter(profile_id=profile_id).exclude(search__in=[search.id for search in hits]).delete()
+    matches.bulk_create(
+        [SavedSearchMatch(search=search, profile_id=profile_id) for search in hits],
+        ignore_conflicts=True,
+    )
+    return hits
+
+
+_local = threading.local()
+
+
+def _percolate_pending(using):
+    """Refresh and percolate every profile scheduled on ``using`` so far."""
+    profile_ids = _local.__dict__.setdefault("pending", {}).pop(using, set())
+    if not profile_ids:
+        return
+    candidates.refresh_documents(profile_ids, using=using)
+    for profile_id in profile_ids:
+        percolate(profile_id, using=using)
+
+
+def schedule_percolation(profile_id, using="default"):
+    """
+    Rebuild the profile's candidate search document and percolate it once
+    the current transaction commits. All the changes made to profiles in one
+    transaction (an edit form saving its skills, education and experience
+    rows) share a single run: every call registers a callback, and the first
+    to run takes the whole pending set, leaving the rest nothing to do. A
+    profile left over from a rolled-back transaction is just refreshed with
+    the next commit.
+    """
+    _local.__dict__.setdefault("pending", {}).setdefault(using, set()).add(profile_id)
+    transaction.on_commit(partial(_percolate_pending, using), using=using)
@@ -0,0 +1,220 @@
+"""
+Queries and status changes behind the applicant pipeline (Kanban board) of a
+job posting.
+
+The board never loads a job's applications in full: column totals come from
+one GROUP BY, each column shows its newest cards and pages further with a
+cursor, and the applicant map asks for the pins inside its viewport.
+
+Status changes go through ``move_applications``, which moves any number of
+cards in one transaction and one UPDATE, and refuses to overwrite a card
+that someone else has moved since it was loaded. Each change is logged for
+the hiring-funnel statistics (home.funnel). Applications whose status is
+changed by ``save()`` instead (scripts, the shell) are caught up by
+``record_saved_move`` from home.signals.
+"""
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from . import funnel
+from .geo import MAX_MARKERS
+from .models import ApplicationEvent, JobApplication
+
+# Cards rendered per column, initially and per "load more"
+PIPELINE_PAGE_SIZE = 25
+CARD_ORDERING = ("-applied_at", "-id")
+
+Status = JobApplication.ApplicationStatus
+
+
+def stage_filter(status):
+    """
+    Applications shown in the ``status`` column. Rows with an unknown status
+    are shown under New.
+    """
+    if status == Status.NEW:
+        return Q(status=Status.NEW) | ~Q(status__in=Status.values)
+    return Q(status=status)
+
+
+def stage_counts(job):
+    """``{status: count}`` for every stage of the board, from one query."""
+    counts = dict.fromkeys(Status.values, 0)
+    rows = job.applications.order_by().values_list("status").annotate(Count("id"))
+    for status, count in rows:
+        key = status if status in counts else Status.NEW
+        counts[key] += count
+    return counts
+
+
+def stage_cards(job, status):
+    """Queryset of the cards in one column, newest applications first."""
+    return (
+        job.applications.filter(stage_filter(status))
+        .select_related("applicant__profile")
+        .order_by(*CARD_ORDERING)
+    )
+
+
+def applicant_locations(job, bbox=None, limit=MAX_MARKERS):
+    """
+    Map pins for the job's applicants who have coordinates, optionally only
+    inside ``bbox`` (west, south, east, north). Returns ``(pins, truncated)``.
+    """
+    applications = job.applications.filter(
+        applicant__profile__latitude__isnull=False,
+        applicant__profile__longitude__isnull=False,
+    )
+    if bbox is not None:
+        west, south, east, north = bbox
+        applications = applications.filter(
+            applicant__profile__latitude__range=(south, north),
+            applicant__profile__longitude__range=(west, east),
+        )
+    rows = list(
+        applications.order_by("-applied_at", "-id").values_list(
+            "id",
+            "applicant__username",
+            "applicant__profile__name",
+            "applicant__profile__latitude",
+            "applicant__profile__longitude",
+        )[: limit + 1]
+    )
+    # reverse() once with a placeholder rather than once per applicant
+    url_template = reverse("accounts.profile_view", args=["__username__"])
+    pins = [
+        {
+            "id": application_id,
+            "name": name or username,
+            "lat": latitude,
+            "lon": longitude,
+            "profile_url": url_template.replace("__username__", username),
+        }
+        for application_id, username, name, latitude, longitude in rows[:limit]
+    ]
+    return pins, len(rows) > limit
+
+
+@dataclass
+class MoveResult:
+    # {application id: new version}
+    moved: dict = field(default_factory=dict)
+    # {application id: (current status, current version)} for cards that
+    # changed since the client loaded them
+    conflicts: dict = field(default_factory=dict)
+    # Ids that don't exist, or aren't on a job the user may manage
+    forbidden: set = field(default_factory=set)
+
+
+def move_applications(user, expected_versions, status, job=None):
+    """
+    Move applications to ``status``. ``expected_versions`` maps application
+    ids to the version the client last saw, or None to skip the check.
+    Only applications on ``user``'s jobs (any job for staff), and on ``job``
+    if given, are touched.
+    """
+    result = MoveResult()
+    if not expected_versions:
+        return result
+
+    with transaction.atomic():
+        applications = JobApplication.objects.filter(id__in=expected_versions)
+        if job is not None:
+            applications = applications.filter(job=job)
+        if not user.is_staff:
+            applications = applications.filter(job__posted_by=user)
+        current = {
+            row[0]: row[1:]
+            for row in applications.select_for_update(of=("self",)).values_list(
+                "id", "status", "version", "job_id", "status_changed_at"
+            )
+        }
+        result.forbidden = set(expected_versions) - set(current)
+
+        # Group by version so the UPDATE has one condition per distinct version
+        by_version = {}
+        for application_id, (current_status, version, _, _) in current.items():
+            expected = expected_versions[application_id]
+            if expected is not None and expected != version:
+                result.conflicts[application_id] = (current_status, version)
+            elif current_status == status:
+                # Already there: nothing to write or to log
+                result.moved[application_id] = version
+            else:
+                by_version.setdefault(version, []).append(application_id)
+        if not by_version:
+            return result
+
+        now = timezone.now()
+        condition = Q()
+        for version, ids in by_version.items():
+            condition |= Q(version=version, id__in=ids)
+        updated = JobApplication.objects.filter(condition).update(
+            status=status, version=F("version") + 1, status_changed_at=now, updated_at=now
+        )
+
+        expected_after = {
+            application_id: version + 1
+            for version, ids in by_version.items()
+            for application_id in ids
+        }
+        if updated == len(expected_after):
+            moved = expected_after
+        else:
+            # Rows changed between the read and the UPDATE (possible on
+            # backends without row locks): report what actually happened
+            moved = {}
+            for application_id, current_status, version in JobApplication.objects.filter(
+                id__in=expected_after
+            ).values_list("id", "status", "version"):
+                if version == expected_after[application_id] and current_status == status:
+                    moved[application_id] = version
+                else:
+                    result.conflicts[application_id] = (current_status, version)
+        result.moved.update(moved)
+
+        funnel.record_events([
+            ApplicationEvent(
+                application_id=application_id,
+                job_id=current[application_id][2],
+                from_status=current[application_id][0],
+                to_status=status,
+                changed_by=user,
+                changed_at=now,
+                time_in_stage=now - current[application_id][3],
+            )
+            for application_id in moved
+        ])
+    return result
+
+
+def record_saved_move(application, from_status, version, entered_at, using="default"):
+    """
+    Finish a status change made by saving ``application``, as
+    ``move_applications`` would have: bump the version the row had before
+    the save, restart the time in stage and log the change. ``from_status``,
+    ``version`` and ``entered_at`` are the row's values before the save.
+    """
+    now = timezone.now()
+    JobApplication.objects.using(using).filter(pk=application.pk).update(
+        version=version + 1, status_changed_at=now
+    )
+    application.version = version + 1
+    application.status_changed_at = now
+    funnel.record_events(
+        [
+            ApplicationEvent(
+                application_id=application.pk,
+                job_id=application.job_id,
+                from_status=from_status,
+                to_status=application.status,
+                changed_at=now,
+                time_in_stage=now - entered_at,
+            )
+        ],
+        using,
+    )
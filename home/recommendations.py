@@ -0,0 +1,156 @@
+"""
+Skill-based matching between jobs and job seekers.
+
+Active jobs are indexed in ``JobTerm`` by the terms of their title,
+description and requirements, and profiles in ``accounts.SkillTerm`` by their
+skills (see ``home.terms``). Matches are scored by the rarity of the shared
+terms, so a match on "kubernetes" counts for more than one on "communication".
+"""
+import math
+
+from django.db.models import Case, Count, FloatField, Sum, Value, When
+
+from accounts.models import Profile, SkillTerm
+from .models import Job, JobApplication, JobTerm
+from .terms import skill_terms, text_terms
+
+# Bounds that keep candidate recommendations at a fixed cost per request:
+# at most this many skill terms are pulled from a job posting...
+MAX_JOB_SKILL_TERMS = 30
+# ...and at most this many ranked candidates are returned
+MAX_RECOMMENDED_CANDIDATES = 200
+
+
+def index_job_terms(job, using="default"):
+    """Replace the index rows for ``job``; inactive jobs are dropped from the index."""
+    JobTerm.objects.using(using).filter(job=job).delete()
+    if not job.is_active:
+        return
+    terms = text_terms(" ".join([job.title, job.description, job.requirements]))
+    JobTerm.objects.using(using).bulk_create(
+        [JobTerm(term=term, job=job) for term in terms]
+    )
+
+
+def rebuild_job_terms(using="default", batch_size=500):
+    """Repopulate the index from scratch. Returns the number of jobs indexed."""
+    JobTerm.objects.using(using).all().delete()
+    jobs = (
+        Job.objects.using(using)
+        .filter(is_active=True)
+        .only("id", "title", "description", "requirements")
+        .order_by("id")
+    )
+    total = 0
+    rows = []
+    for job in jobs.iterator(chunk_size=batch_size):
+        text = " ".join([job.title, job.description, job.requirements])
+        rows.extend(JobTerm(term=term, job_id=job.id) for term in text_terms(text))
+        total += 1
+        if len(rows) >= batch_size * 50:
+            JobTerm.objects.using(using).bulk_create(rows, batch_size=batch_size)
+            rows = []
+    JobTerm.objects.using(using).bulk_create(rows, batch_size=batch_size)
+    return total
+
+
+def term_weights(terms):
+    """
+    Inverse document frequency of each term that appears in the index:
+    log(1 + active jobs / jobs mentioning the term).
+    """
+    document_frequency = dict(
+        JobTerm.objects.filter(term__in=terms)
+        .values_list("term")
+        .annotate(Count("id"))
+    )
+    if not document_frequency:
+        return {}
+    total_jobs = Job.objects.filter(is_active=True).count() or 1
+    return {
+        term: math.log(1 + total_jobs / frequency)
+        for term, frequency in document_frequency.items()
+    }
+
+
+def idf_score(weights):
+    """Aggregate summing the weight of every matched term in a row group."""
+    return Sum(
+        Case(
+            *[When(term=term, then=Value(weight)) for term, weight in weights.items()],
+            output_field=FloatField(),
+        )
+    )
+
+
+def recommend_jobs(user, skill_names, limit=10):
+    """
+    Return up to ``limit`` active jobs matching ``skill_names``, best first,
+    excluding jobs ``user`` has already applied to. Each job gets a
+    ``match_score`` attribute.
+    """
+    terms = set()
+    for name in skill_names:
+        terms |= skill_terms(name)
+    weights = term_weights(terms)
+    if not weights:
+        return []
+
+    score = idf_score(weights)
+    applied_job_ids = JobApplication.objects.filter(applicant=user).values("job_id")
+    ranked = (
+        JobTerm.objects.filter(term__in=weights.keys())
+        .exclude(job_id__in=applied_job_ids)
+        .values("job_id")
+        .annotate(score=score)
+        .order_by("-score", "-job_id")[:limit]
+    )
+    scores = {row["job_id"]: row["score"] for row in ranked}
+
+    jobs = Job.objects.filter(id__in=scores, is_active=True).select_related("company")
+    jobs = sorted(jobs, key=lambda job: (-scores[job.id], -job.id))
+    for job in jobs:
+        job.match_score = scores[job.id]
+    return jobs
+
+
+def extract_job_skills(job):
+    """
+    Map a job posting onto the skill vocabulary: the terms of its text that
+    at least one job seeker lists as a skill. Returns ``{term: weight}`` for
+    at most ``MAX_JOB_SKILL_TERMS`` terms, rarest first.
+    """
+    terms = text_terms(" ".join([job.title, job.description, job.requirements]))
+    profile_frequency = dict(
+        SkillTerm.objects.filter(term__in=terms, profile__role=Profile.Role.JOB_SEEKER)
+        .values_list("term")
+        .annotate(Count("id"))
+    )
+    if not profile_frequency:
+        return {}
+    total_profiles = Profile.objects.filter(role=Profile.Role.JOB_SEEKER).count() or 1
+    rarest = sorted(profile_frequency.items(), key=lambda item: (item[1], item[0]))
+    return {
+        term: math.log(1 + total_profiles / frequency)
+        for term, frequency in rarest[:MAX_JOB_SKILL_TERMS]
+    }
+
+
+def recommend_candidates(job):
+    """
+    Return ``(profile_id, score)`` pairs for job seekers whose skills overlap
+    the job posting, best match first, skipping people who already applied.
+    """
+    weights = extract_job_skills(job)
+    if not weights:
+        return []
+
+    applied_user_ids = JobApplication.objects.filter(job=job).values("applicant_id")
+    ranked = (
+        SkillTerm.objects.filter(term__in=weights.keys(), profile__role=Profile.Role.JOB_SEEKER)
+        .exclude(profile__user_id__in=applied_user_ids)
+        .values("profile_id")
+        .annotate(score=idf_score(weights))
+        .order_by("-score", "-profile_id")[:MAX_RECOMMENDED_CANDIDATES]
+    )
+    return [(row["profile_id"], row["score"]) for row in ranked]
@@ -0,0 +1,149 @@
+"""
+Full-text search over job postings.
+
+On SQLite the index is an FTS5 virtual table (``home_job_fts``) keyed by job id,
+kept in sync by the signal handlers in ``home.signals``. Other database
+backends fall back to the original ``icontains`` filter.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+FTS_TABLE = "home_job_fts"
+
+# Column weights for bm25(): title, company name, description, requirements
+RANK_WEIGHTS = (10.0, 5.0, 1.0, 1.0)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+INSERT_SQL = (
+    f"INSERT OR REPLACE INTO {FTS_TABLE} "
+    "(rowid, title, company_name, description, requirements) VALUES (%s, %s, %s, %s, %s)"
+)
+
+
+# Columns and tokenizer of the FTS5 table
+TABLE_DEFINITION = (
+    "fts5(title, company_name, description, requirements, tokenize = 'porter unicode61')"
+)
+
+
+def fts_enabled(using="default"):
+    return connections[using].vendor == "sqlite"
+
+
+def rank_function():
+    weights = ", ".join(str(w) for w in RANK_WEIGHTS)
+    return f"bm25({weights})"
+
+
+def create_index(connection):
+    """Create the FTS5 table and configure its ranking function."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING {TABLE_DEFINITION}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', %s)", [rank_function()]
+        )
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def index_is_current(connection):
+    """Whether the FTS5 table exists with the definition and ranking above."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+        row = cursor.fetchone()
+        if row is None or not row[0].endswith(f"USING {TABLE_DEFINITION}"):
+            return False
+        cursor.execute(f"SELECT v FROM {FTS_TABLE}_config WHERE k = 'rank'")
+        row = cursor.fetchone()
+    return row is not None and row[0] == rank_function()
+
+
+def build_match_query(text):
+    """
+    Turn free text from the search box into a safe FTS5 query.
+    Every word becomes a quoted prefix term, so "pyth dev" matches "Python Developer".
+    """
+    tokens = TOKEN_RE.findall(text.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def index_jobs(jobs, using="default"):
+    """Insert or refresh index rows for the given jobs (company must be loaded)."""
+    if not fts_enabled(using):
+        return
+    rows = [
+        (job.id, job.title, job.company.name, job.description, job.requirements)
+        for job in jobs
+    ]
+    if rows:
+        with connections[using].cursor() as cursor:
+            cursor.executemany(INSERT_SQL, rows)
+
+
+def remove_jobs(job_ids, using="default"):
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(job_id,) for job_id in job_ids]
+        )
+
+
+def rebuild_index(using="default", batch_size=1000):
+    """
+    Recreate the index with the current definition and repopulate it.
+    Returns the number of jobs indexed.
+    """
+    from .models import Job
+
+    if not fts_enabled(using):
+        return 0
+    connection = connections[using]
+    # Only a changed definition needs the table recreated. Emptying it
+    # instead leaves FTS5 nothing it can't roll back to a savepoint: a
+    # rolled back table or rank change leaves the connection unusable.
+    if index_is_current(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    else:
+        drop_index(connection)
+        create_index(connection)
+
+    total = 0
+    batch = []
+    jobs = Job.objects.using(using).select_related("company").order_by("id")
+    for job in jobs.iterator(chunk_size=batch_size):
+        batch.append(job)
+        if len(batch) >= batch_size:
+            index_jobs(batch, using)
+            total += len(batch)
+            batch = []
+    index_jobs(batch, using)
+    return total + len(batch)
+
+
+def search_jobs(jobs, text):
+    """
+    Filter a Job queryset down to postings matching ``text``, most relevant first.
+    """
+    match_query = build_match_query(text)
+    if not match_query:
+        return jobs
+
+    if not fts_enabled(jobs.db):
+        return jobs.filter(
+            Q(title__icontains=text)
+            | Q(company__name__icontains=text)
+            | Q(description__icontains=text)
+            | Q(requirements__icontains=text)
+        )
+
+    return jobs.filter(search_document__document__match=match_query).order_by(
+        "search_document__rank", "-created_at", "-id"
+    )
@@ -0,0 +1,158 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from accounts.models import Education, Experience, Profile, Skill
+from .models import Company, Job, JobApplication, SavedSearch
+from . import caching, funnel, homepage, percolator, pipeline, recommendations, search
+
+
+@receiver(post_save, sender=Job)
+def index_job(sender, instance, using, **kwargs):
+    """Keep the full-text search index in sync with the job posting."""
+    search.index_jobs([instance], using=using)
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance, using, **kwargs):
+    search.remove_jobs([instance.id], using=using)
+
+
+@receiver(post_save, sender=Job)
+def invalidate_job_map(sender, instance, created, using, **kwargs):
+    """Orphan the cached map clusters and snapshot if the job's pin changed."""
+    if created or instance.has_changed(*Job.MAP_FIELDS):
+        caching.bump_version_on_commit(caching.JOB_MAP, using=using)
+
+
+@receiver(post_save, sender=Job)
+def index_job_terms(sender, instance, created, using, **kwargs):
+    """Keep the skill term index in step with the job text and active flag."""
+    if created or instance.has_changed(*Job.TERM_FIELDS):
+        recommendations.index_job_terms(instance, using=using)
+
+
+@receiver(post_delete, sender=Job)
+def invalidate_job_map_on_delete(sender, using, **kwargs):
+    caching.bump_version_on_commit(caching.JOB_MAP, using=using)
+
+
+@receiver(post_save, sender=Job)
+def invalidate_featured_jobs(sender, instance, created, using, **kwargs):
+    if created or instance.has_changed(*Job.CARD_FIELDS):
+        homepage.invalidate_featured_jobs(using=using)
+
+
+@receiver(post_delete, sender=Job)
+def invalidate_featured_jobs_on_delete(sender, using, **kwargs):
+    homepage.invalidate_featured_jobs(using=using)
+
+
+@receiver(post_save, sender=Job)
+def invalidate_recommendations(sender, instance, created, using, **kwargs):
+    """A deactivated or edited job mustn't stay among cached recommendations."""
+    if not created and instance.has_changed(*Job.CARD_FIELDS):
+        homepage.invalidate_all_recommendations(using=using)
+
+
+@receiver(post_delete, sender=Job)
+def invalidate_recommendations_on_delete(sender, using, **kwargs):
+    homepage.invalidate_all_recommendations(using=using)
+
+
+@receiver(post_save, sender=Company)
+def reindex_company_jobs(sender, instance, created, using, **kwargs):
+    """The company name is part of every job's search document."""
+    if created:
+        return
+    jobs = list(instance.jobs.using(using).all())
+    for job in jobs:
+        job.company = instance
+    search.index_jobs(jobs, using=using)
+    # Map popups and home page cards show the company name
+    caching.bump_version_on_commit(caching.JOB_MAP, using=using)
+    homepage.invalidate_featured_jobs(using=using)
+    homepage.invalidate_all_recommendations(using=using)
+
+
+@receiver(post_save, sender=SavedSearch)
+def index_saved_search(sender, instance, created, using, **kwargs):
+    if created or instance.has_changed(*SavedSearch.CRITERIA_FIELDS):
+        percolator.index_saved_search(instance, using=using)
+
+
+@receiver(post_save, sender=Profile)
+def percolate_profile(sender, instance, using, **kwargs):
+    """Check the saved searches against the profile once the edit commits."""
+    percolator.schedule_percolation(instance.id, using=using)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=Education)
+@receiver(post_delete, sender=Education)
+@receiver(post_save, sender=Experience)
+@receiver(post_delete, sender=Experience)
+def percolate_profile_section(sender, instance, using, **kwargs):
+    # Nothing to match when the whole user or profile is being deleted
+    if isinstance(kwargs.get("origin"), (User, Profile)):
+        return
+    percolator.schedule_percolation(instance.profile_id, using=using)
+
+
+@receiver(post_save, sender=JobApplication)
+def log_new_application(sender, instance, created, using, **kwargs):
+    """Status changes are logged by home.pipeline; new applications here."""
+    if created:
+        funnel.record_created(instance, using=using)
+
+
+@receiver(pre_save, sender=JobApplication)
+def remember_stored_status(sender, instance, raw, using, update_fields, **kwargs):
+    """
+    Read the stored status before a save that may change it, so the change
+    can be logged like a pipeline move. Moves made with
+    ``move_applications`` are UPDATEs and send no signals.
+    """
+    instance._stored_status = None
+    if raw or instance._state.adding or (update_fields is not None and "status" not in update_fields):
+        return
+    instance._stored_status = (
+        sender.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list("status", "version", "status_changed_at")
+        .first()
+    )
+
+
+@receiver(post_save, sender=JobApplication)
+def log_saved_status_change(sender, instance, created, using, **kwargs):
+    stored = getattr(instance, "_stored_status", None)
+    instance._stored_status = None
+    if created or stored is None or stored[0] == instance.status:
+        return
+    pipeline.record_saved_move(instance, *stored, using=using)
+
+
+@receiver(post_save, sender=JobApplication)
+@receiver(post_delete, sender=JobApplication)
+def invalidate_applicant_recommendations(sender, instance, using, **kwargs):
+    # Recommendations leave out jobs the seeker has applied to, so only new
+    # and deleted applications matter (post_delete sends no ``created``)
+    if kwargs.get("created", True):
+        homepage.invalidate_recommendations(instance.applicant_id, using=using)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def invalidate_skill_recommendations(sender, instance, using, **kwargs):
+    if isinstance(kwargs.get("origin"), (User, Profile)):
+        return
+    homepage.invalidate_recommendations(instance.profile.user_id, using=using)
+
+
+@receiver(pre_delete, sender=JobApplication)
+def forget_application(sender, instance, using, **kwargs):
+    # A deleted job takes its rollups with it
+    if isinstance(kwargs.get("origin"), Job):
+        return
+    funnel.forget_application(instance.id, using=using)
@@ -0,0 +1,95 @@
+"""
+Precomputed response payloads.
+
+A snapshot is serialized once per version of its namespace (see
+``home.caching``) and kept in the cache together with its gzip encoding and
+an ETag. Serving it costs one cache read and no database queries, and clients
+that already have the current version get an empty 304.
+"""
+import gzip
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
+
+from lockedin.db_router import primary_reads
+
+from . import caching
+
+
+def get_json_snapshot(name, namespace, build):
+    """
+    Return the snapshot dict (``version``, ``etag``, ``body``, ``gzip``) for
+    ``name``, calling ``build()`` for fresh data if ``namespace`` has moved on.
+    """
+    version = caching.get_version(namespace)
+    key = f"home:snapshot:{name}"
+    snapshot = cache.get(key)
+    if snapshot is None or snapshot["version"] != version:
+        with primary_reads():
+            data = build()
+        body = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+        snapshot = {
+            "version": version,
+            # Weak, because the gzip and identity encodings share it
+            "etag": f'W/"{version}-{hashlib.sha1(body).hexdigest()[:16]}"',
+            "body": body,
+            "gzip": gzip.compress(body, mtime=0),
+        }
+        cache.set(key, snapshot, timeout=None)
+    return snapshot
+
+
+def etag_matches(request, etag):
+    """Whether the request's If-None-Match names ``etag`` (weak comparison)."""
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = [tag.removeprefix("W/") for tag in parse_etags(if_none_match)]
+    return "*" in etags or etag.removeprefix("W/") in etags
+
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response["ETag"] = etag
+    return response
+
+
+def versioned_json_response(request, namespace, build):
+    """
+    Serve ``build()`` as JSON for a URL whose response only changes when
+    ``namespace``'s version does. The ETag names the version, so a client
+    revalidating its copy gets an empty 304 without ``build`` being called.
+    """
+    version = caching.get_version(namespace)
+    etag = f'W/"{namespace}-{version}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    # Browsers keep what they get under this version's ETag
+    with primary_reads():
+        response = JsonResponse(build(), safe=False)
+    response["ETag"] = etag
+    # Let browsers keep it, but revalidate on every use
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def snapshot_response(request, snapshot, content_type="application/json"):
+    """Serve a snapshot, honouring If-None-Match and Accept-Encoding."""
+    if etag_matches(request, snapshot["etag"]):
+        return not_modified(snapshot["etag"])
+
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = HttpResponse(snapshot["gzip"], content_type=content_type)
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(snapshot["body"], content_type=content_type)
+    response["ETag"] = snapshot["etag"]
+    response["Vary"] = "Accept-Encoding"
+    # Let browsers keep it, but revalidate on every use
+    response["Cache-Control"] = "no-cache"
+    response["X-Snapshot-Version"] = str(snapshot["version"])
+    return response
@@ -0,0 +1,512 @@
+"""
+Deterministic synthetic data for load tests and benchmarks.
+
+``generate`` fills a database with recruiters and their companies,
+geo-located jobs and saved searches, and job seekers with skills,
+education, experience, applications in every pipeline stage and message
+threads with recruiters. Rows are written with ``bulk_create`` in batches,
+which sends no signals, so the rows the signals would maintain (profiles,
+skill terms, saved-search terms, application events, inbox summaries and
+unread counters) are written alongside, and the indexes built from whole
+tables (funnel rollups, candidate documents, job search) are rebuilt at
+the end. The same seed and ``until`` give the same rows; only the
+``updated_at`` times record when they were written.
+"""
+from collections import Counter
+from contextlib import contextmanager
+import datetime
+import random
+import string
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from accounts.models import Education, Experience, Link, Profile, Skill, SkillTerm
+from messaging.models import Conversation, Message, UnreadCounter
+from . import caching, candidates, funnel, recommendations, search
+from .models import ApplicationEvent, Company, Job, JobApplication, SavedSearch, SavedSearchTerm
+from .percolator import search_terms
+from .terms import skill_terms
+
+FIRST_NAMES = [
+    "Aaliyah", "Aiden", "Amara", "Andre", "Ava", "Carlos", "Chloe", "Daniel", "Diego", "Elena",
+    "Emma", "Ethan", "Fatima", "Grace", "Hannah", "Hiroshi", "Isaac", "Jamal", "Jasmine", "Julia",
+    "Kai", "Leah", "Liam", "Lucas", "Maya", "Mei", "Mohammed", "Nadia", "Noah", "Olivia",
+    "Omar", "Priya", "Rafael", "Riley", "Samuel", "Sofia", "Tariq", "Wei", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Adams", "Ahmed", "Bailey", "Chen", "Clark", "Davis", "Diaz", "Evans", "Garcia", "Gupta",
+    "Hall", "Hernandez", "Ito", "Jackson", "Johnson", "Kim", "Kowalski", "Lee", "Lopez", "Martin",
+    "Mensah", "Miller", "Nguyen", "Okafor", "Patel", "Perez", "Reed", "Rossi", "Sato", "Schmidt",
+    "Shah", "Silva", "Smith", "Taylor", "Thomas", "Walker", "Wang", "Williams", "Wright", "Young",
+]
+# (location, latitude, longitude)
+CITIES = [
+    ("Atlanta, GA", 33.749, -84.388),
+    ("Austin, TX", 30.267, -97.743),
+    ("Boston, MA", 42.360, -71.059),
+    ("Chicago, IL", 41.878, -87.630),
+    ("Dallas, TX", 32.777, -96.797),
+    ("Denver, CO", 39.739, -104.990),
+    ("Los Angeles, CA", 34.052, -118.244),
+    ("Miami, FL", 25.762, -80.192),
+    ("Minneapolis, MN", 44.978, -93.265),
+    ("New York, NY", 40.713, -74.006),
+    ("Philadelphia, PA", 39.953, -75.165),
+    ("Phoenix, AZ", 33.448, -112.074),
+    ("Pittsburgh, PA", 40.441, -79.996),
+    ("Portland, OR", 45.515, -122.679),
+    ("Raleigh, NC", 35.780, -78.639),
+    ("San Diego, CA", 32.716, -117.161),
+    ("San Francisco, CA", 37.775, -122.419),
+    ("Seattle, WA", 47.606, -122.332),
+    ("Washington, DC", 38.907, -77.037),
+]
+SKILLS = [
+    "Python", "Django", "Flask", "JavaScript", "TypeScript", "React", "Vue.js", "Node.js", "Java",
+    "Spring Boot", "Kotlin", "Swift", "Go", "Rust", "C++", "C#", ".NET", "Ruby on Rails", "PHP",
+    "SQL", "PostgreSQL", "MySQL", "MongoDB", "Redis", "AWS", "Azure", "Google Cloud", "Docker",
+    "Kubernetes", "Terraform", "Linux", "Git", "GraphQL", "REST APIs", "Machine Learning",
+    "Data Analysis", "Pandas", "TensorFlow", "Figma", "Project Management",
+]
+JOB_TITLES = [
+    ("Software Engineer", ["Python", "Java", "Go", "SQL", "Git"]),
+    ("Backend Developer", ["Python", "Django", "PostgreSQL", "REST APIs", "Redis"]),
+    ("Frontend Developer", ["JavaScript", "TypeScript", "React", "Vue.js", "Figma"]),
+    ("Full Stack Developer", ["JavaScript", "React", "Node.js", "SQL", "Docker"]),
+    ("Mobile Developer", ["Swift", "Kotlin", "REST APIs", "Git"]),
+    ("DevOps Engineer", ["AWS", "Docker", "Kubernetes", "Terraform", "Linux"]),
+    ("Data Engineer", ["Python", "SQL", "Pandas", "Google Cloud", "MongoDB"]),
+    ("Data Scientist", ["Python", "Machine Learning", "Pandas", "TensorFlow", "Data Analysis"]),
+    ("Machine Learning Engineer", ["Python", "TensorFlow", "Machine Learning", "AWS"]),
+    ("Platform Engineer", ["Go", "Kubernetes", "Linux", "Terraform"]),
+    ("Systems Engineer", ["C++", "Rust", "Linux", "Git"]),
+    ("Web Developer", ["PHP", "JavaScript", "MySQL", "Ruby on Rails"]),
+    ("Cloud Architect", ["AWS", "Azure", "Google Cloud", "Terraform"]),
+    ("Technical Project Manager", ["Project Management", "Data Analysis", "Git"]),
+    (".NET Developer", ["C#", ".NET", "Azure", "SQL"]),
+]
+SENIORITY = [("entry", "Junior"), ("mid", ""), ("senior", "Senior"), ("executive", "Principal")]
+COMPANY_WORDS = [
+    "Acme", "Apex", "Beacon", "Blue", "Bright", "Cedar", "Civic", "Coral", "Delta", "Ember",
+    "Falcon", "Harbor", "Horizon", "Iron", "Juniper", "Keystone", "Lumen", "Maple", "Nimbus",
+    "Northwind", "Orbit", "Peak", "Pioneer", "Quantum", "River", "Summit", "Vertex", "Willow",
+]
+COMPANY_SUFFIXES = ["Labs", "Systems", "Technologies", "Software", "Health", "Analytics", "Works", "Digital"]
+SCHOOLS = [
+    "Georgia Institute of Technology", "University of Michigan", "University of Texas at Austin",
+    "Carnegie Mellon University", "Ohio State University", "University of Washington",
+    "Arizona State University", "University of Florida", "Purdue University", "Rutgers University",
+]
+DEGREES = [
+    ("Bachelor of Science", "Computer Science"),
+    ("Bachelor of Science", "Computer Engineering"),
+    ("Bachelor of Arts", "Mathematics"),
+    ("Bachelor of Science", "Information Systems"),
+    ("Master of Science", "Computer Science"),
+    ("Master of Science", "Data Science"),
+    ("Associate Degree", "Web Development"),
+    ("PhD", "Computer Science"),
+]
+
+Status = JobApplication.ApplicationStatus
+# Where applications end up, and how often
+FINAL_STAGES = [
+    (Status.NEW, 35),
+    (Status.SCREENING, 20),
+    (Status.INTERVIEW, 12),
+    (Status.OFFER, 4),
+    (Status.HIRED, 4),
+    (Status.REJECTED, 25),
+]
+# Applications per job seeker, and how often
+APPLICATIONS_PER_SEEKER = [(0, 20), (1, 25), (2, 20), (3, 15), (5, 12), (8, 8)]
+Visibility = Profile.SectionVisibility
+VISIBILITIES = [(Visibility.PUBLIC, 3), (Visibility.RECRUITERS, 6), (Visibility.PRIVATE, 1)]
+# Share of job seekers who exchange messages with recruiters
+MESSAGING_SHARE = 0.3
+
+
+@contextmanager
+def explicit_timestamps(model, field_name):
+    """Make ``bulk_create`` keep the given values of an ``auto_now_add`` field."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+class Generator:
+    def __init__(self, seed=0, until=None, batch_size=1000, password="password", using="default", log=None):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.until = until
+        self.batch_size = batch_size
+        # One hash for everyone, with a salt from the seed
+        salt = "".join(self.rng.choices(string.ascii_letters + string.digits, k=22))
+        self.password = make_password(password, salt)
+        self.using = using
+        self.log = log or (lambda message: None)
+        self.counts = Counter()
+        self.unread = Counter()
+        self.next_user = 0
+
+    def create(self, model, objects):
+        model.objects.using(self.using).bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model.__name__] += len(objects)
+        return objects
+
+    def moment(self, after, within_days):
+        """A time up to ``within_days`` after ``after``, no later than ``until``."""
+        moment = after + datetime.timedelta(seconds=self.rng.random() * within_days * 86400)
+        return min(moment, self.until)
+
+    def ago(self, days):
+        return self.until - datetime.timedelta(seconds=self.rng.random() * days * 86400)
+
+    def near(self, city):
+        location, latitude, longitude = city
+        return location, latitude + self.rng.uniform(-0.15, 0.15), longitude + self.rng.uniform(-0.15, 0.15)
+
+    def create_users(self, count, role, joined_within_days):
+        """``count`` users with profiles of ``role``; returns the profiles."""
+        rng = self.rng
+        users, profiles = [], []
+        for _ in range(count):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            username = f"{first}.{last}.{self.seed}.{self.next_user}".lower()
+            self.next_user += 1
+            users.append(User(
+                username=username,
+                first_name=first,
+                last_name=last,
+                email=f"{username}@example.com",
+                password=self.password,
+                date_joined=self.ago(joined_within_days),
+            ))
+            location, latitude, longitude = self.near(rng.choice(CITIES))
+            profiles.append(Profile(
+                name=f"{first} {last}",
+                role=role,
+                email=f"{username}@example.com",
+                location=location,
+                latitude=latitude,
+                longitude=longitude,
+                bio=f"{rng.choice(JOB_TITLES)[0]} based in {location}.",
+                skills_visibility=_weighted(rng, VISIBILITIES),
+                education_visibility=_weighted(rng, VISIBILITIES),
+                experience_visibility=_weighted(rng, VISIBILITIES),
+            ))
+        self.create(User, users)
+        for user, profile in zip(users, profiles):
+            profile.user = user
+        return self.create(Profile, profiles)
+
+    def create_recruiters(self, count, job_count):
+        """Recruiters, their companies, jobs and saved searches."""
+        rng = self.rng
+        recruiters = self.create_users(count, Profile.Role.RECRUITER, 1095)
+        companies = []
+        names = set()
+        for owner in recruiters[: max(1, count // 2)]:
+            name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+            while name in names:
+                name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+            names.add(name)
+            location, _, _ = rng.choice(CITIES)
+            companies.append(Company(
+                owner_id=owner.user_id,
+                name=name,
+                description=f"{name} builds software for customers across the country.",
+                website=f"https://{name.lower().replace(' ', '')}.example.com",
+                location=location,
+                logo="",
+                created_at=self.ago(1460),
+            ))
+        self.create(Company, companies)
+
+        jobs = []
+        for number in range(job_count):
+            company = companies[number % len(companies)]
+            poster = recruiters[number % len(recruiters)]
+            title, title_skills = rng.choice(JOB_TITLES)
+            level, prefix = rng.choice(SENIORITY)
+            skills = rng.sample(title_skills, min(3, len(title_skills)))
+            skills += rng.sample([skill for skill in SKILLS if skill not in skills], 2)
+            location, latitude, longitude = self.near(rng.choice(CITIES))
+            salary_min = rng.randrange(40000, 180000, 5000)
+            jobs.append(Job(
+                title=f"{prefix} {title}".strip(),
+                company=company,
+                description=(
+                    f"{company.name} is hiring a {title.lower()} in {location}. "
+                    f"You'll work with {', '.join(skills[:-1])} and {skills[-1]}."
+                ),
+                requirements="\n".join(skills),
+                location=location,
+                latitude=latitude,
+                longitude=longitude,
+                job_type=_weighted(rng, [
+                    ("full-time", 60), ("part-time", 8), ("contract", 12), ("remote", 15), ("internship", 5),
+                ]),
+                experience_level=level,
+                salary_min=salary_min,
+                salary_max=salary_min + rng.randrange(10000, 60000, 5000),
+                is_active=rng.random() < 0.85,
+                posted_by_id=poster.user_id,
+                created_at=self.ago(365),
+            ))
+        self.create(Job, jobs)
+
+        searches = []
+        for recruiter in recruiters:
+            names = set()
+            for _ in range(rng.choice([0, 1, 1, 2, 3])):
+                skills = rng.sample(SKILLS, rng.choice([1, 1, 2]))
+                location = rng.choice(CITIES)[0].split(",")[0] if rng.random() < 0.5 else ""
+                name = " / ".join(skills) + (f" in {location}" if location else "")
+                if name in names:
+                    continue
+                names.add(name)
+                searches.append(SavedSearch(
+                    name=name,
+                    recruiter_id=recruiter.user_id,
+                    skills_query=", ".join(skills),
+                    location=location,
+                    experience_years=str(rng.randint(1, 8)) if rng.random() < 0.3 else "",
+                    education_level="Bachelor" if rng.random() < 0.2 else "",
+                    is_active=rng.random() < 0.8,
+                    created_at=self.ago(365),
+                ))
+        self.create(SavedSearch, searches)
+        self.create(SavedSearchTerm, [
+            SavedSearchTerm(term=term, search=saved_search)
+            for saved_search in searches
+            for term in sorted(search_terms(saved_search))
+        ])
+        return [job for job in jobs if job.is_active]
+
+    def add_sections(self, profiles):
+        rng = self.rng
+        skills, terms, educations, experiences, links = [], [], [], [], []
+        for profile in profiles:
+            names = rng.sample(SKILLS, rng.randint(2, 8))
+            skills += [Skill(profile=profile, name=name) for name in names]
+            profile_terms = set()
+            for name in names:
+                profile_terms |= skill_terms(name)
+            terms += [SkillTerm(profile=profile, term=term) for term in sorted(profile_terms)]
+
+            graduated = profile.user.date_joined.year - rng.randint(0, 12)
+            for _ in range(rng.choice([1, 1, 1, 2])):
+                degree, field = rng.choice(DEGREES)
+                educations.append(Education(
+                    profile=profile,
+                    school=rng.choice(SCHOOLS),
+                    degree=degree,
+                    field_of_study=field,
+                    start_year=datetime.date(graduated - 4, 8, 15),
+                    end_year=datetime.date(graduated, 5, 15),
+                ))
+                graduated -= rng.randint(2, 6)
+
+            start = datetime.date(graduated + 4, 6, 1)
+            for number in range(rng.choice([0, 1, 2, 2, 3, 4])):
+                title, _ = rng.choice(JOB_TITLES)
+                end = start + datetime.timedelta(days=rng.randint(180, 1800))
+                is_current = end >= self.until.date()
+                experiences.append(Experience(
+                    profile=profile,
+                    company=f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}",
+                    title=title,
+                    is_current=is_current,
+                    description=f"Worked on {rng.choice(SKILLS)} and {rng.choice(SKILLS)} projects.",
+                    start_year=start,
+                    end_year=None if is_current else end,
+                ))
+                if is_current:
+                    break
+                start = end + datetime.timedelta(days=rng.randint(0, 90))
+
+            if rng.random() < 0.5:
+                links.append(Link(
+                    profile=profile,
+                    url=f"https://github.com/{profile.user.username}",
+                    label="GitHub",
+                ))
+        self.create(Skill, skills)
+        self.create(SkillTerm, terms)
+        self.create(Education, educations)
+        self.create(Experience, experiences)
+        self.create(Link, links)
+
+    def stage_changes(self, applied_at):
+        """``[(status, changed_at)]`` an application went through after applying."""
+        rng = self.rng
+        final = _weighted(rng, FINAL_STAGES)
+        if final == Status.REJECTED:
+            path = funnel.FUNNEL_STAGES[: rng.randint(1, 3)] + [Status.REJECTED]
+        else:
+            path = funnel.FUNNEL_STAGES[: funnel.FUNNEL_STAGES.index(final) + 1]
+        changes = []
+        changed_at = applied_at
+        for status in path[1:]:
+            changed_at += datetime.timedelta(hours=rng.expovariate(1 / 72))
+            if changed_at > self.until:
+                break
+            changes.append((status, changed_at))
+        return changes
+
+    def add_applications(self, profiles, jobs):
+        """Applications with their event logs; returns ``[(profile, job, applied_at)]``."""
+        rng = self.rng
+        applications, histories, applied = [], [], []
+        for profile in profiles:
+            count = min(_weighted(rng, APPLICATIONS_PER_SEEKER), len(jobs))
+            for job in rng.sample(jobs, count):
+                applied_at = self.moment(max(job.created_at, profile.user.date_joined), 60)
+                changes = self.stage_changes(applied_at)
+                status, changed_at = changes[-1] if changes else (Status.NEW, applied_at)
+                applications.append(JobApplication(
+                    job=job,
+                    applicant_id=profile.user_id,
+                    note=f"I'd love to bring my {rng.choice(SKILLS)} experience to {job.company.name}.",
+                    status=status,
+                    applied_at=applied_at,
+                    status_changed_at=changed_at,
+                    version=len(changes),
+                ))
+                histories.append(changes)
+                applied.append((profile, job, applied_at))
+        self.create(JobApplication, applications)
+
+        events = []
+        for application, changes in zip(applications, histories):
+            events.append(ApplicationEvent(
+                application=application,
+                job_id=application.job_id,
+                to_status=Status.NEW,
+                changed_at=application.applied_at,
+            ))
+            previous, entered_at = Status.NEW, application.applied_at
+            for status, changed_at in changes:
+                events.append(ApplicationEvent(
+                    application=application,
+                    job_id=application.job_id,
+                    from_status=previous,
+                    to_status=status,
+                    changed_by_id=application.job.posted_by_id,
+                    changed_at=changed_at,
+                    time_in_stage=changed_at - entered_at,
+                ))
+                previous, entered_at = status, changed_at
+        self.create(ApplicationEvent, events)
+        return applied
+
+    def add_threads(self, applied):
+        """Message threads between some applicants and the recruiters of their jobs."""
+        rng = self.rng
+        threads = {}
+        for profile, job, applied_at in applied:
+            pair = (profile.user_id, job.posted_by_id)
+            if pair not in threads and rng.random() < MESSAGING_SHARE:
+                threads[pair] = (job, applied_at)
+
+        messages, thread_messages = [], []
+        for (seeker_id, recruiter_id), (job, applied_at) in threads.items():
+            sent_at = self.moment(applied_at, 14)
+            sender, receiver = recruiter_id, seeker_id
+            count = rng.randint(1, 6)
+            thread = []
+            for number in range(count):
+                unread = number >= count - 2 and rng.random() < 0.5
+                thread.append(Message(
+                    sender_id=sender,
+                    receiver_id=receiver,
+                    subject=f"{'Re: ' if number else ''}{job.title} at {job.company.name}",
+                    content=rng.choice([
+                        "Thanks for applying! Do you have time for a quick call this week?",
+                        "Happy to chat. I'm free most afternoons.",
+                        "Could you tell me more about your recent projects?",
+                        "Sure, I've attached a few examples to my profile.",
+                        "Great, I'll share this with the hiring team and follow up soon.",
+                        "Thank you for the update!",
+                    ]),
+                    timestamp=sent_at,
+                    is_read=not unread,
+                ))
+                sender, receiver = receiver, sender
+                sent_at = self.moment(sent_at, 3)
+            messages += thread
+            thread_messages.append((seeker_id, recruiter_id, thread))
+        with explicit_timestamps(Message, "timestamp"):
+            self.create(Message, messages)
+
+        conversations = []
+        for seeker_id, recruiter_id, thread in thread_messages:
+            last = thread[-1]
+            for owner_id, partner_id in [(seeker_id, recruiter_id), (recruiter_id, seeker_id)]:
+                unread = sum(1 for message in thread if message.receiver_id == owner_id and not message.is_read)
+                self.unread[owner_id] += unread
+                conversations.append(Conversation(
+                    owner_id=owner_id,
+                    partner_id=partner_id,
+                    last_message=last,
+                    last_message_at=last.timestamp,
+                    unread_count=unread,
+                ))
+        self.create(Conversation, conversations)
+
+    def add_job_seekers(self, count, jobs):
+        for start in range(0, count, self.batch_size):
+            with transaction.atomic(using=self.using):
+                profiles = self.create_users(
+                    min(self.batch_size, count - start), Profile.Role.JOB_SEEKER, 730
+                )
+                self.add_sections(profiles)
+                applied = self.add_applications(profiles, jobs)
+                self.add_threads(applied)
+            self.log(f"Job seekers: {start + len(profiles)} of {count}")
+
+    def finish(self):
+        """Unread counters and the indexes rebuilt from whole tables."""
+        self.create(UnreadCounter, [
+            UnreadCounter(user_id=user_id, count=count) for user_id, count in self.unread.items() if count
+        ])
+        funnel.rebuild_rollups(using=self.using)
+        self.log("Rebuilt the hiring-funnel rollups")
+        candidates.rebuild_documents(using=self.using, batch_size=self.batch_size)
+        self.log("Rebuilt the candidate search documents")
+        search.rebuild_index(using=self.using, batch_size=self.batch_size)
+        recommendations.rebuild_job_terms(using=self.using, batch_size=self.batch_size)
+        self.log("Rebuilt the job search indexes")
+        caching.bump_version(caching.JOB_MAP)
+        caching.bump_version(caching.FEATURED_JOBS)
+
+
+def generate(users=1000, jobs=None, seed=0, until=None, batch_size=1000, password="password",
+             using="default", log=None):
+    """
+    Create ``users`` users (one in twenty a recruiter, the rest job seekers)
+    and ``jobs`` jobs (default: one per ten users), with timestamps up to
+    ``until``. Returns ``(rows created per model, seconds taken)``.
+    """
+    started = time.monotonic()
+    generator = Generator(seed, until, batch_size, password, using, log)
+    recruiter_count = max(1, users // 20)
+    active_jobs = generator.create_recruiters(
+        recruiter_count, jobs if jobs is not None else max(1, users // 10)
+    )
+    generator.log(f"Recruiters: {recruiter_count}, jobs: {generator.counts['Job']}")
+    generator.add_job_seekers(max(0, users - recruiter_count), active_jobs)
+    generator.finish()
+    return generator.counts, time.monotonic() - started
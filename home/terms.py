@@ -0,0 +1,52 @@
+"""
+Normalized terms for matching skills against free text.
+
+Job descriptions are indexed as single words and adjacent word pairs, so a
+skill like "Machine Learning" or "C++" can be looked up as one exact term
+instead of a LIKE '%...%' scan.
+"""
+import re
+
+# Keeps things like "c++", "c#", "node.js" and "asp.net" in one piece
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+MAX_TERM_LENGTH = 100
+
+STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being both but by
+    can could did do does doing for from had has have having he her here his how
+    i if in into is it its just me more most my no nor not of off on once only or
+    other our out over own same she should so some such than that the their them
+    then there these they this those through to too under until up very was we
+    were what when where which while who whom why will with would you your
+""".split())
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def text_terms(text):
+    """All unigram and bigram terms of ``text``, skipping stopwords."""
+    tokens = tokenize(text)
+    terms = set()
+    for i, token in enumerate(tokens):
+        if token in STOPWORDS:
+            continue
+        terms.add(token)
+        if i + 1 < len(tokens) and tokens[i + 1] not in STOPWORDS:
+            terms.add(f"{token} {tokens[i + 1]}")
+    return {term for term in terms if len(term) <= MAX_TERM_LENGTH}
+
+
+def skill_terms(name):
+    """
+    Index terms for a skill name. One or two words map to a single term;
+    longer names are split into their word pairs.
+    """
+    tokens = [token for token in tokenize(name) if token not in STOPWORDS]
+    if len(tokens) <= 2:
+        terms = {" ".join(tokens)} if tokens else set()
+    else:
+        terms = {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+    return {term for term in terms if len(term) <= MAX_TERM_LENGTH}
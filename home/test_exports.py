@@ -0,0 +1,160 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import exports
+from .models import Company, ExportJob
+
+
+class ExportTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="password")
+        Company.objects.create(owner=cls.admin, name="Acme, Inc.", description="Anvils", location="Phoenix")
+        Company.objects.create(name="Initech", description="TPS reports", location="Austin")
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def queue(self, model_key="Companies", export_format="csv"):
+        return ExportJob.objects.create(requested_by=self.admin, model_key=model_key, export_format=export_format)
+
+    def read_export(self, job):
+        with gzip.open(job.file.path, "rt", encoding="utf-8", newline="") as f:
+            return f.read()
+
+
+    def assertCompanyRows(self, rows):
+        self.assertEqual(
+            [(row["owner"], row["name"], row["location"]) for row in rows],
+            [("admin", "Acme, Inc.", "Phoenix"), ("", "Initech", "Austin")],
+        )
+
+
+class StreamingExportTests(ExportTestCase):
+    def export(self, export_format):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin_export_data"), {"model_to_export": "Companies", "export_format": export_format}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment; filename=company_export_", response["Content-Disposition"])
+        return response
+
+    def test_csv_has_a_header_and_every_row(self):
+        response = self.export("csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        body = b"".join(response.streaming_content).decode()
+        reader = csv.reader(io.StringIO(body))
+        headers = next(reader)
+        self.assertEqual(headers[:4], ["id", "owner_id", "owner", "name"])
+        self.assertCompanyRows([dict(zip(headers, row)) for row in reader])
+
+    def test_jsonl_has_one_object_per_row(self):
+        response = self.export("jsonl")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertCompanyRows([{**row, "owner": row["owner"] or ""} for row in rows])
+
+    def test_lines_are_sent_in_blocks(self):
+        lines = exports.export_lines(Company, "csv")
+        self.assertEqual(len(list(exports.chunked(lines, chunk_size=2))), 2)
+
+    async def test_asgi_streams_asynchronously(self):
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.post(
+            reverse("admin_export_data"), {"model_to_export": "Companies", "export_format": "csv"}
+        )
+        self.assertTrue(response.is_async)
+        body = "".join([block.decode() async for block in response.streaming_content])
+        reader = csv.DictReader(io.StringIO(body))
+        self.assertCompanyRows(list(reader))
+
+
+class BackgroundExportTests(ExportTestCase):
+    def test_worker_runs_a_queued_job_to_done(self):
+        job = self.queue()
+        claimed = exports.claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, ExportJob.Status.RUNNING)
+        self.assertIsNotNone(claimed.heartbeat_at)
+        self.assertIsNone(exports.claim_next_job())
+
+        exports.run_export_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.DONE)
+        self.assertEqual((job.total_rows, job.rows_written), (2, 2))
+        self.assertTrue(job.is_downloadable)
+        self.assertCompanyRows(list(csv.DictReader(io.StringIO(self.read_export(job)))))
+
+    def test_unknown_model_fails_the_job(self):
+        self.queue(model_key="Nothing")
+        job = exports.claim_next_job()
+        with self.assertRaises(ValueError):
+            exports.run_export_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.FAILED)
+        self.assertIn("Nothing", job.error)
+
+    @override_settings(EXPORT_TIMEOUT_MINUTES=10)
+    def test_long_exports_that_report_progress_keep_running(self):
+        self.queue()
+        job = exports.claim_next_job()
+        now = timezone.now()
+        ExportJob.objects.filter(pk=job.pk).update(
+            started_at=now - datetime.timedelta(hours=3), heartbeat_at=now - datetime.timedelta(minutes=1)
+        )
+        self.assertEqual(exports.fail_stalled_jobs(), 0)
+
+        ExportJob.objects.filter(pk=job.pk).update(heartbeat_at=now - datetime.timedelta(minutes=11))
+        self.assertEqual(exports.fail_stalled_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.FAILED)
+
+    def test_stalled_jobs_stay_failed(self):
+        self.queue()
+        job = exports.claim_next_job()
+        ExportJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - datetime.timedelta(days=1))
+        exports.fail_stalled_jobs()
+
+        # The worker was only slow, and finishes after all
+        with self.assertRaises(exports.ExportAbandoned):
+            exports.run_export_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.FAILED)
+        self.assertFalse(job.file)
+        self.assertEqual(
+            [name for _, _, files in os.walk(settings.MEDIA_ROOT) for name in files], []
+        )
+
+    def test_jobs_failed_mid_export_are_not_marked_done(self):
+        self.queue()
+        job = exports.claim_next_job()
+
+        def lines(model, export_format):
+            yield "id,name\r\n"
+            exports.fail_stalled_jobs()
+            yield "1,Acme\r\n"
+
+        with override_settings(EXPORT_TIMEOUT_MINUTES=-1), mock.patch.object(exports, "export_lines", lines):
+            with self.assertRaises(exports.ExportAbandoned):
+                exports.run_export_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.FAILED)
+        self.assertFalse(job.file)
@@ -0,0 +1,171 @@
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from . import caching, geo, views
+from .models import Company, Job
+
+DENVER = (39.7392, -104.9903)
+BOSTON = (42.3601, -71.0589)
+
+
+class DistanceTests(unittest.TestCase):
+    def test_haversine_measures_miles(self):
+        self.assertAlmostEqual(geo.haversine(*DENVER, *BOSTON), 1766, delta=3)
+        self.assertEqual(geo.haversine(*DENVER, *DENVER), 0)
+
+    def test_bounding_box_encloses_the_circle(self):
+        min_lat, max_lat, min_lon, max_lon = geo.bounding_box(*DENVER, 50)
+        lat, lon = DENVER
+        for edge in [(min_lat, lon), (max_lat, lon), (lat, min_lon), (lat, max_lon)]:
+            self.assertGreaterEqual(geo.haversine(*DENVER, *edge), 49.9)
+
+    def test_bounding_box_widens_instead_of_wrapping(self):
+        self.assertEqual(geo.bounding_box(89.5, 10, 100)[2:], (-180.0, 180.0))
+        self.assertEqual(geo.bounding_box(0, 179.9, 100)[2:], (-180.0, 180.0))
+
+
+class MapTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        cls.company = Company.objects.create(name="Initech", location="Denver")
+        cls.denver = cls.create_job("Denver", *DENVER)
+        cls.boulder = cls.create_job("Boulder", 40.0150, -105.2705)
+        cls.springs = cls.create_job("Colorado Springs", 38.8339, -104.8214)
+        cls.boston = cls.create_job("Boston", *BOSTON)
+        cls.create_job("Remote", None, None)
+
+    @classmethod
+    def create_job(cls, title, latitude, longitude, **kwargs):
+        return Job.objects.create(
+            title=title, company=cls.company, description="", requirements="", location=title,
+            latitude=latitude, longitude=longitude, posted_by=cls.recruiter, **kwargs,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_map(self, **params):
+        return self.client.get(reverse("jobs_for_map_api"), params)
+
+
+class WithinDistanceTests(MapTestCase):
+    def test_nearest_first_within_the_radius(self):
+        jobs = geo.within_distance(Job.objects.all(), *DENVER, 80)
+        self.assertEqual([job.title for job in jobs], ["Denver", "Boulder", "Colorado Springs"])
+        for job in jobs:
+            self.assertAlmostEqual(job.distance, geo.haversine(*DENVER, job.latitude, job.longitude), places=6)
+
+    def test_corners_of_the_box_are_outside_the_radius(self):
+        # Inside the 30 mile box around Denver, but 34 miles away
+        self.create_job("Corner", DENVER[0] + 0.35, DENVER[1] - 0.45)
+        jobs = geo.within_distance(Job.objects.all(), *DENVER, 30)
+        self.assertEqual([job.title for job in jobs], ["Denver", "Boulder"])
+
+    def test_map_api_filters_by_distance(self):
+        response = self.get_map(lat=DENVER[0], lon=DENVER[1], distance=30)
+        self.assertEqual([job["title"] for job in response.json()], ["Denver", "Boulder"])
+
+    def test_invalid_distance_filters_are_ignored(self):
+        response = self.get_map(lat="north", lon=DENVER[1], distance=30)
+        self.assertEqual(len(response.json()), 4)
+
+
+class ClusterTests(MapTestCase):
+    def clusters(self, bbox=(-180, -90, 180, 90), zoom=2):
+        return geo.cluster_jobs(Job.objects.filter(is_active=True, latitude__isnull=False), bbox, zoom)
+
+    def test_parse_bbox_clamps_and_rejects(self):
+        self.assertEqual(geo.parse_bbox("-200,-95,-84,34"), (-180.0, -90.0, -84.0, 34.0))
+        for value in ["-84,34", "west,south,east,north", "-84,34,-85,35", None]:
+            self.assertIsNone(geo.parse_bbox(value))
+
+    def test_tiles_cover_the_bbox(self):
+        self.assertEqual(len(list(geo.tiles_for_bbox((-170, -80, 170, 80), 2))), 8)
+        self.assertEqual(list(geo.tiles_for_bbox((-105.5, 39.5, -104.5, 40.2), 4)), [(3, 5)])
+
+    def test_nearby_jobs_share_a_cluster(self):
+        clusters = sorted(self.clusters(), key=lambda cluster: cluster["count"])
+        self.assertEqual([cluster["count"] for cluster in clusters], [1, 3])
+        self.assertAlmostEqual(clusters[1]["lat"], (DENVER[0] + 40.0150 + 38.8339) / 3)
+
+        # Zoomed in, Colorado Springs gets a cell of its own
+        counts = [cluster["count"] for cluster in self.clusters((-106, 38, -104, 41), zoom=6)]
+        self.assertEqual(sorted(counts), [1, 2])
+
+    def test_tiles_are_cached_until_a_pin_moves(self):
+        self.clusters()
+        with self.assertNumQueries(0):
+            self.clusters()
+
+        # Fields the map doesn't show keep the cache
+        with self.captureOnCommitCallbacks(execute=True):
+            self.boston.description = "Now hiring"
+            self.boston.save()
+        with self.assertNumQueries(0):
+            self.clusters()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.boston.latitude, self.boston.longitude = DENVER
+            self.boston.save()
+        self.assertEqual([cluster["count"] for cluster in self.clusters()], [4])
+
+    def test_deleted_jobs_leave_the_clusters(self):
+        self.clusters()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.boston.delete()
+        self.assertEqual([cluster["count"] for cluster in self.clusters()], [3])
+
+
+class MapViewportTests(MapTestCase):
+    def get_viewport(self, zoom, bbox="-106,38,-104,41", **headers):
+        return self.client.get(reverse("jobs_for_map_api"), {"bbox": bbox, "zoom": zoom}, headers=headers)
+
+    def test_zoomed_out_viewports_get_clusters(self):
+        data = self.get_viewport(6).json()
+        self.assertEqual((data["count"], data["jobs"]), (3, []))
+        self.assertEqual(sum(cluster["count"] for cluster in data["clusters"]), 3)
+
+    def test_zoomed_in_viewports_get_markers(self):
+        data = self.get_viewport(geo.MARKER_ZOOM).json()
+        self.assertEqual(data["clusters"], [])
+        self.assertEqual({job["title"] for job in data["jobs"]}, {"Denver", "Boulder", "Colorado Springs"})
+        self.assertFalse(data["truncated"])
+
+        with mock.patch.object(views, "MAX_MARKERS", 2):
+            data = self.get_viewport(geo.MARKER_ZOOM).json()
+        self.assertEqual((data["count"], len(data["jobs"]), data["truncated"]), (2, 2, True))
+
+    def test_invalid_zoom_is_rejected(self):
+        self.assertEqual(self.get_viewport("far").status_code, 400)
+
+    def test_unchanged_viewports_are_not_modified(self):
+        response = self.get_viewport(6)
+        etag = response["ETag"]
+        self.assertEqual(etag, f'W/"{caching.JOB_MAP}-{caching.get_version(caching.JOB_MAP)}"')
+
+        with self.assertNumQueries(0):
+            response = self.get_viewport(6, if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.springs.is_active = False
+            self.springs.save()
+        response = self.get_viewport(6, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["count"], 2)
+
+    def test_distance_filtered_viewports_are_not_cached(self):
+        response = self.client.get(
+            reverse("jobs_for_map_api"),
+            {"bbox": "-106,38,-104,41", "zoom": 6, "lat": DENVER[0], "lon": DENVER[1], "distance": 30},
+        )
+        self.assertNotIn("ETag", response)
+        self.assertEqual(response.json()["count"], 2)
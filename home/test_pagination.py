@@ -0,0 +1,100 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Company, Job
+from .pagination import InvalidCursor, KeysetPaginator
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        recruiter = User.objects.create_user("recruiter", password="password")
+        company = Company.objects.create(name="Initech", location="Austin")
+        posted = timezone.now().replace(microsecond=123456)
+        # Pairs of jobs share a timestamp, so the id has to break the ties
+        cls.jobs = [
+            Job.objects.create(
+                title=f"Job {number}", company=company, description="", requirements="", location="Austin",
+                posted_by=recruiter, created_at=posted - datetime.timedelta(microseconds=number // 2),
+            )
+            for number in range(12)
+        ]
+        cls.newest_first = sorted(cls.jobs, key=lambda job: (job.created_at, job.id), reverse=True)
+
+    def paginator(self, per_page=5, **kwargs):
+        return KeysetPaginator(Job.objects.order_by("-created_at", "-id"), per_page, **kwargs)
+
+    def test_pages_forward_through_every_row_once(self):
+        paginator = self.paginator()
+        seen, cursor, pages = [], None, []
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append((page.start_index, page.end_index, page.has_previous))
+            seen.extend(page)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.newest_first)
+        self.assertEqual(pages, [(1, 5, False), (6, 10, True), (11, 12, True)])
+
+    def test_previous_cursor_returns_the_earlier_page(self):
+        paginator = self.paginator()
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        third = paginator.get_page(second.next_cursor)
+
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertEqual((back.start_index, back.has_next, back.has_previous), (6, True, True))
+        back = paginator.get_page(back.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous)
+        self.assertIsNone(back.previous_cursor)
+
+    def test_cursors_keep_microseconds(self):
+        paginator = self.paginator(per_page=1)
+        page = paginator.get_page()
+        values, direction, offset = paginator.decode_cursor(page.next_cursor)
+        self.assertEqual(values, [self.newest_first[0].created_at, self.newest_first[0].id])
+        self.assertEqual((direction, offset), ("next", 1))
+
+    def test_tampered_cursors_give_the_first_page(self):
+        paginator = self.paginator()
+        cursor = paginator.get_page().next_cursor
+        with self.assertRaises(InvalidCursor):
+            paginator.decode_cursor(cursor + "x")
+        self.assertEqual(list(paginator.get_page(cursor + "x")), self.newest_first[:5])
+
+    def test_cursors_only_fit_their_ordering(self):
+        cursor = self.paginator().get_page().next_cursor
+        with self.assertRaises(InvalidCursor):
+            KeysetPaginator(Job.objects.order_by("-id"), 3).decode_cursor(cursor)
+
+    def test_ordering_is_required(self):
+        with self.assertRaises(ValueError):
+            KeysetPaginator(Job.objects.order_by(), 3)
+
+    def test_querystrings_keep_filters_and_drop_page_numbers(self):
+        params = QueryDict("search=python&page=4")
+        page = self.paginator().get_page(params=params)
+        self.assertEqual(
+            QueryDict(page.next_querystring), QueryDict(f"search=python&cursor={page.next_cursor}")
+        )
+
+    def test_estimate_is_capped(self):
+        page = self.paginator(estimate_limit=10).get_page()
+        self.assertEqual((page.estimated_count, page.estimate_is_lower_bound), (10, True))
+        page = self.paginator(estimate_limit=20).get_page()
+        self.assertEqual((page.estimated_count, page.estimate_is_lower_bound), (12, False))
+
+    def test_job_list_links_to_the_next_page(self):
+        first = self.client.get(reverse("job_list"))
+        cursor = first.context["jobs"].next_cursor
+        second = self.client.get(reverse("job_list"), {"cursor": cursor})
+        self.assertEqual(list(first.context["jobs"]) + list(second.context["jobs"]), self.newest_first)
+        self.assertFalse(second.context["jobs"].has_next)
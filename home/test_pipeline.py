@@ -0,0 +1,114 @@
+import datetime
+import re
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import pipeline
+from .models import Company, Job, JobApplication
+
+Status = JobApplication.ApplicationStatus
+
+
+@mock.patch.object(pipeline, "PIPELINE_PAGE_SIZE", 2)
+class PipelineBoardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        cls.recruiter.profile.role = "RECRUITER"
+        cls.recruiter.profile.save()
+        company = Company.objects.create(name="Initech", location="Denver")
+        cls.job = Job.objects.create(
+            title="Engineer", company=company, description="", requirements="", location="Denver",
+            posted_by=cls.recruiter,
+        )
+        other_job = Job.objects.create(
+            title="Designer", company=company, description="", requirements="", location="Denver",
+            posted_by=cls.recruiter,
+        )
+        applied = timezone.now()
+        statuses = [Status.NEW] * 5 + [Status.INTERVIEW] * 2 + [Status.HIRED]
+        cls.applications = []
+        for number, status in enumerate(statuses):
+            applicant = User.objects.create_user(f"applicant{number}", password="password")
+            applicant.profile.name = f"Applicant {number}" if number % 2 else ""
+            # Every other applicant is in Denver, and one in Boston
+            if number % 2 == 0:
+                applicant.profile.latitude, applicant.profile.longitude = 39.74, -104.99
+            elif number == 1:
+                applicant.profile.latitude, applicant.profile.longitude = 42.36, -71.06
+            applicant.profile.save()
+            cls.applications.append(JobApplication.objects.create(
+                job=cls.job, applicant=applicant, status=status,
+                applied_at=applied - datetime.timedelta(minutes=number // 2),
+            ))
+        # Not one of the board's stages; shown under New
+        JobApplication.objects.filter(pk=cls.applications[4].pk).update(status="WITHDRAWN")
+        JobApplication.objects.create(job=other_job, applicant=cls.applications[0].applicant)
+
+    def setUp(self):
+        self.client.force_login(self.recruiter)
+
+    def column(self, status):
+        """The job's cards of one column, newest first (the withdrawn one is still New in memory)."""
+        in_column = [application for application in self.applications if application.status == status]
+        return sorted(in_column, key=lambda application: (application.applied_at, application.id), reverse=True)
+
+    def test_stage_counts_come_from_one_query(self):
+        with self.assertNumQueries(1):
+            counts = pipeline.stage_counts(self.job)
+        self.assertEqual(counts, {**dict.fromkeys(Status.values, 0), Status.NEW: 5, Status.INTERVIEW: 2, Status.HIRED: 1})
+
+    def test_columns_start_with_their_newest_cards(self):
+        response = self.client.get(reverse("applicant_pipeline", args=[self.job.id]))
+        stages = {stage["key"]: stage for stage in response.context["pipeline_stages"]}
+        self.assertEqual(stages[Status.NEW]["applications"], self.column(Status.NEW)[:2])
+        self.assertEqual(stages[Status.NEW]["count"], 5)
+        self.assertIsNotNone(stages[Status.NEW]["cursor"])
+        self.assertEqual(stages[Status.HIRED]["applications"], self.column(Status.HIRED))
+        self.assertIsNone(stages[Status.HIRED]["cursor"])
+        self.assertEqual((stages[Status.OFFER]["applications"], stages[Status.OFFER]["count"]), ([], 0))
+
+    def test_more_cards_load_with_the_cursor(self):
+        url = reverse("pipeline_stage_cards", args=[self.job.id])
+        response = self.client.get(reverse("applicant_pipeline", args=[self.job.id]))
+        stage = next(stage for stage in response.context["pipeline_stages"] if stage["key"] == Status.NEW)
+        loaded, cursor = [application.id for application in stage["applications"]], stage["cursor"]
+        while cursor:
+            data = self.client.get(url, {"status": Status.NEW, "cursor": cursor}).json()
+            loaded += [int(pk) for pk in re.findall(r'data-application-id="(\d+)"', data["html"])]
+            cursor = data["cursor"]
+        self.assertEqual(loaded, [application.id for application in self.column(Status.NEW)])
+
+    def test_stage_cards_check_the_status_and_the_job(self):
+        url = reverse("pipeline_stage_cards", args=[self.job.id])
+        self.assertEqual(self.client.get(url, {"status": "WITHDRAWN"}).status_code, 400)
+
+        other = User.objects.create_user("other", password="password")
+        other.profile.role = "RECRUITER"
+        other.profile.save()
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url, {"status": Status.NEW}).status_code, 403)
+
+    def test_applicant_locations_are_limited_to_the_viewport(self):
+        pins, truncated = pipeline.applicant_locations(self.job)
+        self.assertEqual(len(pins), 5)
+        self.assertFalse(truncated)
+
+        pins, truncated = pipeline.applicant_locations(self.job, (-106, 39, -104, 40))
+        self.assertEqual(
+            [pin["name"] for pin in pins], ["applicant0", "applicant2", "applicant4", "applicant6"]
+        )
+        self.assertEqual(pins[0]["profile_url"], reverse("accounts.profile_view", args=["applicant0"]))
+
+        pins, truncated = pipeline.applicant_locations(self.job, limit=2)
+        self.assertEqual((len(pins), truncated), (2, True))
+
+    def test_location_endpoint_rejects_invalid_viewports(self):
+        url = reverse("pipeline_applicant_locations", args=[self.job.id])
+        self.assertEqual(self.client.get(url, {"bbox": "-106,39"}).status_code, 400)
+        data = self.client.get(url, {"bbox": "-72,42,-71,43"}).json()
+        self.assertEqual(([pin["name"] for pin in data["applicants"]], data["truncated"]), (["Applicant 1"], False))
@@ -0,0 +1,174 @@
+import math
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import Profile, Skill, SkillTerm
+
+from . import recommendations, terms
+from .models import Company, Job, JobApplication, JobTerm
+
+
+class TermTests(unittest.TestCase):
+    def test_text_terms_are_words_and_word_pairs(self):
+        self.assertEqual(
+            terms.text_terms("Machine learning with C++ and Node.js"),
+            {"machine", "learning", "machine learning", "c++", "node.js"},
+        )
+
+    def test_short_skills_are_one_term(self):
+        self.assertEqual(terms.skill_terms("Machine Learning"), {"machine learning"})
+        self.assertEqual(terms.skill_terms("C#"), {"c#"})
+        self.assertEqual(terms.skill_terms("The"), set())
+
+    def test_long_skills_are_their_word_pairs(self):
+        self.assertEqual(terms.skill_terms("Amazon Web Services"), {"amazon web", "web services"})
+
+    def test_terms_fit_the_index_column(self):
+        self.assertEqual(terms.text_terms("x" * (terms.MAX_TERM_LENGTH + 1)), set())
+
+
+class RecommendationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        cls.company = Company.objects.create(name="Initech", location="Denver")
+
+    @classmethod
+    def create_job(cls, title, description="", requirements="", **kwargs):
+        return Job.objects.create(
+            title=title, company=cls.company, description=description, requirements=requirements,
+            location="Denver", posted_by=cls.recruiter, **kwargs,
+        )
+
+    @classmethod
+    def create_seeker(cls, username, *skills):
+        seeker = User.objects.create_user(username, password="password")
+        for name in skills:
+            Skill.objects.create(profile=seeker.profile, name=name)
+        return seeker
+
+
+class JobTermIndexTests(RecommendationTestCase):
+    def indexed(self, job):
+        return set(JobTerm.objects.filter(job=job).values_list("term", flat=True))
+
+    def test_jobs_are_indexed_by_their_text(self):
+        job = self.create_job("Data Engineer", "Spark pipelines", "Machine learning")
+        self.assertLessEqual(
+            {"data engineer", "spark", "spark pipelines", "machine learning"}, self.indexed(job)
+        )
+
+        job.requirements = "Kubernetes"
+        job.save()
+        self.assertIn("kubernetes", self.indexed(job))
+        self.assertNotIn("machine learning", self.indexed(job))
+
+    def test_only_active_jobs_are_indexed(self):
+        job = self.create_job("Data Engineer", is_active=False)
+        self.assertEqual(self.indexed(job), set())
+        job.is_active = True
+        job.save()
+        self.assertIn("data engineer", self.indexed(job))
+        job.is_active = False
+        job.save()
+        self.assertEqual(self.indexed(job), set())
+
+    def test_rebuild_matches_the_signals(self):
+        self.create_job("Data Engineer", "Spark")
+        self.create_job("Designer", is_active=False)
+        expected = set(JobTerm.objects.values_list("term", "job_id"))
+        JobTerm.objects.all().delete()
+
+        self.assertEqual(recommendations.rebuild_job_terms(batch_size=1), 1)
+        self.assertEqual(set(JobTerm.objects.values_list("term", "job_id")), expected)
+
+
+class RecommendJobsTests(RecommendationTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Everyone asks for communication; only one job needs Kubernetes
+        cls.kubernetes = cls.create_job("Platform Engineer", requirements="Kubernetes")
+        cls.both = cls.create_job("Site Reliability Engineer", requirements="Kubernetes, communication")
+        cls.communication = [
+            cls.create_job(f"Account Manager {number}", requirements="Communication") for number in range(3)
+        ]
+        cls.create_job("Closed Kubernetes Role", is_active=False)
+        cls.seeker = cls.create_seeker("seeker", "Kubernetes", "Communication")
+
+    def test_rare_terms_weigh_more(self):
+        weights = recommendations.term_weights({"kubernetes", "communication", "cobol"})
+        self.assertEqual(weights, {"kubernetes": math.log(1 + 5 / 2), "communication": math.log(1 + 5 / 4)})
+
+    def test_jobs_are_ranked_by_the_weight_of_matched_skills(self):
+        jobs = recommendations.recommend_jobs(self.seeker, ["Kubernetes", "Communication"])
+        self.assertEqual(jobs[:2], [self.both, self.kubernetes])
+        self.assertEqual(jobs[2:], sorted(self.communication, key=lambda job: -job.id))
+        self.assertAlmostEqual(jobs[0].match_score, math.log(1 + 5 / 2) + math.log(1 + 5 / 4))
+
+    def test_limit_and_applications_narrow_the_list(self):
+        JobApplication.objects.create(job=self.both, applicant=self.seeker)
+        jobs = recommendations.recommend_jobs(self.seeker, ["Kubernetes", "Communication"], limit=2)
+        self.assertEqual(jobs, [self.kubernetes, self.communication[-1]])
+
+    def test_unknown_skills_recommend_nothing(self):
+        self.assertEqual(recommendations.recommend_jobs(self.seeker, ["COBOL"]), [])
+
+
+class RecommendCandidatesTests(RecommendationTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recruiter.profile.role = Profile.Role.RECRUITER
+        cls.recruiter.profile.save()
+        # Recruiters' skills don't make them candidates
+        Skill.objects.create(profile=cls.recruiter.profile, name="Kubernetes")
+        cls.job = cls.create_job("Platform Engineer", requirements="Kubernetes, Go and communication skills")
+        cls.alice = cls.create_seeker("alice", "Kubernetes", "Communication")
+        cls.bob = cls.create_seeker("bob", "Communication")
+        cls.carol = cls.create_seeker("carol", "Go")
+        cls.dave = cls.create_seeker("dave", "Communication", "Excel")
+
+    def ranked(self):
+        profiles = {profile.id: profile.user for profile in Profile.objects.select_related("user")}
+        return [profiles[profile_id] for profile_id, _ in recommendations.recommend_candidates(self.job)]
+
+    def test_profiles_are_indexed_by_their_skills(self):
+        terms = lambda user: set(SkillTerm.objects.filter(profile=user.profile).values_list("term", flat=True))
+        self.assertEqual(terms(self.dave), {"communication", "excel"})
+        Skill.objects.filter(profile=self.dave.profile, name="Excel").delete()
+        Skill.objects.create(profile=self.dave.profile, name="Amazon Web Services")
+        self.assertEqual(terms(self.dave), {"communication", "amazon web", "web services"})
+
+    def test_job_skills_are_the_terms_seekers_list(self):
+        self.assertEqual(
+            recommendations.extract_job_skills(self.job),
+            {"go": math.log(1 + 4 / 1), "kubernetes": math.log(1 + 4 / 1), "communication": math.log(1 + 4 / 3)},
+        )
+        with mock.patch.object(recommendations, "MAX_JOB_SKILL_TERMS", 2):
+            self.assertEqual(set(recommendations.extract_job_skills(self.job)), {"go", "kubernetes"})
+
+    def test_candidates_are_ranked_by_the_rarity_of_shared_skills(self):
+        self.assertEqual(self.ranked(), [self.alice, self.carol, self.dave, self.bob])
+
+    def test_applicants_are_left_out(self):
+        JobApplication.objects.create(job=self.job, applicant=self.alice)
+        self.assertEqual(self.ranked(), [self.carol, self.dave, self.bob])
+
+    def test_only_the_jobs_recruiter_sees_its_candidates(self):
+        url = reverse("candidate_recommendations", args=[self.job.id])
+        self.client.force_login(self.recruiter)
+        response = self.client.get(url)
+        self.assertEqual(
+            [profile.user for profile in response.context["candidates"]], [self.alice, self.carol, self.dave, self.bob]
+        )
+
+        other = User.objects.create_user("other", password="password")
+        other.profile.role = Profile.Role.RECRUITER
+        other.profile.save()
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 403)
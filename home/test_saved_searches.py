@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from . import candidates
+from .management.commands import check_saved_searches
+from .models import SavedSearch
+
+
+class InlineExecutor:
+    """Stands in for the process pool, running each map in this process."""
+
+    def __init__(self, log, **kwargs):
+        self.log = log
+
+    def map(self, fn, *iterables):
+        self.log.append("map")
+        return map(fn, *iterables)
+
+    def shutdown(self):
+        pass
+
+
+class CheckSavedSearchesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        for number, location in enumerate(["Boston", "Boston", "Denver"]):
+            seeker = User.objects.create_user(f"seeker{number}", password="password")
+            seeker.profile.location = location
+            seeker.profile.save()
+        candidates.rebuild_documents()
+        # Two searches share their criteria, so their counts share a query
+        cls.searches = [
+            SavedSearch.objects.create(name=name, recruiter=cls.recruiter, location=location)
+            for name, location in [
+                ("Boston", "Boston"), ("Boston again", "boston"), ("Denver", "Denver"), ("Nowhere", "Nowhere"),
+            ]
+        ]
+
+    def setUp(self):
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        self.checkpoint = os.path.join(checkpoint_dir, "checkpoint")
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command("check_saved_searches", "--checkpoint", self.checkpoint, *args, stdout=out)
+        return out.getvalue()
+
+    def notified(self):
+        return {
+            search.name
+            for search in SavedSearch.objects.all()
+            if search.last_notified is not None
+        }
+
+    def test_notifies_searches_with_new_matches(self):
+        updated_at = {search.id: search.updated_at for search in self.searches}
+        output = self.run_command("--batch-size", "2")
+        self.assertIn("Sent 5 notifications total", output)
+        self.assertEqual(self.notified(), {"Boston", "Boston again", "Denver"})
+        for search in SavedSearch.objects.exclude(last_notified=None):
+            self.assertEqual(search.updated_at, search.last_notified)
+            self.assertGreater(search.updated_at, updated_at[search.id])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        # Nothing new since
+        self.assertIn("Sent 0 notifications total", self.run_command())
+
+    def test_dry_run_changes_nothing(self):
+        output = self.run_command("--dry-run")
+        self.assertIn("Would send 5 notifications total", output)
+        self.assertEqual(self.notified(), set())
+
+    def test_resumes_after_the_checkpoint(self):
+        with open(self.checkpoint, "w") as f:
+            json.dump({"last_id": self.searches[1].id}, f)
+        output = self.run_command()
+        self.assertIn(f"Resuming after saved search #{self.searches[1].id}", output)
+        self.assertEqual(self.notified(), {"Denver"})
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_restart_ignores_the_checkpoint(self):
+        with open(self.checkpoint, "w") as f:
+            json.dump({"last_id": self.searches[-1].id}, f)
+        self.run_command("--restart")
+        self.assertEqual(self.notified(), {"Boston", "Boston again", "Denver"})
+
+    def test_interrupted_run_leaves_a_checkpoint(self):
+        calls = []
+        count_new_matches = check_saved_searches.count_new_matches
+
+        def fail_second_batch(group):
+            calls.append(group)
+            if group[0][1] == "denver":
+                raise KeyboardInterrupt
+            return count_new_matches(group)
+
+        with mock.patch.object(check_saved_searches, "count_new_matches", fail_second_batch):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_command("--batch-size", "2")
+        self.assertEqual(self.notified(), {"Boston", "Boston again"})
+        # The first batch's two searches shared one query
+        self.assertEqual(len(calls), 2)
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)["last_id"], self.searches[1].id)
+
+        self.run_command("--batch-size", "2")
+        self.assertEqual(self.notified(), {"Boston", "Boston again", "Denver"})
+
+    def test_workers_fork_without_an_open_connection(self):
+        log = []
+
+        def log_queries(execute, sql, params, many, context):
+            log.append("query")
+            return execute(sql, params, many, context)
+
+        with (
+            mock.patch.object(check_saved_searches, "ProcessPoolExecutor", lambda **kwargs: InlineExecutor(log)),
+            mock.patch.object(check_saved_searches.connections, "close_all", lambda: log.append("close")),
+            connection.execute_wrapper(log_queries),
+        ):
+            output = self.run_command("--workers", "2", "--batch-size", "2")
+        self.assertIn("Sent 5 notifications total", output)
+        # No query between closing the connection and the pool forking
+        first_map = log.index("map")
+        self.assertEqual(log[first_map - 1], "close")
+        self.assertEqual(log.count("close"), 1)
@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from . import search
+from .models import Company, Job
+
+
+class BuildMatchQueryTests(unittest.TestCase):
+    def test_every_word_becomes_a_quoted_prefix(self):
+        self.assertEqual(search.build_match_query("Pyth DEV"), '"pyth"* "dev"*')
+
+    def test_query_syntax_is_dropped(self):
+        self.assertEqual(search.build_match_query('"c++" OR (rust* -go)'), '"c"* "or"* "rust"* "go"*')
+
+    def test_text_without_words_matches_everything(self):
+        self.assertEqual(search.build_match_query(" -*() "), "")
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "The full-text index is an SQLite FTS5 table")
+class JobSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        cls.company = Company.objects.create(name="Initech", location="Austin")
+        other_company = Company.objects.create(name="Globex", location="Springfield")
+        cls.developer = cls.create_job("Senior Python Developer", cls.company, description="Django services")
+        cls.mention = cls.create_job("Data Analyst", other_company, requirements="Some Python scripting")
+        cls.designer = cls.create_job("Product Designer", other_company, description="Figma and research")
+
+    @classmethod
+    def create_job(cls, title, company, description="", requirements=""):
+        return Job.objects.create(
+            title=title, company=company, description=description, requirements=requirements,
+            location=company.location, posted_by=cls.recruiter,
+        )
+
+    def search(self, text):
+        return list(search.search_jobs(Job.objects.all(), text))
+
+    def test_prefixes_match_whole_words(self):
+        self.assertEqual(self.search("pyth dev"), [self.developer])
+
+    def test_title_matches_rank_above_requirement_matches(self):
+        self.assertEqual(self.search("python"), [self.developer, self.mention])
+
+    def test_words_are_stemmed(self):
+        self.assertEqual(self.search("designers"), [self.designer])
+
+    def test_company_names_are_searched(self):
+        self.assertEqual(self.search("initech"), [self.developer])
+
+    def test_query_syntax_in_the_search_box_is_harmless(self):
+        self.assertEqual(self.search('python" OR (NEAR'), [])
+        self.assertEqual(len(self.search("**")), 3)
+
+    def test_edits_are_reindexed(self):
+        self.designer.title = "Rust Engineer"
+        self.designer.save()
+        self.assertEqual(self.search("rust"), [self.designer])
+        self.assertEqual(self.search("designer"), [])
+
+    def test_renaming_a_company_reindexes_its_jobs(self):
+        self.company.name = "Initrode"
+        self.company.save()
+        self.assertEqual(self.search("initrode"), [self.developer])
+        self.assertEqual(self.search("initech"), [])
+
+    def test_deleted_jobs_leave_the_index(self):
+        self.mention.delete()
+        self.assertEqual(self.search("python"), [self.developer])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {search.FTS_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_rebuild_restores_lost_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.FTS_TABLE}")
+        self.assertEqual(self.search("python"), [])
+
+        self.assertTrue(search.index_is_current(connection))
+        self.assertEqual(search.rebuild_index(batch_size=2), 3)
+        self.assertEqual(self.search("python"), [self.developer, self.mention])
+
+    def test_changed_ranking_needs_a_new_index(self):
+        self.assertTrue(search.index_is_current(connection))
+        with mock.patch.object(search, "RANK_WEIGHTS", (1.0, 1.0, 1.0, 1.0)):
+            self.assertFalse(search.index_is_current(connection))
+        with mock.patch.object(search, "TABLE_DEFINITION", "fts5(title, tokenize = 'porter unicode61')"):
+            self.assertFalse(search.index_is_current(connection))
+
+    def test_job_list_filters_by_the_search_box(self):
+        self.mention.is_active = False
+        self.mention.save()
+        response = self.client.get(reverse("job_list"), {"search": "python"})
+        self.assertEqual(list(response.context["jobs"]), [self.developer])
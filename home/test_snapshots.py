@@ -0,0 +1,113 @@
+import gzip
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from . import caching, snapshots
+from .models import Company, Job
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.build = mock.Mock(return_value=[{"id": 1, "title": "Python Developer"}])
+
+    def snapshot(self):
+        return snapshots.get_json_snapshot("jobs", caching.JOB_MAP, self.build)
+
+    def test_snapshots_are_built_once_per_version(self):
+        first = self.snapshot()
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual(self.build.call_count, 1)
+        self.assertEqual(json.loads(first["body"]), self.build.return_value)
+        self.assertEqual(gzip.decompress(first["gzip"]), first["body"])
+
+        caching.bump_version(caching.JOB_MAP)
+        second = self.snapshot()
+        self.assertEqual(self.build.call_count, 2)
+        self.assertNotEqual(second["etag"], first["etag"])
+
+    def test_matching_etags_are_not_modified(self):
+        snapshot = self.snapshot()
+        strong = snapshot["etag"].removeprefix("W/")
+        for if_none_match in [snapshot["etag"], strong, f'"other", {strong}', "*"]:
+            with self.subTest(if_none_match=if_none_match):
+                request = self.factory.get("/", headers={"If-None-Match": if_none_match})
+                response = snapshots.snapshot_response(request, snapshot)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], snapshot["etag"])
+
+        request = self.factory.get("/", headers={"If-None-Match": '"other"'})
+        self.assertEqual(snapshots.snapshot_response(request, snapshot).status_code, 200)
+
+    def test_gzip_is_served_when_accepted(self):
+        snapshot = self.snapshot()
+        request = self.factory.get("/", headers={"Accept-Encoding": "gzip, deflate"})
+        response = snapshots.snapshot_response(request, snapshot)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), snapshot["body"])
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["X-Snapshot-Version"], str(snapshot["version"]))
+
+        response = snapshots.snapshot_response(self.factory.get("/"), snapshot)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, snapshot["body"])
+
+    def test_versioned_responses_revalidate_without_building(self):
+        response = snapshots.versioned_json_response(self.factory.get("/"), caching.JOB_MAP, self.build)
+        self.assertEqual(json.loads(response.content), self.build.return_value)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+        request = self.factory.get("/", headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(snapshots.versioned_json_response(request, caching.JOB_MAP, self.build).status_code, 304)
+        self.assertEqual(self.build.call_count, 1)
+
+
+class MapSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        cls.company = Company.objects.create(name="Initech", location="Denver")
+        cls.job = cls.create_job("Python Developer")
+
+    @classmethod
+    def create_job(cls, title):
+        return Job.objects.create(
+            title=title, company=cls.company, description="", requirements="", location="Denver",
+            latitude=39.74, longitude=-104.99, posted_by=cls.recruiter,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_map(self, **headers):
+        return self.client.get(reverse("jobs_for_map_api"), headers=headers)
+
+    def test_unfiltered_map_is_served_from_the_snapshot(self):
+        response = self.get_map()
+        self.assertEqual([job["title"] for job in response.json()], ["Python Developer"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_map().content, response.content)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_map(if_none_match=response["ETag"]).status_code, 304)
+
+    def test_new_jobs_replace_the_snapshot(self):
+        etag = self.get_map()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_job("Data Engineer")
+
+        response = self.get_map(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({job["title"] for job in response.json()}, {"Python Developer", "Data Engineer"})
+
+    def test_company_renames_replace_the_snapshot(self):
+        self.get_map()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.name = "Initrode"
+            self.company.save()
+        self.assertEqual(self.get_map().json()[0]["company"], "Initrode")
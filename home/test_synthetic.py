@@ -0,0 +1,83 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Profile, Skill, SkillTerm
+from messaging.models import Conversation, Message, UnreadCounter
+
+from . import synthetic
+from .models import ApplicationEvent, Company, Job, JobApplication, JobTerm
+from .terms import skill_terms
+
+UNTIL = timezone.make_aware(datetime.datetime(2025, 6, 1))
+
+
+class GenerateTests(TestCase):
+    def generate(self, **kwargs):
+        return synthetic.generate(**{"users": 40, "until": UNTIL, "batch_size": 7, **kwargs})[0]
+
+    def fingerprint(self):
+        return (
+            list(User.objects.order_by("username").values_list("username", "date_joined")),
+            list(Job.objects.order_by("id").values_list("title", "company__name", "latitude", "is_active")),
+            list(JobApplication.objects.order_by("id").values_list(
+                "applicant__username", "job__title", "status", "applied_at",
+            )),
+            list(Message.objects.order_by("id").values_list("sender__username", "content", "timestamp")),
+        )
+
+    def test_counts_are_the_rows_written(self):
+        counts = self.generate()
+        self.assertEqual((counts["User"], counts["Profile"], counts["Job"]), (40, 40, 4))
+        self.assertEqual(Profile.objects.filter(role=Profile.Role.RECRUITER).count(), 2)
+        for model in [User, Profile, Company, Job, Skill, SkillTerm, JobApplication, ApplicationEvent,
+                      Message, Conversation, UnreadCounter]:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(counts[model.__name__], model.objects.count())
+        self.assertEqual(self.generate(users=20, jobs=9, seed=1)["Job"], 9)
+
+    def test_the_same_seed_gives_the_same_rows(self):
+        with transaction.atomic():
+            self.generate(seed=3)
+            first = self.fingerprint()
+            transaction.set_rollback(True)
+        self.generate(seed=3)
+        self.assertEqual(self.fingerprint(), first)
+        self.assertTrue(first[2], "Expected some applications")
+
+    def test_signal_maintained_rows_are_written_alongside(self):
+        self.generate()
+        for profile in Profile.objects.prefetch_related("skills"):
+            expected = set().union(*[skill_terms(skill.name) for skill in profile.skills.all()])
+            self.assertEqual(set(SkillTerm.objects.filter(profile=profile).values_list("term", flat=True)), expected)
+
+        for application in JobApplication.objects.all():
+            events = list(ApplicationEvent.objects.filter(application=application).order_by("changed_at"))
+            self.assertEqual(events[0].to_status, JobApplication.ApplicationStatus.NEW)
+            self.assertEqual(events[-1].to_status, application.status)
+            self.assertEqual(len(events), application.version + 1)
+
+        unread = Message.objects.filter(is_read=False).count()
+        self.assertEqual(Conversation.objects.aggregate(total=Sum("unread_count"))["total"] or 0, unread)
+        self.assertEqual(UnreadCounter.objects.aggregate(total=Sum("count"))["total"] or 0, unread)
+        active = set(Job.objects.filter(is_active=True).values_list("id", flat=True))
+        self.assertEqual(set(JobTerm.objects.values_list("job_id", flat=True)), active)
+
+
+class GenerateCommandTests(TestCase):
+    def test_seeds_are_used_once(self):
+        out = StringIO()
+        call_command("generate_synthetic_data", users=20, seed=5, until=UNTIL.date(), stdout=out)
+        self.assertIn("User: 20", out.getvalue())
+        with self.assertRaisesMessage(CommandError, "Data for seed 5 already exists"):
+            call_command("generate_synthetic_data", users=20, seed=5, stdout=StringIO())
+
+    def test_sizes_must_be_positive(self):
+        with self.assertRaises(CommandError):
+            call_command("generate_synthetic_data", users=0, stdout=StringIO())
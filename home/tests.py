@@ -0,0 +1,571 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Education, Experience, Skill
+from lockedin.testing import Budget, QueryPlanTestCase, RouteBudgetTests
+
+from . import candidates, funnel, homepage, percolator, pipeline
+from .models import (
+    ApplicationEvent, CandidateDocument, Company, Job, JobApplication, JobDailyStageStats, JobStageDuration, JobStageStats,
+    SavedSearch,
+)
+
+Status = JobApplication.ApplicationStatus
+
+# Tables that grow with the site; no page may read them in full
+HOT_TABLES = {
+    "home_job",
+    "home_jobapplication",
+    "home_applicationevent",
+    "home_candidatedocument",
+    "home_savedsearch",
+    "home_savedsearchmatch",
+    "accounts_profile",
+    "accounts_skillterm",
+    "auth_user",
+}
+
+# Candidate search criteria match substrings of the search documents, which
+# no index can serve; they are checked row by row
+SEARCHED_TABLES = HOT_TABLES - {"home_candidatedocument"}
+
+
+class HomeQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        cls.recruiter.profile.role = "RECRUITER"
+        cls.recruiter.profile.save()
+        cls.seeker = User.objects.create_user("seeker", password="password")
+        cls.seeker.profile.location = "Atlanta"
+        cls.seeker.profile.save()
+        Skill.objects.create(profile=cls.seeker.profile, name="Python")
+        Education.objects.create(profile=cls.seeker.profile, school="Georgia Tech", degree="BS")
+        Experience.objects.create(
+            profile=cls.seeker.profile,
+            company="Acme",
+            title="Engineer",
+            start_year=datetime.date(2020, 1, 1),
+            is_current=True,
+        )
+        candidates.refresh_documents([cls.seeker.profile.id])
+
+        company = Company.objects.create(name="Acme", logo="")
+        cls.jobs = [
+            Job.objects.create(
+                title=f"Python Developer {number}",
+                company=company,
+                description="Python and Django",
+                requirements="Python",
+                location="Atlanta",
+                latitude=33.75,
+                longitude=-84.39,
+                posted_by=cls.recruiter,
+                is_active=number != 2,
+            )
+            for number in range(3)
+        ]
+        cls.application = JobApplication.objects.create(job=cls.jobs[0], applicant=cls.seeker)
+        cls.search = SavedSearch.objects.create(
+            name="Pythonistas", recruiter=cls.recruiter, skills_query="python", location="atlanta"
+        )
+
+    def login(self, user):
+        self.client.force_login(user)
+
+    def test_public_job_pages(self):
+        self.assertNoFullScan(HOT_TABLES, reverse("home.index"))
+        self.assertNoFullScan(HOT_TABLES, reverse("job_list"))
+        self.assertNoFullScan(
+            HOT_TABLES, reverse("job_list"), {"location": "Atlanta", "job_type": "full-time"}
+        )
+        self.assertNoFullScan(HOT_TABLES, reverse("job_detail", args=[self.jobs[0].id]))
+
+    def test_job_map_api(self):
+        self.assertNoFullScan(HOT_TABLES, reverse("jobs_for_map_api"))
+        self.assertNoFullScan(
+            HOT_TABLES, reverse("jobs_for_map_api"), {"bbox": "-85,33,-84,34", "zoom": "14"}
+        )
+
+    def test_job_seeker_pages(self):
+        self.login(self.seeker)
+        self.assertNoFullScan(HOT_TABLES, reverse("home.index"))
+        self.assertNoFullScan(HOT_TABLES, reverse("my_applications"))
+
+    def test_recruiter_pages(self):
+        self.login(self.recruiter)
+        self.assertNoFullScan(HOT_TABLES, reverse("my_jobs"))
+        self.assertNoFullScan(HOT_TABLES, reverse("recruiter_dashboard"))
+        self.assertNoFullScan(HOT_TABLES, reverse("view_job_applications", args=[self.jobs[0].id]))
+
+    def test_pipeline(self):
+        self.login(self.recruiter)
+        self.assertNoFullScan(HOT_TABLES, reverse("applicant_pipeline", args=[self.jobs[0].id]))
+        self.assertNoFullScan(
+            HOT_TABLES, reverse("pipeline_stage_cards", args=[self.jobs[0].id]), {"status": "INTERVIEW"}
+        )
+
+    def test_candidate_search(self):
+        self.login(self.recruiter)
+        self.assertNoFullScan(HOT_TABLES, reverse("candidate_search"))
+        self.assertNoFullScan(
+            SEARCHED_TABLES,
+            reverse("candidate_search"),
+            {"skills": "python", "location": "atlanta", "experience_years": "1"},
+        )
+        self.assertNoFullScan(SEARCHED_TABLES, reverse("saved_searches"))
+        self.assertNoFullScan(SEARCHED_TABLES, reverse("run_saved_search", args=[self.search.id]))
+        self.assertNoFullScan(
+            HOT_TABLES, reverse("candidate_recommendations", args=[self.jobs[0].id])
+        )
+
+    def test_job_lists_read_the_active_jobs_index_in_order(self):
+        self.assertQueryUsesIndex(
+            Job.objects.filter(is_active=True).order_by("-created_at", "-id")[:11], "job_active_recent_idx"
+        )
+        self.assertQueryUsesIndex(
+            Job.objects.filter(is_active=True)[: homepage.FEATURED_JOBS_COUNT], "job_active_recent_idx"
+        )
+
+    def test_recruiter_jobs_use_the_poster_index(self):
+        self.assertQueryUsesIndex(
+            Job.objects.filter(posted_by=self.recruiter).order_by("-created_at"), "job_poster_recent_idx"
+        )
+
+    def test_pipeline_columns_use_the_stage_index(self):
+        self.assertQueryUsesIndex(
+            pipeline.stage_cards(self.jobs[0], JobApplication.ApplicationStatus.INTERVIEW)[:26],
+            "jobapp_stage_idx",
+        )
+        self.assertQueryUsesIndex(
+            self.jobs[0].applications.order_by().values_list("status"), "jobapp_stage_idx"
+        )
+
+    def test_candidate_search_reads_documents_in_order(self):
+        self.assertQueryUsesIndex(candidates.search_candidates()[:11], "candidatedoc_joined_idx")
+
+    def test_saved_search_checks_use_the_active_index(self):
+        self.assertQueryUsesIndex(
+            SavedSearch.objects.filter(is_active=True, id__gt=0).order_by("id")[:100],
+            "savedsearch_active_idx",
+        )
+
+
+class CandidateExperienceTests(TestCase):
+    def test_current_jobs_keep_adding_experience(self):
+        seeker = User.objects.create_user("seeker", password="password")
+        today = timezone.localdate()
+        Experience.objects.create(
+            profile=seeker.profile, company="Initech", title="Analyst",
+            start_year=today - datetime.timedelta(days=3 * 365), end_year=today - datetime.timedelta(days=2 * 365),
+        )
+        Experience.objects.create(
+            profile=seeker.profile, company="Acme", title="Engineer", is_current=True,
+            start_year=today - datetime.timedelta(days=365),
+        )
+        candidates.refresh_documents([seeker.profile.id])
+        search = SavedSearch(experience_years="3")
+
+        def matches():
+            document = CandidateDocument.objects.get(profile=seeker.profile)
+            found = search.get_matching_candidates().filter(profile=seeker.profile).exists()
+            self.assertEqual(found, percolator.search_matches_profile(search, document))
+            return found
+
+        # A year at each job, with a year's gap between them
+        self.assertFalse(matches())
+        with mock.patch("django.utils.timezone.localdate", return_value=today + datetime.timedelta(days=367)):
+            self.assertTrue(matches())
+
+
+class PercolatorTests(TestCase):
+    def test_criteria_inside_longer_words_percolate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recruiter = User.objects.create_user("recruiter", password="password")
+            searches = [
+                SavedSearch.objects.create(name="Location", recruiter=recruiter, location="bost"),
+                SavedSearch.objects.create(name="Company", recruiter=recruiter, current_company="Init"),
+                SavedSearch.objects.create(name="Other", recruiter=recruiter, location="Denver"),
+            ]
+            seeker = User.objects.create_user("seeker", password="password")
+            seeker.profile.location = "Greater Boston Area"
+            seeker.profile.save()
+            Experience.objects.create(
+                profile=seeker.profile, company="Initech", title="Analyst", is_current=True,
+                start_year=datetime.date(2020, 1, 1),
+            )
+        expected = [
+            search for search in searches
+            if search.get_matching_candidates().filter(profile=seeker.profile).exists()
+        ]
+        self.assertEqual(expected, searches[:2])
+        self.assertEqual(
+            set(SavedSearch.objects.filter(pending_matches__profile=seeker.profile)), set(expected)
+        )
+
+
+    def test_editing_criteria_withdraws_stale_matches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recruiter = User.objects.create_user("recruiter", password="password")
+            search = SavedSearch.objects.create(name="Boston", recruiter=recruiter, location="boston")
+            for name, location in [("north", "Boston North"), ("south", "Boston South")]:
+                seeker = User.objects.create_user(name, password="password")
+                seeker.profile.location = location
+                seeker.profile.save()
+        self.assertEqual(search.pending_matches.count(), 2)
+
+        # Saves that leave the criteria alone keep the pending matches
+        search.last_notified = timezone.now()
+        search.save(update_fields=["last_notified", "updated_at"])
+        self.assertEqual(search.pending_matches.count(), 2)
+
+        search.location = "north"
+        search.save()
+        self.assertEqual(
+            list(search.pending_matches.values_list("profile__user__username", flat=True)), ["north"]
+        )
+        self.assertEqual(set(search.index_terms.values_list("term", flat=True)), set(percolator.search_terms(search)))
+
+    def test_rolled_back_changes_do_not_stop_later_percolation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recruiter = User.objects.create_user("recruiter", password="password")
+            search = SavedSearch.objects.create(name="Boston", recruiter=recruiter, location="boston")
+            seeker = User.objects.create_user("seeker", password="password")
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                seeker.profile.location = "Denver"
+                seeker.profile.save()
+                raise RuntimeError
+            seeker.profile.location = "Boston"
+            seeker.profile.save()
+        self.assertEqual(list(search.pending_matches.values_list("profile", flat=True)), [seeker.profile.id])
+
+
+class PipelineMoveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = User.objects.create_user("recruiter", password="password")
+        cls.other_recruiter = User.objects.create_user("other", password="password")
+        cls.staff = User.objects.create_user("staff", password="password", is_staff=True)
+        company = Company.objects.create(name="Acme", logo="")
+        cls.job, cls.second_job, cls.other_job = [
+            Job.objects.create(
+                title=f"Job {number}", company=company, description="", requirements="",
+                location="Atlanta", posted_by=poster,
+            )
+            for number, poster in enumerate([cls.recruiter, cls.recruiter, cls.other_recruiter])
+        ]
+        cls.applications = [
+            JobApplication.objects.create(
+                job=cls.job, applicant=User.objects.create_user(f"seeker{number}", password="password")
+            )
+            for number in range(3)
+        ]
+        cls.second_application = JobApplication.objects.create(job=cls.second_job, applicant=cls.staff)
+        cls.other_application = JobApplication.objects.create(job=cls.other_job, applicant=cls.staff)
+
+    def versions(self, applications):
+        return {application.id: application.version for application in applications}
+
+    def test_moves_applications_and_logs_each_change(self):
+        result = pipeline.move_applications(self.recruiter, self.versions(self.applications), Status.SCREENING)
+
+        self.assertEqual(result.moved, {application.id: 1 for application in self.applications})
+        self.assertEqual(result.conflicts, {})
+        self.assertEqual(result.forbidden, set())
+        for application in self.applications:
+            application.refresh_from_db()
+            self.assertEqual((application.status, application.version), (Status.SCREENING, 1))
+        self.assertEqual(
+            ApplicationEvent.objects.filter(from_status=Status.NEW, to_status=Status.SCREENING,
+                                            changed_by=self.recruiter).count(),
+            3,
+        )
+
+    def test_stale_versions_are_conflicts(self):
+        first, second, third = self.applications
+        pipeline.move_applications(self.recruiter, {first.id: 0}, Status.INTERVIEW)
+
+        result = pipeline.move_applications(
+            self.recruiter, {first.id: 0, second.id: 0, third.id: None}, Status.REJECTED
+        )
+
+        self.assertEqual(result.conflicts, {first.id: (Status.INTERVIEW, 1)})
+        self.assertEqual(result.moved, {second.id: 1, third.id: 1})
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.version), (Status.INTERVIEW, 1))
+        self.assertFalse(ApplicationEvent.objects.filter(application=first, to_status=Status.REJECTED).exists())
+
+    def test_unchanged_status_is_not_logged_again(self):
+        application = self.applications[0]
+        result = pipeline.move_applications(self.recruiter, {application.id: 0}, Status.NEW)
+
+        self.assertEqual(result.moved, {application.id: 0})
+        self.assertEqual(ApplicationEvent.objects.filter(application=application).count(), 1)
+
+    def test_other_recruiters_and_missing_ids_are_forbidden(self):
+        application = self.applications[0]
+        result = pipeline.move_applications(
+            self.recruiter,
+            {application.id: 0, self.other_application.id: 0, 999999: 0},
+            Status.OFFER,
+        )
+
+        self.assertEqual(result.moved, {application.id: 1})
+        self.assertEqual(result.forbidden, {self.other_application.id, 999999})
+        self.other_application.refresh_from_db()
+        self.assertEqual((self.other_application.status, self.other_application.version), (Status.NEW, 0))
+
+    def test_moves_are_limited_to_the_given_job(self):
+        result = pipeline.move_applications(
+            self.recruiter, self.versions([self.applications[0], self.second_application]), Status.OFFER,
+            job=self.job,
+        )
+
+        self.assertEqual(result.forbidden, {self.second_application.id})
+        self.second_application.refresh_from_db()
+        self.assertEqual(self.second_application.status, Status.NEW)
+
+    def test_staff_may_move_any_application(self):
+        result = pipeline.move_applications(self.staff, {self.other_application.id: 0}, Status.HIRED)
+        self.assertEqual(result.moved, {self.other_application.id: 1})
+
+    def test_bulk_view_reports_conflicts(self):
+        first, second, _ = self.applications
+        pipeline.move_applications(self.recruiter, {first.id: 0}, Status.INTERVIEW)
+        self.recruiter.profile.role = "RECRUITER"
+        self.recruiter.profile.save()
+        self.client.force_login(self.recruiter)
+
+        response = self.client.post(
+            reverse("bulk_update_application_status", args=[self.job.id]),
+            {
+                "status": Status.SCREENING,
+                "applications": [{"id": first.id, "version": 0}, {"id": second.id, "version": 0}],
+            },
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.json()["moved"], [{"id": second.id, "version": 1}])
+        self.assertEqual(
+            response.json()["conflicts"], [{"id": first.id, "status": Status.INTERVIEW, "version": 1}]
+        )
+
+    def test_only_the_jobs_recruiters_may_update_a_status(self):
+        application = self.applications[0]
+        for user in [self.recruiter, self.other_recruiter]:
+            user.profile.role = "RECRUITER"
+            user.profile.save()
+        url = reverse("update_application_status", args=[application.id])
+        data = {"status": Status.SCREENING, "version": 0}
+
+        # Job seekers are sent home, like on the other recruiter pages
+        self.client.force_login(self.applications[1].applicant)
+        response = self.client.post(url, data)
+        self.assertRedirects(response, f"{reverse('home.index')}?next={url}", fetch_redirect_response=False)
+
+        self.client.force_login(self.other_recruiter)
+        self.assertEqual(self.client.post(url, data).status_code, 403)
+        application.refresh_from_db()
+        self.assertEqual((application.status, application.version), (Status.NEW, 0))
+
+        self.client.force_login(self.recruiter)
+        response = self.client.post(url, data, headers={"x-requested-with": "XMLHttpRequest"})
+        self.assertEqual(response.json()["version"], 1)
+        application.refresh_from_db()
+        self.assertEqual(application.status, Status.SCREENING)
+
+
+class FunnelRollupTests(TestCase):
+    def rollups(self):
+        """Every non-zero rollup row; deltas can leave rows at zero that a rebuild drops."""
+        return {
+            "stages": set(
+                JobStageStats.objects.exclude(current=0, reached=0)
+                .values_list("job_id", "status", "current", "reached")
+            ),
+            "daily": set(
+                JobDailyStageStats.objects.exclude(entered=0).values_list("job_id", "day", "status", "entered")
+            ),
+            "durations": set(
+                JobStageDuration.objects.exclude(count=0).values_list("job_id", "status", "bucket", "count")
+            ),
+        }
+
+    def assertRollupsMatchRebuild(self):
+        incremental = self.rollups()
+        funnel.rebuild_rollups()
+        self.assertEqual(incremental, self.rollups())
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        recruiter = User.objects.create_user("recruiter", password="password")
+        company = Company.objects.create(name="Acme", logo="")
+        jobs = [
+            Job.objects.create(
+                title=f"Job {number}", company=company, description="", requirements="",
+                location="Atlanta", posted_by=recruiter,
+            )
+            for number in range(2)
+        ]
+        applications = [
+            JobApplication.objects.create(
+                job=jobs[number % 2],
+                applicant=User.objects.create_user(f"seeker{number}", password="password"),
+                applied_at=timezone.now() - datetime.timedelta(days=number * 3),
+            )
+            for number in range(6)
+        ]
+
+        def move(moved, status):
+            pipeline.move_applications(recruiter, {application.id: None for application in moved}, status)
+
+        move(applications[:5], Status.SCREENING)
+        move(applications[:4], Status.INTERVIEW)
+        move(applications[:2], Status.OFFER)
+        move(applications[:1], Status.HIRED)
+        move(applications[2:4], Status.REJECTED)
+        # Back to a stage it has already reached
+        move(applications[2:3], Status.SCREENING)
+        self.assertRollupsMatchRebuild()
+
+        applications[1].delete()
+        self.assertRollupsMatchRebuild()
+        jobs[1].delete()
+        self.assertRollupsMatchRebuild()
+
+    def test_status_changes_saved_directly_are_logged(self):
+        recruiter = User.objects.create_user("recruiter", password="password")
+        seeker = User.objects.create_user("seeker", password="password")
+        company = Company.objects.create(name="Acme", logo="")
+        job = Job.objects.create(
+            title="Job", company=company, description="", requirements="", location="Atlanta", posted_by=recruiter,
+        )
+        application = JobApplication.objects.create(job=job, applicant=seeker)
+
+        application.status = Status.SCREENING
+        application.save()
+        self.assertEqual(application.version, 1)
+        # Saves that leave the status alone don't log anything
+        application.note = "Updated"
+        application.save()
+        JobApplication.objects.get(pk=application.pk).save(update_fields=["note"])
+        application = JobApplication.objects.get(pk=application.pk)
+        application.status = Status.INTERVIEW
+        application.save(update_fields=["status"])
+
+        application.refresh_from_db()
+        self.assertEqual(application.version, 2)
+        self.assertEqual(
+            list(ApplicationEvent.objects.values_list("from_status", "to_status")),
+            [("", Status.NEW), (Status.NEW, Status.SCREENING), (Status.SCREENING, Status.INTERVIEW)],
+        )
+        self.assertEqual(funnel.stage_counts_by_job(Job.objects.all())[job.id][Status.INTERVIEW], 1)
+        self.assertRollupsMatchRebuild()
+
+    def test_median_duration_bucket(self):
+        recruiter = User.objects.create_user("recruiter", password="password")
+        company = Company.objects.create(name="Acme", logo="")
+        job = Job.objects.create(
+            title="Job", company=company, description="", requirements="", location="Atlanta", posted_by=recruiter,
+        )
+        for bucket, count in [(1, 1), (2, 1), (4, 3)]:
+            JobStageDuration.objects.create(job=job, status=Status.NEW, bucket=bucket, count=count)
+        self.assertEqual(funnel.median_duration_bucket(Job.objects.all()), {Status.NEW: "1-2 weeks"})
+
+
+class RecommendationCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.recruiter = User.objects.create_user("recruiter", password="password")
+        self.seeker = User.objects.create_user("seeker", password="password")
+        Skill.objects.create(profile=self.seeker.profile, name="Python")
+        company = Company.objects.create(name="Acme", logo="")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs = [
+                Job.objects.create(
+                    title=f"Python developer {number}", company=company, description="Python", requirements="",
+                    location="Atlanta", posted_by=self.recruiter,
+                )
+                for number in range(2)
+            ]
+
+    def recommended(self):
+        self.client.force_login(self.seeker)
+        response = self.client.get(reverse("home.index"))
+        return {card["id"] for card in response.context["template_data"]["recommended_jobs"]}
+
+    def test_deactivated_jobs_leave_cached_recommendations(self):
+        self.assertEqual(self.recommended(), {job.id for job in self.jobs})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs[0].is_active = False
+            self.jobs[0].save()
+        self.assertEqual(self.recommended(), {self.jobs[1].id})
+
+    def test_deleted_jobs_leave_cached_recommendations(self):
+        self.assertEqual(self.recommended(), {job.id for job in self.jobs})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs[1].delete()
+        self.assertEqual(self.recommended(), {self.jobs[0].id})
+
+    def test_recommendations_are_cached(self):
+        self.recommended()
+        with self.assertNumQueries(0):
+            homepage.recommended_jobs(self.seeker, lambda user: self.fail("rebuilt"))
+
+
+class HomeRouteBudgetTests(RouteBudgetTests, TestCase):
+    urlconf = "home.urls"
+    budgets = {
+        "home.index": Budget(7, warm=3),
+        "job_list": Budget(7, warm=5),
+        "post_job": Budget(6, warm=4),
+        "job_detail": Budget(10, warm=8),
+        "edit_job": Budget(8, warm=6),
+        "delete_job": Budget(7, warm=5),
+        "toggle_job_status": Budget(5),
+        "apply_for_job": Budget(8, warm=6),
+        "one_click_apply": Budget(3),
+        "view_job_applications": Budget(7, warm=5),
+        "my_jobs": Budget(6, warm=4),
+        "recruiter_dashboard": Budget(11, warm=9),
+        "my_applications": Budget(6, warm=4),
+        "applicant_pipeline": Budget(13, warm=11),
+        "pipeline_stage_cards": Budget(5),
+        "bulk_update_application_status": Budget(3),
+        "pipeline_applicant_locations": Budget(5),
+        "update_application_status": Budget(4),
+        "admin_export_data": Budget(6, warm=4),
+        "download_export": Budget(3),
+        "job_map": Budget(5, warm=3),
+        "jobs_for_map_api": Budget(1),
+        "candidate_search": Budget(8, warm=6),
+        "saved_searches": Budget(7, warm=6),
+        "save_search": Budget(5, warm=3),
+        "edit_saved_search": Budget(5, warm=4),
+        "delete_saved_search": Budget(5, warm=4),
+        "run_saved_search": Budget(7, warm=6),
+        "toggle_search_notifications": Budget(4),
+    }
+
+    params = {
+        "job_list": {"location": "Atlanta"},
+        "pipeline_stage_cards": {"status": "NEW"},
+        "pipeline_applicant_locations": {"bbox": "-85,33,-84,34"},
+        "jobs_for_map_api": {"bbox": "-85,33,-84,34", "zoom": "14"},
+        "candidate_search": {"skills": "python", "location": "atlanta"},
+    }
+
+    def url_values(self, data):
+        return {
+            "job_id": data.job.id,
+            "application_id": data.application.id,
+            "export_id": data.export.id,
+            "search_id": data.search.id,
+        }
@@ -26,10 +26,15 @@ urlpatterns = [
         name="view_job_applications",
     ),
     path("my-jobs/", views.my_jobs, name="my_jobs"),
+    path("dashboard/", views.recruiter_dashboard, name="recruiter_dashboard"),
     path("my-applications/", views.my_applications, name="my_applications"),
     path('jobs/<int:job_id>/pipeline/', views.applicant_pipeline, name='applicant_pipeline'),
+    path('jobs/<int:job_id>/pipeline/cards/', views.pipeline_stage_cards, name='pipeline_stage_cards'),
+    path('jobs/<int:job_id>/pipeline/move/', views.bulk_update_application_status, name='bulk_update_application_status'),
+    path('jobs/<int:job_id>/pipeline/locations/', views.pipeline_applicant_locations, name='pipeline_applicant_locations'),
     path('applications/<int:application_id>/update-status/', views.update_application_status, name='update_application_status'),
     path('management/export/', views.admin_export_data, name='admin_export_data'),
+    path('management/export/<int:export_id>/download/', views.download_export, name='download_export'),
     path('jobs/map/', views.job_map, name='job_map'),
     path('api/jobs-for-map/', views.jobs_for_map_api, name='jobs_for_map_api'),
     # Candidate search and saved searches
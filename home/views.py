@@ -2,23 +2,36 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.http import HttpResponseForbidden
-from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, HttpResponseBadRequest
 from accounts.models import Profile, Skill 
 import json
-import csv
+import os
 from django.utils import timezone
-from math import radians, sin, cos, sqrt, atan2
 from django.core.paginator import Paginator
-from django.db.models import Q
-from .models import Job, Company, JobApplication, SavedSearch
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from .models import Job, Company, ExportJob, JobApplication, SavedSearch
 from django.urls import reverse
+from django.template.loader import render_to_string
 from .forms import JobApplicationForm, JobForm, SavedSearchForm
+from .search import search_jobs
+from .recommendations import recommend_candidates, recommend_jobs
+from .candidates import CANDIDATE_ORDERING, new_match_summaries, search_candidates
+from .pagination import KeysetPaginator
+from .snapshots import get_json_snapshot, snapshot_response, versioned_json_response
+from .exports import EXPORT_FORMATS, EXPORTABLE_MODELS, streaming_export_response
+from . import caching, funnel, homepage, pipeline
+from .geo import MARKER_ZOOM, MAX_MARKERS, MAX_ZOOM, cluster_jobs, parse_bbox, within_distance
+
+# Upper bound on applications moved by one bulk status request
+MAX_BULK_STATUS_UPDATES = 1000
 
 
 def get_recommended_jobs(user):
     """
     Get job recommendations for a job seeker based on their skills.
-    Returns jobs that match the user's skills in the job description or requirements.
+    Jobs are looked up in the skill term index and ranked by how many of the
+    user's skills they mention, weighted by how rare each skill is.
     """
     if not hasattr(user, 'profile'):
         return []
@@ -28,20 +41,7 @@ def get_recommended_jobs(user):
     if not user_skills:
         return []
     
-    skill_query = Q()
-    for skill in user_skills:
-        skill_query |= Q(description__icontains=skill) | Q(requirements__icontains=skill)
-    
-    applied_job_ids = JobApplication.objects.filter(applicant=user).values_list('job_id', flat=True)
-    
-    recommended_jobs = Job.objects.filter(
-        is_active=True
-    ).filter(
-        skill_query
-    ).exclude(
-        id__in=applied_job_ids
-    ).order_by('-created_at')[:10]      
-    return recommended_jobs
+    return recommend_jobs(user, user_skills, limit=10)
 
 
 def is_recruiter(user):
@@ -58,11 +58,12 @@ def is_recruiter(user):
 
 
 def index(request):
-    featured_jobs = Job.objects.filter(is_active=True)[:3]
-    
+    # Both lists are served from the cache when warm; see home/homepage.py
+    featured_jobs = homepage.featured_jobs()
+
     recommended_jobs = []
     if request.user.is_authenticated and hasattr(request.user, 'profile') and request.user.profile.role == Profile.Role.JOB_SEEKER:
-        recommended_jobs = get_recommended_jobs(request.user)
+        recommended_jobs = homepage.recommended_jobs(request.user, get_recommended_jobs)
 
     template_data = {
         "featured_jobs": featured_jobs,
@@ -72,16 +73,13 @@ def index(request):
 
 
 def job_list(request):
-    jobs = Job.objects.filter(is_active=True)
+    jobs = Job.objects.filter(is_active=True).order_by("-created_at", "-id")
 
     # Search functionality
     search_query = request.GET.get("search", "")
     if search_query:
-        jobs = jobs.filter(
-            Q(title__icontains=search_query)
-            | Q(company__name__icontains=search_query)
-            | Q(description__icontains=search_query)
-        )
+        # Ranked by relevance through the full-text index (see home/search.py)
+        jobs = search_jobs(jobs, search_query)
 
     # Location filter
     location = request.GET.get("location", "")
@@ -109,10 +107,9 @@ def job_list(request):
     elif salary_range == "120+":
         jobs = jobs.filter(salary_min__gte=120000)
 
-    # Pagination
-    paginator = Paginator(jobs, 10)  # Show 10 jobs per page
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # Cursor pagination on the queryset's ordering (see home/pagination.py)
+    paginator = KeysetPaginator(jobs.select_related("company"), 10)  # Show 10 jobs per page
+    page_obj = paginator.get_page(request.GET.get("cursor"), params=request.GET)
 
     context = {
         "jobs": page_obj,
@@ -152,64 +149,99 @@ def job_map(request):
     return render(request, "home/job_map.html")
 
 
-def haversine(lat1, lon1, lat2, lon2):
+def parse_distance_filter(params):
     """
-    Calculate the distance between two points on Earth in miles.
+    Return (lat, lon, miles) from the query string, or None when the distance
+    filter is absent or invalid.
     """
-    R = 3958.8  # Radius of Earth in miles
-
-    lat1_rad, lon1_rad, lat2_rad, lon2_rad = map(radians, [lat1, lon1, lat2, lon2])
-
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
-
-    a = sin(dlat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-
-    distance = R * c
-    return distance
+    try:
+        lat, lon, miles = (float(params[key]) for key in ("lat", "lon", "distance"))
+    except (KeyError, ValueError, TypeError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or miles < 0:
+        return None
+    return lat, lon, miles
 
 
 def jobs_for_map_api(request):
     """
     API endpoint to provide job data for the interactive map.
     Can be filtered by distance if lat, lon, and distance (in miles) are provided.
-    """
-    lat = request.GET.get("lat")
-    lon = request.GET.get("lon")
-    distance_miles = request.GET.get("distance")
 
+    When the map sends its viewport as ``bbox`` (west,south,east,north) and
+    ``zoom``, the response is an object instead of a list: zoomed-out views get
+    pre-aggregated ``clusters`` and only zoomed-in views get individual ``jobs``.
+    """
     jobs = Job.objects.filter(
         is_active=True, latitude__isnull=False, longitude__isnull=False
-    ).select_related("company")
-    job_data = []
+    )
 
-    for job in jobs:
-        include_job = True
-        # If distance filtering is active, check if the job is within range
-        if lat and lon and distance_miles:
-            try:
-                user_lat, user_lon, max_dist = map(float, [lat, lon, distance_miles])
-                job_dist = haversine(user_lat, user_lon, job.latitude, job.longitude)
-                if job_dist > max_dist:
-                    include_job = False
-            except (ValueError, TypeError):
-                # Ignore invalid filter parameters
-                pass
-
-        if include_job:
-            job_data.append(
-                {
-                    "id": job.id,
-                    "title": job.title,
-                    "company": job.company.name,
-                    "lat": job.latitude,
-                    "lon": job.longitude,
-                    "url": reverse("job_detail", args=[job.id]),
-                }
-            )
+    # Invalid filter parameters are ignored, as before
+    distance_filter = parse_distance_filter(request.GET)
+    if distance_filter:
+        jobs = within_distance(jobs, *distance_filter)
+
+    bbox = parse_bbox(request.GET.get("bbox"))
+    if bbox is None and distance_filter is None:
+        # The unfiltered list is the same for everyone: serve the precomputed copy
+        snapshot = get_json_snapshot(
+            "jobs_for_map", caching.JOB_MAP, lambda: serialize_map_jobs(jobs)
+        )
+        return snapshot_response(request, snapshot)
+    if bbox is None:
+        return JsonResponse(serialize_map_jobs(jobs), safe=False)
+
+    try:
+        zoom = min(max(int(request.GET.get("zoom", "")), 0), MAX_ZOOM)
+    except ValueError:
+        return JsonResponse({"error": "Invalid zoom level"}, status=400)
+
+    if distance_filter is None:
+        # Like the snapshot, the viewport only changes with the map's version,
+        # so the browser can revalidate its copy without the view rebuilding it
+        return versioned_json_response(request, caching.JOB_MAP, lambda: map_viewport(jobs, bbox, zoom))
+    return JsonResponse(map_viewport(jobs, bbox, zoom, use_cache=False))
+
+
+def map_viewport(jobs, bbox, zoom, use_cache=True):
+    """The clusters (zoomed out) or individual pins (zoomed in) of ``jobs`` inside ``bbox``."""
+    if zoom < MARKER_ZOOM:
+        clusters = cluster_jobs(jobs, bbox, zoom, use_cache=use_cache)
+        return {
+            "zoom": zoom,
+            "count": sum(cluster["count"] for cluster in clusters),
+            "clusters": clusters,
+            "jobs": [],
+        }
+
+    west, south, east, north = bbox
+    jobs = jobs.filter(latitude__range=(south, north), longitude__range=(west, east))
+    job_data = serialize_map_jobs(jobs[: MAX_MARKERS + 1])
+    return {
+        "zoom": zoom,
+        "count": min(len(job_data), MAX_MARKERS),
+        "truncated": len(job_data) > MAX_MARKERS,
+        "clusters": [],
+        "jobs": job_data[:MAX_MARKERS],
+    }
 
-    return JsonResponse(job_data, safe=False)
+
+def serialize_map_jobs(jobs):
+    # reverse() once with a placeholder id rather than once per job
+    url_template = reverse("job_detail", args=[999999999]).replace("999999999", "{}")
+    return [
+        {
+            "id": job_id,
+            "title": title,
+            "company": company_name,
+            "lat": latitude,
+            "lon": longitude,
+            "url": url_template.format(job_id),
+        }
+        for job_id, title, company_name, latitude, longitude in jobs.values_list(
+            "id", "title", "company__name", "latitude", "longitude"
+        )
+    ]
 
 
 @login_required
@@ -344,19 +376,68 @@ def my_jobs(request):
     Displays a list of jobs. For recruiters, it shows only their own jobs.
     For admins/staff, it shows all jobs on the platform.
     """
-    if request.user.is_staff or (
-        hasattr(request.user, "profile")
-        and request.user.profile.role == Profile.Role.ADMINISTRATOR
-    ):
-        jobs = Job.objects.all().order_by("-created_at")
-    else:
-        jobs = Job.objects.filter(posted_by=request.user).order_by("-created_at")
+    # Application counts come from the funnel rollups, one row per stage
+    jobs = (
+        managed_jobs(request.user)
+        .select_related("company")
+        .annotate(application_count=Coalesce(Sum("stage_stats__current"), 0))
+        .order_by("-created_at")
+    )
     context = {
         "jobs": jobs,
     }
     return render(request, "home/my_jobs.html", context)
 
 
+def managed_jobs(user):
+    """Jobs a recruiter sees in their job list and dashboard; every job for admins and staff."""
+    if user.is_staff or (
+        hasattr(user, "profile") and user.profile.role == Profile.Role.ADMINISTRATOR
+    ):
+        return Job.objects.all()
+    return Job.objects.filter(posted_by=user)
+
+
+@login_required
+@user_passes_test(is_recruiter, login_url="home.index")
+def recruiter_dashboard(request):
+    """
+    Hiring-funnel overview across the recruiter's jobs: stage counts,
+    conversion rates, the range holding the median time in each stage and
+    recent activity. Every figure is read from the funnel rollups, never
+    from the applications.
+    """
+    jobs = managed_jobs(request.user)
+    job_rows = list(jobs.select_related("company").order_by("-created_at").only(
+        "id", "title", "is_active", "created_at", "company__name"
+    ))
+    statuses = JobApplication.ApplicationStatus
+    counts = funnel.stage_counts_by_job(jobs)
+    for job in job_rows:
+        job_counts = counts.get(job.id, {})
+        job.stage_counts = [job_counts.get(status, 0) for status in statuses.values]
+        job.application_count = sum(job.stage_counts)
+
+    medians = funnel.median_duration_bucket(jobs)
+    stages = funnel.funnel(jobs)
+    for stage in stages:
+        stage["median_bucket"] = medians.get(stage["status"])
+
+    activity = funnel.daily_activity(jobs)
+    context = {
+        "jobs": job_rows,
+        "stages": stages,
+        "status_choices": statuses.choices,
+        "companies": funnel.company_summaries(jobs),
+        "activity": [
+            (day, entered[statuses.NEW], entered[statuses.HIRED], sum(entered.values()))
+            for day, entered in activity
+        ],
+        "activity_peak": max([sum(entered.values()) for _, entered in activity] + [1]),
+    }
+    return render(request, "home/recruiter_dashboard.html", context)
+
+
 @login_required
 @user_passes_test(is_recruiter, login_url="home.index")
 def edit_job(request, job_id):
@@ -439,12 +520,12 @@ def view_job_applications(request, job_id):
     job = get_object_or_404(Job, pk=job_id)
 
     # Security check: ensure the user owns the job or is staff
-    if job.posted_by != request.user and not request.user.is_staff:
+    if job.posted_by_id != request.user.id and not request.user.is_staff:
         return HttpResponseForbidden(
             "You are not allowed to view applications for this job."
         )
 
-    applications = job.applications.all().order_by("-applied_at")
+    applications = job.applications.select_related("applicant__profile").order_by("-applied_at")
 
     context = {
         "job": job,
@@ -456,7 +537,7 @@ def view_job_applications(request, job_id):
 
 @login_required
 def my_applications(request):
-    applications = JobApplication.objects.filter(applicant=request.user)
+    applications = JobApplication.objects.filter(applicant=request.user).select_related("job__company")
 
     context = {
         "applications": applications,
@@ -470,141 +551,239 @@ def my_applications(request):
 def applicant_pipeline(request, job_id):
     """
     Displays a Kanban-style board for managing job applicants.
+    Each column starts with its newest cards; more are fetched from
+    ``pipeline_stage_cards`` and map pins from ``pipeline_applicant_locations``.
     """
     job = get_object_or_404(Job, pk=job_id)
 
     # Security check: ensure the user owns the job or is staff
-    if job.posted_by != request.user and not request.user.is_staff:
+    if job.posted_by_id != request.user.id and not request.user.is_staff:
         return HttpResponseForbidden("You are not allowed to view this pipeline.")
 
-    # Get all applications for the job, optimized with select_related
-    applications = (
-        job.applications.all()
-        .select_related("applicant__profile")
-        .order_by("-applied_at")
-    )
-
-    # NEW: Get applicant locations for the map
-    applicant_locations = []
-    for app in applications:
-        profile = app.applicant.profile
-        if profile.latitude and profile.longitude:
-            applicant_locations.append({
-                'id': app.id,
-                'name': profile.name or app.applicant.username,
-                'lat': profile.latitude,
-                'lon': profile.longitude,
-                'profile_url': reverse('accounts.profile_view', args=[app.applicant.username])
-            })
-
-
-    # Group applications by status
-    applications_by_status = {
-        stage[0]: [] for stage in JobApplication.ApplicationStatus.choices
-    }
-    for app in applications:
-        # If the status is valid, add it to the correct list.
-        # Otherwise, add it to the 'NEW' list as a fallback for old/invalid statuses.
-        if app.status in applications_by_status:
-            applications_by_status[app.status].append(app)
-        else:
-            applications_by_status[JobApplication.ApplicationStatus.NEW].append(app)
+    counts = pipeline.stage_counts(job)
 
     # Structure data for the template to avoid needing a custom 'get_item' filter
     pipeline_stages_data = []
     for stage_key, stage_label in JobApplication.ApplicationStatus.choices:
+        cards = KeysetPaginator(
+            pipeline.stage_cards(job, stage_key), pipeline.PIPELINE_PAGE_SIZE
+        ).get_page()
         pipeline_stages_data.append(
             {
                 "key": stage_key,
                 "label": stage_label,
-                "applications": applications_by_status.get(stage_key, []),
+                "count": counts[stage_key],
+                "applications": cards.object_list,
+                "cursor": cards.next_cursor,
             }
         )
     context = {
         "job": job,
         "pipeline_stages": pipeline_stages_data,
         "status_choices": JobApplication.ApplicationStatus.choices,
-        "applicant_locations_json": json.dumps(applicant_locations),
     }
     return render(request, "home/applicant_pipeline.html", context)
 
 
+def get_pipeline_job(request, job_id):
+    """The job whose pipeline is requested, or None if the user may not see it."""
+    job = get_object_or_404(Job.objects.only("id", "posted_by_id"), pk=job_id)
+    if job.posted_by_id != request.user.id and not request.user.is_staff:
+        return None
+    return job
+
+
+@login_required
+@user_passes_test(is_recruiter, login_url="home.index")
+def pipeline_stage_cards(request, job_id):
+    """The next cards of one pipeline column, as HTML, after ``cursor``."""
+    job = get_pipeline_job(request, job_id)
+    if job is None:
+        return HttpResponseForbidden("You are not allowed to view this pipeline.")
+    status = request.GET.get("status")
+    if status not in JobApplication.ApplicationStatus.values:
+        return JsonResponse({"error": "Invalid status"}, status=400)
+
+    cards = KeysetPaginator(
+        pipeline.stage_cards(job, status), pipeline.PIPELINE_PAGE_SIZE
+    ).get_page(request.GET.get("cursor"))
+    html = render_to_string(
+        "home/_pipeline_cards.html", {"applications": cards.object_list}, request=request
+    )
+    return JsonResponse({"html": html, "cursor": cards.next_cursor})
+
+
+@login_required
+@user_passes_test(is_recruiter, login_url="home.index")
+def pipeline_applicant_locations(request, job_id):
+    """
+    Map pins for the job's applicants, limited to the ``bbox``
+    (west,south,east,north) viewport when given.
+    """
+    job = get_pipeline_job(request, job_id)
+    if job is None:
+        return HttpResponseForbidden("You are not allowed to view this pipeline.")
+    bbox = None
+    if request.GET.get("bbox"):
+        bbox = parse_bbox(request.GET["bbox"])
+        if bbox is None:
+            return JsonResponse({"error": "Invalid bbox"}, status=400)
+
+    pins, truncated = pipeline.applicant_locations(job, bbox)
+    return JsonResponse({"applicants": pins, "truncated": truncated})
+
+
 @login_required
 @user_passes_test(is_recruiter, login_url="home.index")
 def update_application_status(request, application_id):
     """
     Updates the status of a job application. Handles both standard form posts and AJAX requests.
+    An optional ``version`` guards against overwriting someone else's change.
     """
-    application = get_object_or_404(JobApplication, pk=application_id)
-    job = application.job
-
-    # Security check: ensure the user owns the job or is staff
-    if job.posted_by != request.user and not request.user.is_staff:
-        return HttpResponseForbidden("You are not allowed to modify this application.")
+    application = get_object_or_404(
+        JobApplication.objects.select_related("applicant").only(
+            "id", "job_id", "version", "applicant__username"
+        ),
+        pk=application_id,
+    )
+    is_ajax = request.headers.get("x-requested-with") == "XMLHttpRequest"
 
     if request.method == "POST":
         new_status = request.POST.get("status")
         if new_status in JobApplication.ApplicationStatus.values:
-            application.status = new_status
-            application.save()
-            message_text = f"Status for {application.applicant.username} updated to {application.get_status_display()}."
+            try:
+                expected_version = int(request.POST["version"])
+            except (KeyError, ValueError):
+                expected_version = None
+            result = pipeline.move_applications(
+                request.user, {application.id: expected_version}, new_status
+            )
+            if result.forbidden:
+                return HttpResponseForbidden("You are not allowed to modify this application.")
+            if result.conflicts:
+                error_text = f"{application.applicant.username}'s application was changed by someone else. Reload to see the latest status."
+                if is_ajax:
+                    return JsonResponse({"error": error_text}, status=409)
+                messages.error(request, error_text)
+                return redirect("applicant_pipeline", job_id=application.job_id)
+
+            status_label = JobApplication.ApplicationStatus(new_status).label
+            message_text = f"Status for {application.applicant.username} updated to {status_label}."
 
             # If this is an AJAX request (from drag-and-drop), return the message as JSON.
-            if request.headers.get("x-requested-with") == "XMLHttpRequest":
-                return JsonResponse({"message": message_text})
+            if is_ajax:
+                return JsonResponse({"message": message_text, "version": result.moved[application.id]})
 
             # For non-AJAX requests, use the standard Django messages framework.
             messages.success(request, message_text)
-        elif request.headers.get("x-requested-with") == "XMLHttpRequest":
+        elif is_ajax:
             # Handle invalid status for AJAX requests
             return JsonResponse({"error": "Invalid status"}, status=400)
 
-    return redirect("applicant_pipeline", job_id=job.id)
+    return redirect("applicant_pipeline", job_id=application.job_id)
+
+
+@login_required
+@user_passes_test(is_recruiter, login_url="home.index")
+def bulk_update_application_status(request, job_id):
+    """
+    Move many applications of one job to a status in a single transaction.
+    Expects a JSON body ``{"status": ..., "applications": [{"id": .., "version": ..}, ..]}``
+    and reports which cards moved (with their new versions) and which were
+    changed by someone else in the meantime.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    job = get_pipeline_job(request, job_id)
+    if job is None:
+        return HttpResponseForbidden("You are not allowed to modify this pipeline.")
+
+    try:
+        payload = json.loads(request.body)
+        new_status = payload["status"]
+        expected_versions = {
+            int(item["id"]): None if item.get("version") is None else int(item["version"])
+            for item in payload["applications"]
+        }
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({"error": "Invalid request"}, status=400)
+    if new_status not in JobApplication.ApplicationStatus.values:
+        return JsonResponse({"error": "Invalid status"}, status=400)
+    if len(expected_versions) > MAX_BULK_STATUS_UPDATES:
+        return JsonResponse(
+            {"error": f"At most {MAX_BULK_STATUS_UPDATES} applications can be moved at once"}, status=400
+        )
+
+    result = pipeline.move_applications(request.user, expected_versions, new_status, job=job)
+
+    status_label = JobApplication.ApplicationStatus(new_status).label
+    count = len(result.moved)
+    message_text = f"{count} application{'s' if count != 1 else ''} moved to {status_label}."
+    if result.conflicts:
+        message_text += f" {len(result.conflicts)} changed by someone else and were left as they are."
+    return JsonResponse({
+        "message": message_text,
+        "moved": [{"id": application_id, "version": version} for application_id, version in result.moved.items()],
+        "conflicts": [
+            {"id": application_id, "status": current_status, "version": version}
+            for application_id, (current_status, version) in result.conflicts.items()
+        ],
+        "not_found": sorted(result.forbidden),
+    })
 
 
 @login_required
 @user_passes_test(lambda u: u.is_staff, login_url="home.index")
 def admin_export_data(request):
     """
-    Allows an administrator to select and export model data as a CSV file from the main site.
+    Allows an administrator to select and export model data as a CSV or
+    JSON Lines file from the main site. The file is either streamed as it is
+    read, or queued as a background export for the ``run_export_worker``
+    command and downloaded from this page when it is done.
     """
-    MODELS_TO_EXPORT = {
-        "Jobs": Job,
-        "Companies": Company,
-        "Job Applications": JobApplication,
-    }
-
     if request.method == "POST":
         model_key = request.POST.get("model_to_export")
-        ModelClass = MODELS_TO_EXPORT.get(model_key)
+        ModelClass = EXPORTABLE_MODELS.get(model_key)
+        export_format = request.POST.get("export_format", "csv")
 
-        if not ModelClass:
+        if not ModelClass or export_format not in EXPORT_FORMATS:
             messages.error(request, "Invalid data type selected for export.")
             return redirect("admin_export_data")
 
-        queryset = ModelClass.objects.all()
-        meta = ModelClass._meta
-        field_names = [
-            field.name
-            for field in meta.get_fields()
-            if not field.many_to_many and not field.one_to_many
-        ]
-
-        response = HttpResponse(content_type="text/csv")
-        filename = f"{meta.model_name}_export_{timezone.now().strftime('%Y-%m-%d')}.csv"
-        response["Content-Disposition"] = f"attachment; filename={filename}"
-        writer = csv.writer(response)
+        if request.POST.get("delivery") == "background":
+            ExportJob.objects.create(
+                requested_by=request.user, model_key=model_key, export_format=export_format
+            )
+            messages.success(request, f"{model_key} export queued. It will be listed below when ready.")
+            return redirect("admin_export_data")
 
-        writer.writerow(field_names)
+        return streaming_export_response(request, ModelClass, export_format)
 
-        for obj in queryset:
-            row = [getattr(obj, field) for field in field_names]
-            writer.writerow(row)
+    export_jobs = ExportJob.objects.select_related("requested_by")[:20]
+    context = {
+        "export_options": EXPORTABLE_MODELS.keys(),
+        "export_formats": [(key, label) for key, (label, _, _) in EXPORT_FORMATS.items()],
+        "export_jobs": export_jobs,
+        "exports_in_progress": any(
+            job.status in (ExportJob.Status.QUEUED, ExportJob.Status.RUNNING) for job in export_jobs
+        ),
+    }
+    return render(request, "home/admin_export.html", context)
 
-        return response
 
-    context = {"export_options": MODELS_TO_EXPORT.keys()}
-    return render(request, "home/admin_export.html", context)
+@login_required
+@user_passes_test(lambda u: u.is_staff, login_url="home.index")
+def download_export(request, export_id):
+    """Serve a finished background export."""
+    export_job = get_object_or_404(ExportJob, id=export_id)
+    if not export_job.is_downloadable:
+        raise Http404("This export is not available.")
+    return FileResponse(
+        export_job.file.open("rb"),
+        as_attachment=True,
+        filename=os.path.basename(export_job.file.name),
+        content_type="application/gzip",
+    )
 
 
 @login_required
@@ -612,58 +791,24 @@ def admin_export_data(request):
 def candidate_search(request):
     """
     Search for job seekers/candidates based on various criteria.
+    Filters the flattened candidate search documents (see ``home.candidates``).
     """
-    from accounts.models import Profile
-    
-    # Start with all job seeker profiles
-    candidates = Profile.objects.filter(role=Profile.Role.JOB_SEEKER).select_related('user')
-    
-    # Search functionality
     skills_query = request.GET.get("skills", "")
-    if skills_query:
-        skills_list = [skill.strip().lower() for skill in skills_query.split(',') if skill.strip()]
-        if skills_list:
-            skill_query = Q()
-            for skill in skills_list:
-                skill_query |= Q(skills__name__icontains=skill)
-            candidates = candidates.filter(skill_query).distinct()
-    
-    # Location filter
     location = request.GET.get("location", "")
-    if location:
-        candidates = candidates.filter(
-            Q(bio__icontains=location) |
-            Q(experiences__company__icontains=location)
-        ).distinct()
-    
-    # Experience years filter
     experience_years = request.GET.get("experience_years", "")
-    if experience_years:
-        try:
-            years = int(experience_years)
-            candidates = candidates.filter(experiences__isnull=False).distinct()
-        except ValueError:
-            pass
-    
-    # Education level filter
     education_level = request.GET.get("education_level", "")
-    if education_level:
-        candidates = candidates.filter(
-            educations__degree__icontains=education_level
-        ).distinct()
-    
-    # Current company filter
     current_company = request.GET.get("current_company", "")
-    if current_company:
-        candidates = candidates.filter(
-            experiences__company__icontains=current_company,
-            experiences__is_current=True
-        ).distinct()
-    
+    candidates = search_candidates(
+        skills_query=skills_query,
+        location=location,
+        experience_years=experience_years,
+        education_level=education_level,
+        current_company=current_company,
+    ).prefetch_related("profile__experiences")
+
     # Pagination
-    paginator = Paginator(candidates, 10)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(candidates, 10, ordering=CANDIDATE_ORDERING)
+    page_obj = paginator.get_page(request.GET.get("cursor"), params=request.GET)
     
     context = {
         "candidates": page_obj,
@@ -682,18 +827,19 @@ def saved_searches(request):
     """
     Display and manage saved searches for the current recruiter.
     """
-    saved_searches = SavedSearch.objects.filter(recruiter=request.user)
-    
-    # Get new matches for each search
-    searches_with_matches = []
-    for search in saved_searches:
-        new_matches = search.get_new_matches_since_last_notification()
-        searches_with_matches.append({
+    saved_searches = list(SavedSearch.objects.filter(recruiter=request.user))
+
+    # New matches of every search: counts and the first 5, from a fixed number of queries
+    summaries = new_match_summaries(saved_searches)
+    searches_with_matches = [
+        {
             'search': search,
-            'new_matches_count': new_matches.count(),
-            'new_matches': new_matches[:5]  # Show first 5 new matches
-        })
-    
+            'new_matches_count': summaries[search.id][0],
+            'new_matches': summaries[search.id][1],
+        }
+        for search in saved_searches
+    ]
+
     context = {
         "searches_with_matches": searches_with_matches,
     }
@@ -786,9 +932,8 @@ def run_saved_search(request, search_id):
     candidates = saved_search.get_matching_candidates()
     
     # Pagination
-    paginator = Paginator(candidates, 10)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(candidates, 10, ordering=CANDIDATE_ORDERING)
+    page_obj = paginator.get_page(request.GET.get("cursor"), params=request.GET)
     
     context = {
         "saved_search": saved_search,
@@ -827,31 +972,21 @@ def candidate_recommendations(request, job_id):
     if job.posted_by != request.user and not request.user.is_staff:
         return HttpResponseForbidden("You are not allowed to view recommendations for this job.")
 
-    # Extract keywords from job title, description, and requirements
-    job_keywords = set((job.title + " " + job.description + " " + job.requirements).lower().split())
-
-    # Find candidates with matching skills
-    # This is a simple implementation. For better performance on large datasets,
-    # consider a more advanced search solution like Elasticsearch.
-    skill_query = Q()
-    for keyword in job_keywords:
-        # This can be slow if job_keywords is large.
-        # A more refined approach would be to extract specific skills from the job text first.
-        skill_query |= Q(skills__name__icontains=keyword)
-
-    # Find all job seekers who have NOT already applied to this job
-    applied_user_ids = JobApplication.objects.filter(job=job).values_list('applicant_id', flat=True)
-
-    recommended_candidates = Profile.objects.filter(
-        role=Profile.Role.JOB_SEEKER
-    ).filter(skill_query).exclude(
-        user__id__in=applied_user_ids
-    ).distinct().select_related('user')
+    # Ranked (profile_id, score) pairs from the skill term index, bounded in size
+    ranked_candidates = recommend_candidates(job)
 
-    paginator = Paginator(recommended_candidates, 10)
+    paginator = Paginator(ranked_candidates, 10)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
 
+    # Only the profiles on this page are loaded
+    profiles = Profile.objects.select_related("user").prefetch_related("skills").in_bulk(
+        [profile_id for profile_id, _ in page_obj.object_list]
+    )
+    page_obj.object_list = [
+        profiles[profile_id] for profile_id, _ in page_obj.object_list if profile_id in profiles
+    ]
+
     context = {
         "job": job,
         "candidates": page_obj,
@@ -0,0 +1,108 @@
+"""
+Read replicas.
+
+Reads made while handling a request go to one of the aliases in
+``settings.DATABASE_REPLICAS``; writes always go to ``default``. So that
+people see their own changes straight away, a request is moved to the
+primary for the rest of its run as soon as it writes (or opens a
+transaction), and the browser that wrote keeps reading from the primary for
+``REPLICA_PIN_SECONDS`` afterwards, which should be longer than the
+replicas lag behind.
+
+Code running outside a request (management commands, the export worker,
+migrations) always uses the primary, and so does code filling a cache inside
+``primary_reads()``: a replica may not have the write that just invalidated
+the entry yet, and a value built from it would stay stale for as long as the
+entry lives.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "lockedin_primary"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Per request: whether reads must use the primary and whether it has
+# written. None outside requests.
+_request_state = ContextVar("lockedin_replica_state", default=None)
+
+
+def pin_to_primary():
+    """Read from the primary for the rest of the current request."""
+    state = _request_state.get()
+    if state is not None:
+        state["pinned"] = state["wrote"] = True
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, without pinning the browser."""
+    state = _request_state.get()
+    if state is None or state["pinned"]:
+        yield
+        return
+    state["pinned"] = True
+    try:
+        yield
+    finally:
+        # A write inside the block keeps the rest of the request on the primary
+        state["pinned"] = state["wrote"]
+
+
+def reads_from_primary():
+    state = _request_state.get()
+    return state is None or state["pinned"] or connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas or reads_from_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *getattr(settings, "DATABASE_REPLICAS", [])}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema with the data they copy from the primary
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Enables replica reads for safe requests from browsers that haven't
+    written recently, and marks the browser when a request writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unsafe = request.method not in SAFE_METHODS
+        state = {"pinned": unsafe or PIN_COOKIE in request.COOKIES, "wrote": False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if unsafe or state["wrote"]:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 10),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "lockedin.db_router.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -85,6 +87,49 @@ DATABASES = {
     }
 }
 
+# Read replicas: a comma-separated list of SQLite files in
+# LOCKEDIN_DB_REPLICAS, kept up to date with `manage.py refresh_replica`.
+# Reads made by requests go to them, writes to the primary (see
+# lockedin/db_router.py). Browsers that wrote keep reading from the primary
+# for REPLICA_PIN_SECONDS, which should cover the time between refreshes.
+
+DATABASE_REPLICAS = []
+for _number, _path in enumerate(
+    filter(None, os.environ.get("LOCKEDIN_DB_REPLICAS", "").split(",")), start=1
+):
+    DATABASE_REPLICAS.append(f"replica{_number}")
+    DATABASES[f"replica{_number}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": _path.strip(),
+        "OPTIONS": {"init_command": "PRAGMA query_only = ON;"},
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["lockedin.db_router.PrimaryReplicaRouter"]
+
+REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Derived data (map clusters, search snapshots, ...) is invalidated through
+# version counters in this cache, so every worker process must share it in
+# production, e.g. with Redis or Memcached.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
+# Messaging push events
+# With more than one server process, point this at a directory all of them
+# can write to; new-message events are relayed between processes through Unix
+# sockets in it (see messaging/events.py).
+
+MESSAGING_EVENTS_SOCKET_DIR = os.environ.get("MESSAGING_EVENTS_SOCKET_DIR")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -133,3 +178,24 @@ STATICFILES_DIRS = [
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
+
+# Where management commands keep their progress files, so interrupted runs
+# can resume (see check_saved_searches)
+CHECKPOINT_DIR = os.environ.get("LOCKEDIN_CHECKPOINT_DIR", tempfile.gettempdir())
+
+# Hours a finished background export stays available for download
+EXPORT_RETENTION_HOURS = 24
+
+# Minutes without progress after which a running background export is taken
+# to have lost its worker and is marked as failed. Running exports report
+# progress at least every EXPORT_HEARTBEAT_SECONDS, however long they take.
+EXPORT_TIMEOUT_MINUTES = 10
+EXPORT_HEARTBEAT_SECONDS = 30
+
+# Seconds a job seeker's home page recommendations are cached; they are
+# also dropped whenever the seeker's skills or applications change
+RECOMMENDATIONS_CACHE_SECONDS = 15 * 60
+
+# Upper bound on how long a rendered profile page is cached; edits made
+# through the site drop it straight away
+PROFILE_PAGE_CACHE_SECONDS = 60 * 60
@@ -0,0 +1,330 @@
+"""
+Test helpers for checking the queries views run.
+
+``QueryPlanTestCase.assertNoFullScan`` requests a page, runs SQLite's
+``EXPLAIN QUERY PLAN`` on every query the request made and fails if any of
+them reads one of the given tables in full. Walking a (partial) index in
+order, as the paginated lists do, is fine; a bare ``SCAN <table>`` is not.
+The cache is cleared before each test so pages run their queries.
+
+``RouteBudgetTests`` requests every route of a URLconf as each role on a
+seeded dataset, on a cold and then a warm cache, and again after adding
+rows to every list the pages show. It fails when a request exceeds its
+route's query budget (or time budget, where one is set), or runs more
+queries on the larger dataset (an N+1 query).
+"""
+from collections import namedtuple
+import datetime
+from importlib import import_module
+import time
+from types import SimpleNamespace
+import unittest
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "INSERT")
+
+
+def explain(sql, params=None):
+    """The detail column of SQLite's query plan for ``sql``, one line per step."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan, tables):
+    """Steps of ``plan`` that read one of ``tables`` without an index."""
+    scans = []
+    for step in plan:
+        words = step.split()
+        if len(words) >= 2 and words[0] == "SCAN" and words[1] in tables and "USING" not in words:
+            scans.append(step)
+    return scans
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "Query plans are checked on SQLite")
+class QueryPlanTestCase(TestCase):
+    def setUp(self):
+        # Cached pages would hide their queries
+        cache.clear()
+
+    def assertNoFullScan(self, tables, path, data=None, client=None):
+        """
+        GET ``path`` and check that none of its queries scans ``tables``.
+        Returns the response.
+        """
+        client = client or self.client
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path, data)
+        self.assertLess(response.status_code, 400, f"GET {path} failed")
+        checked = 0
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith(EXPLAINABLE):
+                continue
+            checked += 1
+            scans = full_scans(explain(sql), set(tables))
+            self.assertFalse(scans, f"GET {path} scans {', '.join(scans)}:\n{sql}")
+        self.assertTrue(checked, f"GET {path} ran no queries")
+        return response
+
+    def assertQueryNoFullScan(self, queryset, tables):
+        sql, params = queryset.query.sql_with_params()
+        scans = full_scans(explain(sql, params), set(tables))
+        self.assertFalse(scans, f"Query scans {', '.join(scans)}:\n{sql}")
+
+    def assertQueryUsesIndex(self, queryset, index_name, sorted_by_index=True):
+        """
+        Check that ``queryset`` reads through ``index_name`` and, if
+        ``sorted_by_index``, needs no separate sort for its ORDER BY.
+        """
+        sql, params = queryset.query.sql_with_params()
+        plan = explain(sql, params)
+        self.assertTrue(
+            any(f"INDEX {index_name}" in step for step in plan),
+            f"Query doesn't use {index_name}:\n" + "\n".join(plan),
+        )
+        if sorted_by_index:
+            self.assertFalse(
+                any("TEMP B-TREE FOR ORDER BY" in step for step in plan),
+                "Query sorts its rows:\n" + "\n".join(plan),
+            )
+
+
+# ``queries``: most queries one request may run on a cold cache, whatever the
+# role; ``warm``: the most once the pages' caches are filled (the cold budget
+# if None); ``milliseconds``: the longest one request may take. Wall time
+# depends on the machine running the tests, so it is only checked where set.
+Budget = namedtuple("Budget", "queries warm milliseconds", defaults=(None, None))
+
+ROLES = ("anonymous", "seeker", "recruiter", "admin")
+
+
+def seed_dataset(size):
+    """
+    A dataset with one user per role, the objects routes are requested for
+    (``job``, ``application``, ``search``, ``message``, ``export``) and
+    ``size`` rows in every list; see ``grow_dataset``.
+    """
+    from accounts.models import Profile
+    from home.models import Company, ExportJob, Job, JobApplication, SavedSearch
+    from messaging.models import Message
+
+    data = SimpleNamespace(rows=0)
+    data.seeker = User.objects.create_user("seeker", password="password")
+    data.recruiter = User.objects.create_user("recruiter", password="password")
+    data.admin = User.objects.create_user("admin", password="password", is_staff=True, is_superuser=True)
+    for user, role in [(data.recruiter, Profile.Role.RECRUITER), (data.admin, Profile.Role.ADMINISTRATOR)]:
+        user.profile.role = role
+        user.profile.save()
+    data.seeker.profile.location = "Atlanta, GA"
+    data.seeker.profile.latitude, data.seeker.profile.longitude = 33.75, -84.39
+    data.seeker.profile.save()
+
+    data.company = Company.objects.create(name="Initech", location="Atlanta, GA", logo="", owner=data.recruiter)
+    data.job = Job.objects.create(
+        title="Python Developer",
+        company=data.company,
+        description="Build web applications with Python and Django.",
+        requirements="Python, Django, SQL",
+        location="Atlanta, GA",
+        latitude=33.75,
+        longitude=-84.39,
+        posted_by=data.recruiter,
+    )
+    data.application = JobApplication.objects.create(job=data.job, applicant=data.seeker)
+    data.search = SavedSearch.objects.create(
+        name="Python developers", recruiter=data.recruiter, skills_query="python", location="atlanta"
+    )
+    data.message = Message.objects.create(
+        sender=data.recruiter, receiver=data.seeker, subject="Hello", content="Are you available?"
+    )
+    data.export = ExportJob.objects.create(requested_by=data.admin, model_key="jobs", export_format="csv")
+    grow_dataset(data, size)
+    return data
+
+
+def grow_dataset(data, count):
+    """
+    Add ``count`` rows to every list a page of the dataset shows: jobs,
+    job seekers (with skills, education and experience) applying to the
+    recruiter's job, the seeker's applications, profile sections and
+    messages, saved searches and exports.
+    """
+    from accounts.models import Education, Experience, Link, Profile, Skill
+    from home.models import Company, ExportJob, Job, JobApplication, SavedSearch
+    from messaging.models import Message
+
+    statuses = JobApplication.ApplicationStatus.values
+    for number in range(data.rows, data.rows + count):
+        company = Company.objects.create(name=f"Company {number}", location="Atlanta, GA", logo="")
+        job = Job.objects.create(
+            title=f"Python Engineer {number}",
+            company=company,
+            description="Python services",
+            requirements="Python",
+            location="Atlanta, GA",
+            latitude=33.75 + number / 1000,
+            longitude=-84.39,
+            salary_min=60000,
+            salary_max=70000,
+            posted_by=data.recruiter,
+        )
+        JobApplication.objects.create(job=job, applicant=data.seeker)
+
+        candidate = User.objects.create_user(f"candidate{number}", password="password")
+        profile = candidate.profile
+        profile.name = f"Candidate {number}"
+        profile.location = "Atlanta, GA"
+        profile.latitude, profile.longitude = 33.75, -84.39 + number / 1000
+        profile.skills_visibility = Profile.SectionVisibility.PUBLIC
+        profile.save()
+        Skill.objects.create(profile=profile, name="Python")
+        Skill.objects.create(profile=profile, name=f"Skill {number}")
+        Education.objects.create(profile=profile, school="Georgia Tech", degree="BS Computer Science")
+        Experience.objects.create(
+            profile=profile,
+            company=f"Company {number}",
+            title="Engineer",
+            is_current=True,
+            start_year=datetime.date(2015 + number % 5, 1, 1),
+        )
+        JobApplication.objects.create(
+            job=data.job, applicant=candidate, status=statuses[number % len(statuses)]
+        )
+        Message.objects.create(sender=candidate, receiver=data.recruiter, subject="Application", content="Hi")
+        Message.objects.create(sender=candidate, receiver=data.seeker, subject="Hello", content="Hi")
+
+        profile = data.seeker.profile
+        Skill.objects.create(profile=profile, name=f"Language {number}")
+        Education.objects.create(profile=profile, school=f"School {number}", degree="BS")
+        Experience.objects.create(profile=profile, company=f"Employer {number}", title="Developer")
+        Link.objects.create(profile=profile, url=f"https://example.com/{number}", label=f"Link {number}")
+        Message.objects.create(sender=data.seeker, receiver=data.recruiter, subject="Re: Hello", content="Yes")
+        Message.objects.create(sender=data.recruiter, receiver=data.seeker, subject="Re: Hello", content="Great")
+
+        SavedSearch.objects.create(name=f"Search {number}", recruiter=data.recruiter, skills_query="python")
+        ExportJob.objects.create(requested_by=data.admin, model_key="jobs", export_format="csv")
+    data.rows += count
+
+
+Measurement = namedtuple("Measurement", "status queries milliseconds")
+
+# Measurements of one route as one role
+Measurements = namedtuple("Measurements", "cold warm")
+
+
+class RouteBudgetTests:
+    """
+    Mixin for ``TestCase``s that set ``urlconf`` to a module with
+    ``urlpatterns``, ``budgets`` to ``{route name: Budget}`` for every named
+    route in it (None for routes that can't be requested this way, such as
+    streams) and ``params`` to the query parameters of some routes, and
+    override ``url_values(data)`` to give the value of each URL parameter
+    when its routes take any. Budgets cover the heaviest role, so they
+    include the session, user, profile and unread-counter queries of
+    signed-in pages.
+
+    Each route is requested on a cold cache and then again on the cache
+    the first request filled, each time in a savepoint that is rolled back
+    so routes that change data on GET don't affect the others.
+    """
+
+    urlconf = None
+    budgets = {}
+    params = {}
+    size = 3
+    added_rows = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.data = seed_dataset(cls.size)
+
+    def url_values(self, data):
+        return {}
+
+    def query_params(self, name, data):
+        return self.params.get(name)
+
+    def routes(self):
+        return {pattern.name: pattern for pattern in import_module(self.urlconf).urlpatterns if pattern.name}
+
+    def login(self, role):
+        self.client.logout()
+        if role != "anonymous":
+            self.client.force_login(getattr(self.data, role))
+
+    def path(self, pattern):
+        values = self.url_values(self.data)
+        missing = set(pattern.pattern.converters) - set(values)
+        self.assertFalse(missing, f"url_values() gives no {', '.join(sorted(missing))} for {pattern.name}")
+        return reverse(pattern.name, kwargs={name: values[name] for name in pattern.pattern.converters})
+
+    def request(self, pattern, role):
+        path = self.path(pattern)
+        # Signing in again, as routes such as logout end the session
+        self.login(role)
+        savepoint = transaction.savepoint()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = self.client.get(path, self.query_params(pattern.name, self.data))
+                milliseconds = (time.perf_counter() - started) * 1000
+        finally:
+            transaction.savepoint_rollback(savepoint)
+        self.assertLess(response.status_code, 500, f"GET {path} as {role} failed")
+        return Measurement(response.status_code, len(queries), milliseconds)
+
+    def measure(self, pattern, role):
+        cache.clear()
+        cold = self.request(pattern, role)
+        return Measurements(cold, self.request(pattern, role))
+
+    def measure_routes(self):
+        routes = self.routes()
+        return {
+            (name, role): self.measure(routes[name], role)
+            for name, budget in self.budgets.items()
+            if budget is not None
+            for role in ROLES
+        }
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(set(self.routes()) - set(self.budgets), set(), "Routes without a budget")
+
+    def test_routes_stay_within_budget(self):
+        small = self.measure_routes()
+        with self.captureOnCommitCallbacks(execute=True):
+            grow_dataset(self.data, self.added_rows)
+        large = self.measure_routes()
+
+        for (name, role), measurements in large.items():
+            budget = self.budgets[name]
+            queries = {"cold": budget.queries, "warm": budget.queries if budget.warm is None else budget.warm}
+            for cache_state, limit in queries.items():
+                measurement = getattr(measurements, cache_state)
+                before = getattr(small[name, role], cache_state)
+                with self.subTest(route=name, role=role, cache=cache_state):
+                    self.assertLessEqual(
+                        measurement.queries,
+                        before.queries,
+                        f"{name} as {role} on a {cache_state} cache ran {measurement.queries} queries with "
+                        f"{self.size + self.added_rows} rows per list, {before.queries} with {self.size}",
+                    )
+                    self.assertLessEqual(
+                        max(measurement.queries, before.queries),
+                        limit,
+                        f"{name} as {role} is over its {cache_state} query budget",
+                    )
+                    if budget.milliseconds is not None:
+                        self.assertLessEqual(
+                            measurement.milliseconds,
+                            budget.milliseconds,
+                            f"{name} as {role} on a {cache_state} cache took {measurement.milliseconds:.0f} ms",
+                        )
@@ -0,0 +1,80 @@
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .db_router import PIN_COOKIE, PrimaryReplicaRouter, ReplicaPinningMiddleware, primary_reads
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], REPLICA_PIN_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def handle(self, request, write=False):
+        """
+        Run ``request`` through the middleware. Returns the response and the
+        databases read from before and after the view's write, if any.
+        """
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(User))
+            if write:
+                self.router.db_for_write(User)
+                reads.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(request)
+        return response, reads
+
+    def test_reads_go_to_a_replica(self):
+        response, reads = self.handle(self.factory.get("/"))
+        self.assertEqual(reads, ["replica1"])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        response, reads = self.handle(self.factory.get("/"), write=True)
+        self.assertEqual(reads, ["replica1", DEFAULT_DB_ALIAS])
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 10)
+
+    def test_unsafe_requests_use_the_primary(self):
+        response, reads = self.handle(self.factory.post("/"))
+        self.assertEqual(reads, [DEFAULT_DB_ALIAS])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_pin_cookie_keeps_reads_on_the_primary(self):
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = "1"
+        _, reads = self.handle(request)
+        self.assertEqual(reads, [DEFAULT_DB_ALIAS])
+
+    def test_cache_fills_read_from_the_primary(self):
+        reads = []
+
+        def view(request):
+            with primary_reads():
+                reads.append(self.router.db_for_read(User))
+            reads.append(self.router.db_for_read(User))
+            with primary_reads():
+                self.router.db_for_write(User)
+            reads.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(self.factory.get("/"))
+        self.assertEqual(reads, [DEFAULT_DB_ALIAS, "replica1", DEFAULT_DB_ALIAS])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        _, reads = self.handle(self.factory.get("/"))
+        self.assertEqual(reads, [DEFAULT_DB_ALIAS])
+
+    def test_writes_always_go_to_the_primary(self):
+        self.assertEqual(self.router.db_for_write(User), DEFAULT_DB_ALIAS)
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, "home"))
+        self.assertFalse(self.router.allow_migrate("replica1", "home"))
@@ -1,13 +1,19 @@
-from .models import Message
+from .counters import get_unread_count
 
 
 def unread_messages_count(request):
-    """Add unread messages count to all templates"""
+    """
+    Add unread messages count to all templates. The template gets a callable,
+    so the count is only looked up when a page actually shows it.
+    """
     if request.user.is_authenticated:
-        unread_count = Message.objects.filter(
-            receiver=request.user,
-            is_read=False
-        ).count()
+        user_id = request.user.id
+        cached = []
+
+        def unread_count():
+            if not cached:
+                cached.append(get_unread_count(user_id))
+            return cached[0]
+
         return {'unread_messages_count': unread_count}
     return {'unread_messages_count': 0}
-
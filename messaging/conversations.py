@@ -0,0 +1,57 @@
+"""
+Maintenance of the ``Conversation`` summary rows behind the inbox.
+"""
+from django.db.models import F, Q
+
+from .models import Conversation, Message
+
+
+def refresh_conversation(owner_id, partner_id, using='default'):
+    """
+    Recompute ``owner``'s summary of the conversation with ``partner`` from
+    the messages table, creating or deleting the row as needed.
+    """
+    messages = Message.objects.using(using).filter(
+        Q(sender_id=owner_id, receiver_id=partner_id) |
+        Q(sender_id=partner_id, receiver_id=owner_id)
+    )
+    last_message = messages.order_by('-timestamp', '-id').only('id', 'timestamp').first()
+    conversations = Conversation.objects.using(using)
+    if last_message is None:
+        conversations.filter(owner_id=owner_id, partner_id=partner_id).delete()
+        return
+    unread_count = messages.filter(receiver_id=owner_id, is_read=False).count()
+    conversations.update_or_create(
+        owner_id=owner_id,
+        partner_id=partner_id,
+        defaults={
+            'last_message': last_message,
+            'last_message_at': last_message.timestamp,
+            'unread_count': unread_count,
+        },
+    )
+
+
+def record_message(message, using='default'):
+    """Move a newly sent message to the top of both sides of the conversation."""
+    sides = [
+        (message.sender_id, message.receiver_id, 0),
+        (message.receiver_id, message.sender_id, 0 if message.is_read else 1),
+    ]
+    for owner_id, partner_id, unread in sides:
+        updated = Conversation.objects.using(using).filter(
+            owner_id=owner_id, partner_id=partner_id
+        ).update(
+            last_message=message,
+            last_message_at=message.timestamp,
+            unread_count=F('unread_count') + unread,
+        )
+        if not updated:
+            refresh_conversation(owner_id, partner_id, using=using)
+
+
+def adjust_unread(owner_id, partner_id, delta, using='default'):
+    if delta:
+        Conversation.objects.using(using).filter(
+            owner_id=owner_id, partner_id=partner_id
+        ).update(unread_count=F('unread_count') + delta)
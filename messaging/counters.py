@@ -0,0 +1,61 @@
+"""
+Per-user unread message counts.
+
+The count lives in ``UnreadCounter`` and is cached, so the navigation badge
+costs no query on most requests. Writers adjust the row with an atomic
+UPDATE and drop the cached value once their transaction commits. A missing
+row is rebuilt from the messages table by the next writer; until then reads
+count the messages without writing anything.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from lockedin.db_router import primary_reads
+
+from .models import Message, UnreadCounter
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def _cache_key(user_id):
+    return f"messaging:unread:{user_id}"
+
+
+def _invalidate(user_id, using):
+    transaction.on_commit(lambda: cache.delete(_cache_key(user_id)), using=using)
+
+
+def get_unread_count(user_id):
+    key = _cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        with primary_reads():
+            count = UnreadCounter.objects.filter(user_id=user_id).values_list('count', flat=True).first()
+            if count is None:
+                count = Message.objects.filter(receiver_id=user_id, is_read=False).count()
+        cache.set(key, count, CACHE_TIMEOUT)
+    return count
+
+
+def recount(user_id, using='default'):
+    """Rebuild the counter from the messages table."""
+    count = Message.objects.using(using).filter(receiver_id=user_id, is_read=False).count()
+    UnreadCounter.objects.using(using).update_or_create(user_id=user_id, defaults={'count': count})
+    return count
+
+
+def adjust_unread_count(user_id, delta, using='default'):
+    """Add ``delta`` (negative when messages are read or deleted) to the counter."""
+    if not delta:
+        return
+    updated = UnreadCounter.objects.using(using).filter(user_id=user_id).update(count=F('count') + delta)
+    if not updated:
+        recount(user_id, using=using)
+    _invalidate(user_id, using)
+
+
+def reset_unread_count(user_id, using='default'):
+    """Forget the counter when its exact change is unknown; the next read recounts."""
+    UnreadCounter.objects.using(using).filter(user_id=user_id).delete()
+    _invalidate(user_id, using)
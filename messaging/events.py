@@ -0,0 +1,157 @@
+"""
+Push notifications for new messages.
+
+``hub`` fans events out to the event streams (``views.message_stream``) open
+in this process: each stream owns an asyncio queue, and publishing only
+touches those queues, so an idle stream costs no database queries.
+
+When several server processes run, set ``MESSAGING_EVENTS_SOCKET_DIR`` to a
+directory they share. Every process that serves streams binds a Unix
+datagram socket there, and each publish is also sent to the other processes'
+sockets, which replay it into their own hub.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Largest event sent between processes; events are small JSON objects
+MAX_DATAGRAM_SIZE = 64 * 1024
+# Events waiting for a slow client before it misses some
+QUEUE_SIZE = 100
+
+
+class Hub:
+    def __init__(self, socket_dir=None):
+        self.socket_dir = socket_dir
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, user_id):
+        """
+        Register a stream for ``user_id`` on the running event loop. Returns
+        the queue its events arrive on; pass it to ``unsubscribe`` when done.
+        """
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((loop, queue))
+        if self.socket_dir:
+            self._start_listener()
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id, event):
+        """Send ``event`` to every stream of ``user_id``, here and in other processes."""
+        self.publish_local(user_id, event)
+        if self.socket_dir:
+            self._broadcast({"user_id": user_id, "event": event})
+
+    def publish_local(self, user_id, event):
+        # Called from any thread: hand the event to each stream's own loop
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # The loop has closed; its stream is gone
+                self.unsubscribe(user_id, queue)
+
+    @staticmethod
+    def _deliver(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("Dropping message event for a slow event stream")
+
+    # Fan-out between processes
+
+    def _socket_path(self, pid=None):
+        return os.path.join(self.socket_dir, f"{pid or os.getpid()}.sock")
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            path = self._socket_path()
+            os.makedirs(self.socket_dir, exist_ok=True)
+            if os.path.exists(path):
+                os.remove(path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(path)
+            self._listener = threading.Thread(
+                target=self._listen, args=(sock,), name="messaging-events", daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self, sock):
+        while True:
+            data = sock.recv(MAX_DATAGRAM_SIZE)
+            try:
+                payload = json.loads(data)
+                self.publish_local(payload["user_id"], payload["event"])
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Ignoring malformed message event datagram")
+
+    def _broadcast(self, payload):
+        data = json.dumps(payload).encode()
+        own_path = self._socket_path()
+        try:
+            names = os.listdir(self.socket_dir)
+        except FileNotFoundError:
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            for name in names:
+                path = os.path.join(self.socket_dir, name)
+                if not name.endswith(".sock") or path == own_path:
+                    continue
+                try:
+                    sock.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Left behind by a process that has exited
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                except BlockingIOError:
+                    logger.warning("Message event dropped: %s is not keeping up", path)
+
+
+hub = Hub(getattr(settings, "MESSAGING_EVENTS_SOCKET_DIR", None))
+
+
+def message_event(message):
+    return {
+        "type": "message",
+        "id": message.id,
+        "sender": message.sender.username,
+        "receiver": message.receiver.username,
+        "subject": message.subject,
+        "timestamp": message.timestamp.isoformat(),
+    }
+
+
+def publish_message(message):
+    """Notify the receiver's and the sender's open streams once the message is committed."""
+    event = message_event(message)
+
+    def publish():
+        hub.publish(message.receiver_id, event)
+        hub.publish(message.sender_id, event)
+
+    transaction.on_commit(publish)
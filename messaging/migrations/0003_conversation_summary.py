@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def summarize_conversations(apps, schema_editor):
+    Message = apps.get_model("messaging", "Message")
+    Conversation = apps.get_model("messaging", "Conversation")
+    db = schema_editor.connection.alias
+    summaries = {}
+    messages = Message.objects.using(db).order_by("timestamp", "id").values_list(
+        "id", "sender_id", "receiver_id", "timestamp", "is_read"
+    )
+    for message_id, sender_id, receiver_id, timestamp, is_read in messages.iterator():
+        for owner_id, partner_id in ((sender_id, receiver_id), (receiver_id, sender_id)):
+            summary = summaries.setdefault(
+                (owner_id, partner_id),
+                Conversation(owner_id=owner_id, partner_id=partner_id, unread_count=0),
+            )
+            summary.last_message_id = message_id
+            summary.last_message_at = timestamp
+        if not is_read:
+            summaries[(receiver_id, sender_id)].unread_count += 1
+    Conversation.objects.using(db).bulk_create(summaries.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_unread_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField()),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_message', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL)),
+                ('partner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', '-last_message_at', '-id'], name='conversation_inbox_idx')],
+                'unique_together': {('owner', 'partner')},
+            },
+        ),
+        migrations.RunPython(summarize_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_conversation_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['receiver'], name='message_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', 'receiver', '-timestamp', '-id'], name='message_thread_idx'),
+        ),
+    ]
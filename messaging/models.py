@@ -13,6 +13,13 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Unread counts. Partial, as SQLite can't seek on a boolean
+            # filtered with NOT "is_read"
+            models.Index(fields=['receiver'], condition=models.Q(is_read=False), name='message_unread_idx'),
+            # Messages between two users, newest first
+            models.Index(fields=['sender', 'receiver', '-timestamp', '-id'], name='message_thread_idx'),
+        ]
 
     def __str__(self):
         return f"From {self.sender.username} to {self.receiver.username}: {self.subject}"
@@ -20,4 +27,50 @@ class Message(models.Model):
     def mark_as_read(self):
         if not self.is_read:
             self.is_read = True
-            self.save()
+            self.save(update_fields=['is_read'])
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the read state so saves can keep the unread counters exact
+        if 'is_read' in field_names:
+            instance._loaded_is_read = instance.is_read
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_is_read = self.is_read
+
+
+class UnreadCounter(models.Model):
+    """
+    Number of unread messages received by a user, kept up to date by
+    ``messaging.signals`` and read through ``messaging.counters``.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter')
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count} unread"
+
+
+class Conversation(models.Model):
+    """
+    One user's side of a conversation: the latest message exchanged with
+    ``partner`` and how many of the partner's messages ``owner`` hasn't read.
+    Each pair of users has two rows, kept up to date by ``messaging.signals``.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations')
+    partner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, related_name='+')
+    last_message_at = models.DateTimeField()
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['owner', 'partner']
+        indexes = [
+            models.Index(fields=['owner', '-last_message_at', '-id'], name='conversation_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id} <-> {self.partner_id}"
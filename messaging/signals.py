@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Message
+from . import conversations, counters
+
+
+@receiver(post_save, sender=Message)
+def count_unread_on_save(sender, instance, created, using, **kwargs):
+    """Keep the receiver's unread counter in step with the message's read state."""
+    if created:
+        if not instance.is_read:
+            counters.adjust_unread_count(instance.receiver_id, 1, using=using)
+        return
+    was_read = getattr(instance, '_loaded_is_read', None)
+    if was_read is None:
+        counters.reset_unread_count(instance.receiver_id, using=using)
+    elif was_read != instance.is_read:
+        counters.adjust_unread_count(instance.receiver_id, -1 if instance.is_read else 1, using=using)
+
+
+@receiver(post_delete, sender=Message)
+def count_unread_on_delete(sender, instance, using, **kwargs):
+    # The receiver's own counter is deleted along with the receiver
+    origin = kwargs.get('origin')
+    if isinstance(origin, User) and origin.id == instance.receiver_id:
+        return
+    if not instance.is_read:
+        counters.adjust_unread_count(instance.receiver_id, -1, using=using)
+
+
+@receiver(post_save, sender=Message)
+def update_conversation_on_save(sender, instance, created, using, **kwargs):
+    """Keep both users' inbox summaries in step with the message."""
+    if created:
+        conversations.record_message(instance, using=using)
+        return
+    was_read = getattr(instance, '_loaded_is_read', None)
+    if was_read is None:
+        conversations.refresh_conversation(instance.receiver_id, instance.sender_id, using=using)
+    elif was_read != instance.is_read:
+        conversations.adjust_unread(
+            instance.receiver_id, instance.sender_id, -1 if instance.is_read else 1, using=using
+        )
+
+
+@receiver(post_delete, sender=Message)
+def update_conversation_on_delete(sender, instance, using, **kwargs):
+    # Both summaries go with either user
+    origin = kwargs.get('origin')
+    if isinstance(origin, User) and origin.id in (instance.sender_id, instance.receiver_id):
+        return
+    conversations.refresh_conversation(instance.sender_id, instance.receiver_id, using=using)
+    conversations.refresh_conversation(instance.receiver_id, instance.sender_id, using=using)
@@ -0,0 +1,86 @@
+import re
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from . import views
+from .models import Message
+
+
+@mock.patch.object(views, "CONVERSATION_PAGE_SIZE", 3)
+class ConversationLoadingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="password")
+        cls.bob = User.objects.create_user("bob", password="password")
+        cls.carol = User.objects.create_user("carol", password="password")
+        cls.thread = [
+            Message.objects.create(
+                sender=sender, receiver=receiver, subject="Interview" if number == 0 else "Re: Interview",
+                content=f"Message {number}",
+            )
+            for number, (sender, receiver) in enumerate([(cls.alice, cls.bob), (cls.bob, cls.alice)] * 4)
+        ]
+        Message.objects.create(sender=cls.carol, receiver=cls.bob, subject="Hello", content="Unrelated")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.bob)
+
+    def url(self, name, user=None):
+        return reverse(name, args=[(user or self.alice).username])
+
+    def rendered_ids(self, html):
+        return [int(message_id) for message_id in re.findall(r'data-message-id="(\d+)"', html)]
+
+    def test_conversation_renders_the_newest_messages_oldest_first(self):
+        response = self.client.get(self.url("messaging.conversation"))
+        self.assertEqual(response.context["conversation_messages"], self.thread[-3:])
+        self.assertIsNotNone(response.context["history_cursor"])
+
+    def test_history_pages_back_to_the_first_message(self):
+        cursor = self.client.get(self.url("messaging.conversation")).context["history_cursor"]
+        loaded = []
+        while cursor:
+            data = self.client.get(self.url("messaging.conversation_history"), {"cursor": cursor}).json()
+            loaded = self.rendered_ids(data["html"]) + loaded
+            cursor = data["cursor"]
+        self.assertEqual(loaded, [message.id for message in self.thread[:-3]])
+
+    def test_history_needs_a_cursor(self):
+        self.assertEqual(self.client.get(self.url("messaging.conversation_history")).status_code, 400)
+
+    def test_updates_return_newer_messages_and_mark_them_read(self):
+        self.client.get(self.url("messaging.conversation"))
+        last_seen = self.thread[-1].id
+        self.assertEqual(
+            self.client.get(self.url("messaging.conversation_updates"), {"after": last_seen}).json()["messages"], []
+        )
+
+        reply = Message.objects.create(sender=self.alice, receiver=self.bob, subject="Re: Interview", content="Noon?")
+        data = self.client.get(self.url("messaging.conversation_updates"), {"after": last_seen}).json()
+        self.assertEqual(
+            [(message["id"], message["sender"], message["content"]) for message in data["messages"]],
+            [(reply.id, "alice", "Noon?")],
+        )
+        self.assertEqual(data["last_id"], reply.id)
+        self.assertEqual(self.rendered_ids(data["html"]), [reply.id])
+        reply.refresh_from_db()
+        self.assertTrue(reply.is_read)
+
+    def test_updates_only_show_the_users_own_conversation(self):
+        self.client.force_login(self.carol)
+        data = self.client.get(self.url("messaging.conversation_updates"), {"after": 0}).json()
+        self.assertEqual(data["messages"], [])
+
+    def test_invalid_update_ids_are_rejected(self):
+        response = self.client.get(self.url("messaging.conversation_updates"), {"after": "latest"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_replies_take_the_first_subject(self):
+        self.client.post(self.url("messaging.conversation"), {"content": "See you then"})
+        reply = Message.objects.get(content="See you then")
+        self.assertEqual((reply.sender, reply.receiver, reply.subject), (self.bob, self.alice, "Re: Interview"))
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from . import events, views
+
+EVENT = {"type": "message", "id": 7, "sender": "alice", "receiver": "bob", "subject": "Hi", "timestamp": "now"}
+
+
+class HubTests(SimpleTestCase):
+    async def test_events_reach_every_stream_of_the_user(self):
+        hub = events.Hub()
+        first, second, other = hub.subscribe(1), hub.subscribe(1), hub.subscribe(2)
+        # Publishers run in request threads, not on the streams' loop
+        thread = threading.Thread(target=hub.publish, args=(1, EVENT))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(await asyncio.wait_for(first.get(), 5), EVENT)
+        self.assertEqual(await asyncio.wait_for(second.get(), 5), EVENT)
+        self.assertTrue(other.empty())
+
+    async def test_closed_streams_get_nothing(self):
+        hub = events.Hub()
+        queue = hub.subscribe(1)
+        hub.unsubscribe(1, queue)
+        hub.publish(1, EVENT)
+        await asyncio.sleep(0)
+        self.assertTrue(queue.empty())
+
+    @mock.patch.object(events, "QUEUE_SIZE", 1)
+    async def test_slow_streams_miss_events(self):
+        hub = events.Hub()
+        queue = hub.subscribe(1)
+        with self.assertLogs(events.logger, "WARNING"):
+            hub.publish(1, EVENT)
+            hub.publish(1, {**EVENT, "id": 8})
+            await asyncio.sleep(0)
+        self.assertEqual(queue.qsize(), 1)
+        self.assertEqual(queue.get_nowait(), EVENT)
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Processes share events over Unix sockets")
+class ProcessFanOutTests(SimpleTestCase):
+    def setUp(self):
+        self.socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.socket_dir)
+
+    def bind(self, name):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(os.path.join(self.socket_dir, name))
+        return sock
+
+    def test_publishes_reach_the_other_processes(self):
+        with self.bind("999999.sock") as other:
+            other.settimeout(5)
+            events.Hub(self.socket_dir).publish(1, EVENT)
+            self.assertEqual(json.loads(other.recv(events.MAX_DATAGRAM_SIZE)), {"user_id": 1, "event": EVENT})
+
+    def test_sockets_of_exited_processes_are_removed(self):
+        self.bind("999999.sock").close()
+        events.Hub(self.socket_dir).publish(1, EVENT)
+        self.assertEqual(os.listdir(self.socket_dir), [])
+
+    async def test_events_from_other_processes_reach_local_streams(self):
+        hub = events.Hub(self.socket_dir)
+        queue = hub.subscribe(1)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as other:
+            with self.assertLogs(events.logger, "WARNING"):
+                other.sendto(b"not json", hub._socket_path())
+                other.sendto(json.dumps({"user_id": 1, "event": EVENT}).encode(), hub._socket_path())
+                self.assertEqual(await asyncio.wait_for(queue.get(), 5), EVENT)
+
+
+class PublishMessageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="password")
+        cls.bob = User.objects.create_user("bob", password="password")
+
+    @mock.patch.object(events.hub, "publish")
+    def test_sent_messages_are_published_to_both_users_on_commit(self, publish):
+        self.client.force_login(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("messaging.compose"), {"receiver": self.bob.id, "subject": "Hi", "content": "Hello"}
+            )
+            publish.assert_not_called()
+
+        event = publish.call_args.args[1]
+        self.assertEqual(
+            publish.call_args_list, [mock.call(self.bob.id, event), mock.call(self.alice.id, event)]
+        )
+        self.assertEqual((event["type"], event["sender"], event["receiver"]), ("message", "alice", "bob"))
+
+
+class MessageStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bob = User.objects.create_user("bob", password="password")
+
+    def test_wsgi_tells_browsers_not_to_reconnect(self):
+        self.client.force_login(self.bob)
+        self.assertEqual(self.client.get(reverse("messaging.events")).status_code, 204)
+
+    @mock.patch.object(views, "STREAM_KEEPALIVE", 0.05)
+    async def test_asgi_streams_published_events(self):
+        hub = events.Hub()
+        await self.async_client.aforce_login(self.bob)
+        with mock.patch.object(views, "hub", hub):
+            response = await self.async_client.get(reverse("messaging.events"))
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            stream = aiter(response.streaming_content)
+            self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+
+            # Idle streams only send keep-alive comments
+            self.assertEqual(await asyncio.wait_for(anext(stream), 5), b": keepalive\n\n")
+            hub.publish(self.bob.id, EVENT)
+            self.assertEqual(
+                await asyncio.wait_for(anext(stream), 5),
+                f"event: message\nid: 7\ndata: {json.dumps(EVENT)}\n\n".encode(),
+            )
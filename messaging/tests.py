@@ -1,3 +1,205 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from home.pagination import KeysetPaginator
+from lockedin.testing import Budget, QueryPlanTestCase, RouteBudgetTests
+
+from . import counters
+from .models import Conversation, Message, UnreadCounter
+from .views import conversation_queryset
+
+HOT_TABLES = {"messaging_message", "messaging_conversation", "messaging_unreadcounter", "auth_user"}
+
+
+class MessagingQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="password")
+        cls.bob = User.objects.create_user("bob", password="password")
+        for number in range(3):
+            Message.objects.create(sender=cls.alice, receiver=cls.bob, subject="Hi", content=f"Hello {number}")
+            Message.objects.create(sender=cls.bob, receiver=cls.alice, subject="Re: Hi", content=f"Hey {number}")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.bob)
+
+    def test_inbox(self):
+        self.assertNoFullScan(HOT_TABLES, reverse("messaging.inbox"))
+
+    def test_conversation(self):
+        self.assertNoFullScan(HOT_TABLES, reverse("messaging.conversation", args=["alice"]))
+        cursor = KeysetPaginator(conversation_queryset(self.bob, self.alice), 2).get_page().next_cursor
+        self.assertNoFullScan(
+            HOT_TABLES, reverse("messaging.conversation_history", args=["alice"]), {"cursor": cursor}
+        )
+        self.assertNoFullScan(
+            HOT_TABLES, reverse("messaging.conversation_updates", args=["alice"]), {"after": "0"}
+        )
+
+    def test_conversation_uses_the_thread_index(self):
+        # Both directions are looked up in the index; merging them needs a sort
+        self.assertQueryUsesIndex(
+            conversation_queryset(self.bob, self.alice)[:20], "message_thread_idx", sorted_by_index=False
+        )
+        self.assertQueryUsesIndex(
+            Message.objects.filter(sender=self.alice, receiver=self.bob, is_read=False).order_by(),
+            "message_thread_idx",
+        )
+
+    def test_unread_counts_use_the_unread_index(self):
+        self.assertQueryUsesIndex(
+            Message.objects.filter(receiver=self.bob, is_read=False).order_by(), "message_unread_idx"
+        )
+
+
+class MessagingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="password")
+        cls.bob = User.objects.create_user("bob", password="password")
+        cls.carol = User.objects.create_user("carol", password="password")
+
+    def setUp(self):
+        cache.clear()
+
+    def send(self, sender, receiver, **fields):
+        # Counters drop their cached values once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(sender=sender, receiver=receiver, subject="Hi", content="Hello", **fields)
+
+    def read_conversation(self, user, partner):
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("messaging.conversation", args=[partner.username]))
+
+
+class UnreadCounterTests(MessagingTestCase):
+    def assertUnreadCountsExact(self):
+        for user in (self.alice, self.bob, self.carol):
+            actual = Message.objects.filter(receiver=user, is_read=False).count()
+            self.assertEqual(counters.get_unread_count(user.id), actual, user.username)
+            # Read straight from the row too, past the cached value
+            stored = UnreadCounter.objects.filter(user=user).values_list("count", flat=True).first()
+            self.assertIn(stored, (None, actual), user.username)
+
+    def test_counts_follow_new_read_and_deleted_messages(self):
+        self.send(self.alice, self.bob)
+        self.send(self.alice, self.bob)
+        self.send(self.carol, self.bob)
+        self.send(self.bob, self.alice, is_read=True)
+        self.assertUnreadCountsExact()
+
+        self.read_conversation(self.bob, self.alice)
+        self.assertUnreadCountsExact()
+
+        message = self.send(self.alice, self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.get(id=message.id).mark_as_read()
+        self.assertUnreadCountsExact()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.filter(sender=self.carol).get().delete()
+        self.assertUnreadCountsExact()
+
+    def test_saving_an_unloaded_message_recounts(self):
+        message = self.send(self.alice, self.bob)
+        # Built without loading, so its previous read state is unknown
+        with self.captureOnCommitCallbacks(execute=True):
+            Message(
+                id=message.id, sender=self.alice, receiver=self.bob, subject="Hi", content="Hello",
+                timestamp=message.timestamp, is_read=True,
+            ).save()
+        self.assertUnreadCountsExact()
+
+    def test_missing_counter_is_rebuilt(self):
+        self.send(self.alice, self.bob)
+        UnreadCounter.objects.all().delete()
+        cache.clear()
+        self.assertUnreadCountsExact()
+        # Reading counts the messages but leaves the row to the next writer
+        self.assertFalse(UnreadCounter.objects.exists())
+        self.send(self.alice, self.bob)
+        self.assertEqual(UnreadCounter.objects.get(user=self.bob).count, 2)
+        self.assertUnreadCountsExact()
+
+
+class ConversationSummaryTests(MessagingTestCase):
+    def assertSummariesExact(self):
+        """Every conversation row agrees with the messages, and every pair that talked has both rows."""
+        expected = {}
+        for message in Message.objects.order_by("timestamp", "id"):
+            sides = [(message.sender_id, message.receiver_id), (message.receiver_id, message.sender_id)]
+            for owner, partner in sides:
+                _, unread = expected.get((owner, partner), (None, 0))
+                if message.receiver_id == owner and not message.is_read:
+                    unread += 1
+                expected[owner, partner] = (message, unread)
+        summaries = {
+            (row.owner_id, row.partner_id): (row.last_message_id, row.last_message_at, row.unread_count)
+            for row in Conversation.objects.all()
+        }
+        self.assertEqual(
+            summaries,
+            {
+                key: (message.id, message.timestamp, unread)
+                for key, (message, unread) in expected.items()
+            },
+        )
+
+    def test_summaries_follow_new_read_and_deleted_messages(self):
+        self.send(self.alice, self.bob)
+        self.send(self.bob, self.alice)
+        self.send(self.alice, self.bob)
+        self.send(self.carol, self.bob)
+        self.assertSummariesExact()
+
+        self.read_conversation(self.bob, self.alice)
+        self.assertSummariesExact()
+
+        latest = self.send(self.bob, self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.get(id=latest.id).mark_as_read()
+        self.assertSummariesExact()
+
+        # The previous message becomes the latest again
+        Message.objects.get(id=latest.id).delete()
+        self.assertSummariesExact()
+
+        # No messages left, no summaries
+        Message.objects.filter(sender=self.carol).delete()
+        self.assertSummariesExact()
+
+    def test_deleting_a_user_leaves_the_other_summaries(self):
+        self.send(self.alice, self.bob)
+        self.send(self.carol, self.bob)
+        self.carol.delete()
+        self.assertSummariesExact()
+
+
+class MessagingRouteBudgetTests(RouteBudgetTests, TestCase):
+    urlconf = "messaging.urls"
+    budgets = {
+        "messaging.inbox": Budget(6, warm=4),
+        "messaging.compose": Budget(6, warm=4),
+        "messaging.compose_to": Budget(7, warm=5),
+        "messaging.conversation": Budget(11, warm=10),
+        "messaging.conversation_history": Budget(5),
+        "messaging.conversation_updates": Budget(9),
+        # An endless event stream
+        "messaging.events": None,
+        "messaging.delete": Budget(21),
+    }
+    params = {"messaging.conversation_updates": {"after": "0"}}
+
+    def url_values(self, data):
+        return {"username": data.recruiter.username, "message_id": data.message.id}
+
+    def query_params(self, name, data):
+        if name == "messaging.conversation_history":
+            # Older messages than the seeker's first page
+            messages = conversation_queryset(data.seeker, data.recruiter)
+            return {"cursor": KeysetPaginator(messages, 2).get_page().next_cursor}
+        return super().query_params(name, data)
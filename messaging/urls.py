@@ -6,6 +6,9 @@ urlpatterns = [
     path('compose/', views.compose, name='messaging.compose'),
     path('compose/<str:username>/', views.compose, name='messaging.compose_to'),
     path('conversation/<str:username>/', views.conversation, name='messaging.conversation'),
+    path('conversation/<str:username>/history/', views.conversation_history, name='messaging.conversation_history'),
+    path('conversation/<str:username>/updates/', views.conversation_updates, name='messaging.conversation_updates'),
+    path('events/', views.message_stream, name='messaging.events'),
     path('delete/<int:message_id>/', views.delete_message, name='messaging.delete'),
 ]
 
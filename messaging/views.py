@@ -1,79 +1,89 @@
+import asyncio
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.contrib import messages as django_messages
-from django.db.models import Q, Max, OuterRef, Subquery
-from .models import Message
+from django.db import transaction
+from django.db.models import Q
+from home.pagination import KeysetPaginator
+from .conversations import adjust_unread
+from .counters import adjust_unread_count
+from .events import hub, publish_message
+from .models import Conversation, Message
 from .forms import MessageForm, ReplyForm
 
+INBOX_PAGE_SIZE = 25
+# Messages rendered when a conversation opens, and per history fetch
+CONVERSATION_PAGE_SIZE = 30
+# Seconds between keep-alive comments on an idle event stream
+STREAM_KEEPALIVE = 25
+
 
 @login_required
 def inbox(request):
     """Display all conversations for the current user"""
-    user = request.user
-    
-    # Get the latest message for each conversation
-    latest_message_subquery = Message.objects.filter(
-        Q(sender=user, receiver=OuterRef('other_user')) |
-        Q(receiver=user, sender=OuterRef('other_user'))
-    ).order_by('-timestamp').values('timestamp')[:1]
-    
-    # Get all users the current user has conversations with
-    sent_to = Message.objects.filter(sender=user).values_list('receiver', flat=True).distinct()
-    received_from = Message.objects.filter(receiver=user).values_list('sender', flat=True).distinct()
-    conversation_user_ids = set(sent_to) | set(received_from)
-    
-    conversations = []
-    for user_id in conversation_user_ids:
-        other_user = User.objects.get(id=user_id)
-        
-        # Get latest message in this conversation
-        latest_msg = Message.objects.filter(
-            Q(sender=user, receiver=other_user) |
-            Q(receiver=user, sender=other_user)
-        ).order_by('-timestamp').first()
-        
-        # Count unread messages from this user
-        unread_count = Message.objects.filter(
-            sender=other_user,
-            receiver=user,
-            is_read=False
-        ).count()
-        
-        conversations.append({
-            'user': other_user,
-            'latest_message': latest_msg,
-            'unread_count': unread_count
-        })
-    
-    # Sort by latest message timestamp
-    conversations.sort(key=lambda x: x['latest_message'].timestamp, reverse=True)
-    
+    conversations = (
+        Conversation.objects.filter(owner=request.user)
+        .select_related('partner__profile', 'last_message')
+        .order_by('-last_message_at', '-id')
+    )
+    page = KeysetPaginator(conversations, INBOX_PAGE_SIZE).get_page(
+        request.GET.get('cursor'), params=request.GET
+    )
+
     context = {
-        'conversations': conversations
+        'conversations': page
     }
     return render(request, 'messaging/inbox.html', context)
 
 
+def conversation_queryset(user, other_user):
+    """Messages between the two users, newest first."""
+    return Message.objects.filter(
+        Q(sender=user, receiver=other_user) |
+        Q(receiver=user, sender=other_user)
+    ).order_by('-timestamp', '-id')
+
+
+def mark_conversation_read(user, other_user):
+    """Mark everything ``other_user`` sent to ``user`` as read."""
+    with transaction.atomic():
+        marked_read = Message.objects.filter(
+            sender=other_user,
+            receiver=user,
+            is_read=False
+        ).update(is_read=True)
+        adjust_unread_count(user.id, -marked_read)
+        adjust_unread(user.id, other_user.id, -marked_read)
+
+
+def render_messages(request, messages, other_user):
+    return render_to_string(
+        'messaging/_messages.html',
+        {'conversation_messages': messages, 'other_user': other_user},
+        request=request,
+    )
+
+
 @login_required
 def conversation(request, username):
-    """Display conversation with a specific user"""
-    other_user = get_object_or_404(User, username=username)
+    """
+    Display conversation with a specific user. Only the newest messages are
+    rendered; older ones are fetched from ``conversation_history`` on scroll
+    and new ones polled from ``conversation_updates``.
+    """
+    other_user = get_object_or_404(User.objects.select_related('profile'), username=username)
     user = request.user
-    
-    # Get all messages in this conversation
-    conversation_messages = Message.objects.filter(
-        Q(sender=user, receiver=other_user) |
-        Q(receiver=user, sender=other_user)
-    ).order_by('timestamp')
-    
+    conversation_messages = conversation_queryset(user, other_user)
+
     # Mark all messages from the other user as read
-    Message.objects.filter(
-        sender=other_user,
-        receiver=user,
-        is_read=False
-    ).update(is_read=True)
-    
+    mark_conversation_read(user, other_user)
+
     # Handle reply form submission
     if request.method == 'POST':
         form = ReplyForm(request.POST)
@@ -83,26 +93,116 @@ def conversation(request, username):
             message.receiver = other_user
             
             # Get subject from the first message in the conversation
-            first_message = conversation_messages.first()
-            if first_message:
-                message.subject = f"Re: {first_message.subject}"
+            first_subject = (
+                conversation_messages.order_by('timestamp', 'id')
+                .values_list('subject', flat=True)
+                .first()
+            )
+            if first_subject:
+                message.subject = f"Re: {first_subject}"
             else:
                 message.subject = "Re: Conversation"
             
             message.save()
+            publish_message(message)
             django_messages.success(request, 'Message sent successfully!')
             return redirect('messaging.conversation', username=username)
     else:
         form = ReplyForm()
-    
+
+    page = KeysetPaginator(conversation_messages, CONVERSATION_PAGE_SIZE).get_page()
     context = {
         'other_user': other_user,
-        'conversation_messages': conversation_messages,
+        # Oldest first, as the thread reads top to bottom
+        'conversation_messages': page.object_list[::-1],
+        'history_cursor': page.next_cursor,
         'form': form
     }
     return render(request, 'messaging/conversation.html', context)
 
 
+@login_required
+def conversation_history(request, username):
+    """Older messages (before ``cursor``) as rendered HTML, for infinite scroll."""
+    other_user = get_object_or_404(User, username=username)
+    cursor = request.GET.get('cursor')
+    if not cursor:
+        return JsonResponse({'error': 'Missing cursor'}, status=400)
+    page = KeysetPaginator(
+        conversation_queryset(request.user, other_user), CONVERSATION_PAGE_SIZE
+    ).get_page(cursor)
+    return JsonResponse({
+        'html': render_messages(request, page.object_list[::-1], other_user),
+        'cursor': page.next_cursor,
+    })
+
+
+@login_required
+def conversation_updates(request, username):
+    """
+    Messages newer than the ``after`` message id, oldest first. Lets an open
+    conversation refresh without reloading the page.
+    """
+    other_user = get_object_or_404(User, username=username)
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid message id'}, status=400)
+
+    new_messages = list(
+        conversation_queryset(request.user, other_user)
+        .filter(id__gt=after)
+        .order_by('timestamp', 'id')[:CONVERSATION_PAGE_SIZE]
+    )
+    if any(message.receiver_id == request.user.id and not message.is_read for message in new_messages):
+        mark_conversation_read(request.user, other_user)
+    return JsonResponse({
+        'messages': [
+            {
+                'id': message.id,
+                'sender': request.user.username if message.sender_id == request.user.id else other_user.username,
+                'content': message.content,
+                'timestamp': message.timestamp.isoformat(),
+            }
+            for message in new_messages
+        ],
+        'html': render_messages(request, new_messages, other_user),
+        'last_id': new_messages[-1].id if new_messages else after,
+    })
+
+
+@login_required
+async def message_stream(request):
+    """
+    Server-sent events announcing new messages to and from the current user.
+    Needs an ASGI server; under WSGI it answers 204, which tells browsers not
+    to reconnect, and pages fall back to polling.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user_id = (await request.auser()).id
+
+    async def events():
+        queue = hub.subscribe(user_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\nid: {event['id']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            hub.unsubscribe(user_id, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def compose(request, username=None):
     """Compose a new message"""
@@ -118,6 +218,7 @@ def compose(request, username=None):
             message = form.save(commit=False)
             message.sender = request.user
             message.save()
+            publish_message(message)
             django_messages.success(request, 'Message sent successfully!')
             return redirect('messaging.conversation', username=message.receiver.username)
     else: